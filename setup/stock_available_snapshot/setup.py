@@ -0,0 +1,6 @@
+import setuptools
+
+setuptools.setup(
+    setup_requires=["setuptools-odoo"],
+    odoo_addon=True,
+)
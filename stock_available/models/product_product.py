@@ -2,10 +2,15 @@
 # Copyright 2016 Sodexis
 # License AGPL-3.0 or later (http://www.gnu.org/licenses/agpl.html).
 
-from odoo import api, fields, models
+from odoo import _, api, fields, models
+from odoo.exceptions import UserError
+from odoo.tools import split_every
 
 from odoo.addons.stock.models.product import OPERATORS
 
+# Number of products evaluated at once when searching on immediately_usable_qty
+SEARCH_BATCH_SIZE = 1000
+
 
 class ProductProduct(models.Model):
 
@@ -75,16 +80,28 @@ class ProductProduct(models.Model):
         """Search function for the immediately_usable_qty field.
         The search is quite similar to the Odoo search about quantity available
         (addons/stock/models/product.py,253; _search_product_quantity function)
+
+        Quantities are computed by batches through
+        `_compute_available_quantities_dict` so all the extensions of the
+        computation are honoured without loading every product in the cache.
         :param operator: str
         :param value: str
         :return: list of tuple (domain)
         """
+        if operator not in OPERATORS:
+            raise UserError(_("Invalid domain operator %s") % operator)
+        compare = OPERATORS[operator]
         product_domain = self._get_search_immediately_usable_qty_domain()
-        products = self.with_context(prefetch_fields=False).search(
-            product_domain, order="id"
-        )
+        candidate_ids = self.search(product_domain, order="id").ids
         product_ids = []
-        for product in products:
-            if OPERATORS[operator](product.immediately_usable_qty, value):
-                product_ids.append(product.id)
+        for batch_ids in split_every(SEARCH_BATCH_SIZE, candidate_ids):
+            products = self.with_context(prefetch_fields=False).browse(batch_ids)
+            res, _stock_dict = products._compute_available_quantities_dict()
+            product_ids.extend(
+                product_id
+                for product_id in batch_ids
+                if compare(res[product_id]["immediately_usable_qty"], value)
+            )
+            # Free the cache filled by the batch before computing the next one
+            products.invalidate_cache(ids=list(batch_ids))
         return [("id", "in", product_ids)]
@@ -2,10 +2,14 @@
 # Copyright 2016 Sodexis
 # License AGPL-3.0 or later (http://www.gnu.org/licenses/agpl.html).
 
-from odoo import api, fields, models
+from odoo import _, api, fields, models
+from odoo.exceptions import UserError
+from odoo.tools import split_every
 
 from odoo.addons.stock.models.product import OPERATORS
 
+from .product_product import SEARCH_BATCH_SIZE
+
 
 class ProductTemplate(models.Model):
     _inherit = "product.template"
@@ -76,11 +80,21 @@ class ProductTemplate(models.Model):
         :param value: str
         :return: list of tuple (domain)
         """
-        products = self.search([])
-        # Force prefetch
-        products.mapped("immediately_usable_qty")
-        product_ids = []
-        for product in products:
-            if OPERATORS[operator](product.immediately_usable_qty, value):
-                product_ids.append(product.id)
-        return [("id", "in", product_ids)]
+        if operator not in OPERATORS:
+            raise UserError(_("Invalid domain operator %s") % operator)
+        compare = OPERATORS[operator]
+        candidate_ids = self.search([], order="id").ids
+        template_ids = []
+        for batch_ids in split_every(SEARCH_BATCH_SIZE, candidate_ids):
+            templates = self.with_context(prefetch_fields=False).browse(batch_ids)
+            res = templates._compute_available_quantities_dict()
+            template_ids.extend(
+                template_id
+                for template_id in batch_ids
+                if compare(res[template_id]["immediately_usable_qty"], value)
+            )
+            # Free the cache filled by the batch before computing the next one
+            variants = templates.product_variant_ids
+            variants.invalidate_cache(ids=variants.ids)
+            templates.invalidate_cache(ids=list(batch_ids))
+        return [("id", "in", template_ids)]
@@ -2,8 +2,12 @@
 # Copyright 2016 Sodexis
 # License AGPL-3.0 or later (http://www.gnu.org/licenses/agpl.html).
 
+from unittest import mock
+
 from odoo.tests.common import TransactionCase
 
+from odoo.addons.stock_available.models import product_product, product_template
+
 
 class TestStockLogisticsWarehouse(TransactionCase):
     def test_res_config(self):
@@ -178,3 +182,34 @@ class TestStockLogisticsWarehouse(TransactionCase):
         self.assertEqual(
             productA.with_context(location=shelf2.id).immediately_usable_qty, 0.0
         )
+
+    def test_search_immediately_usable_qty_batches(self):
+        """The search gives the same result whatever the batch size"""
+        uom_unit = self.env.ref("uom.product_uom_unit")
+        stock_location = self.env.ref("stock.stock_location_stock")
+        products = self.env["product.product"].create(
+            [
+                {"name": "product %s" % idx, "type": "product", "uom_id": uom_unit.id}
+                for idx in range(3)
+            ]
+        )
+        self.env["stock.quant"]._update_available_quantity(
+            products[1], stock_location, 5.0
+        )
+        domain = [
+            ("immediately_usable_qty", ">", 0),
+            ("id", "in", products.ids),
+        ]
+        tmpl_domain = [
+            ("immediately_usable_qty", ">", 0),
+            ("id", "in", products.product_tmpl_id.ids),
+        ]
+        with mock.patch.object(
+            product_product, "SEARCH_BATCH_SIZE", 1
+        ), mock.patch.object(product_template, "SEARCH_BATCH_SIZE", 1):
+            self.assertEqual(self.env["product.product"].search(domain), products[1])
+            self.assertEqual(
+                self.env["product.template"].search(tmpl_domain),
+                products[1].product_tmpl_id,
+            )
+        self.assertEqual(self.env["product.product"].search(domain), products[1])
@@ -2,3 +2,4 @@
 # License AGPL-3.0 or later (http://www.gnu.org/licenses/agpl.html).
 from . import mrp_bom
 from . import product_product
+from . import uom_uom
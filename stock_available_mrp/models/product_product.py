@@ -2,10 +2,9 @@
 # Copyright 2023 Michael Tietz (MT Software) <mtietz@mt-software.de>
 # License AGPL-3.0 or later (http://www.gnu.org/licenses/agpl.html).
 
-from collections import Counter
+from collections import Counter, deque
 
-from odoo import api, models
-from odoo.fields import first
+from odoo import api, models, tools
 from odoo.tools import float_round
 
 
@@ -31,11 +30,15 @@ class ProductProduct(models.Model):
         # explode all boms at once
         exploded_boms = product_with_bom._explode_boms()
 
-        # extract the list of product used as bom component
-        component_products = self.env["product.product"].browse()
-        for exploded_components in exploded_boms.values():
-            for bom_component in exploded_components:
-                component_products |= first(bom_component).product_id
+        # Needs of each product (same product can be in many BOM lines/levels)
+        # and the list of product used as bom component, computed at once
+        needs_by_product = {}
+        component_ids = set()
+        for product in product_with_bom:
+            component_needs = product._get_components_needs(exploded_boms[product.id])
+            needs_by_product[product.id] = component_needs
+            component_ids.update(component.id for component in component_needs)
+        component_products = self.env["product.product"].browse(component_ids)
 
         # Compute stock for product components.
         # {'productid': {field_name: qty}}
@@ -50,24 +53,23 @@ class ProductProduct(models.Model):
                 p.id: {stock_available_mrp_based_on: p[stock_available_mrp_based_on]}
                 for p in component_products
             }
+        available_qties = {
+            component_id: qties[stock_available_mrp_based_on]
+            for component_id, qties in component_qties.items()
+        }
 
         boms_by_product = self.env["mrp.bom"]._get_product2bom(self)
         for product in product_with_bom:
-            # Need by product (same product can be in many BOM lines/levels)
             bom_id = boms_by_product[product]
-            exploded_components = exploded_boms[product.id]
-            component_needs = product._get_components_needs(exploded_components)
+            component_needs = needs_by_product[product.id]
             if not component_needs:
                 # The BoM has no line we can use
                 potential_qty = 0.0
             else:
                 # Find the lowest quantity we can make with the stock at hand
                 components_potential_qty = min(
-                    [
-                        component_qties[component.id][stock_available_mrp_based_on]
-                        / need
-                        for component, need in component_needs.items()
-                    ]
+                    available_qties[component.id] / need
+                    for component, need in component_needs.items()
                 )
                 potential_qty = bom_id.product_qty * components_potential_qty
                 potential_qty = potential_qty > 0.0 and potential_qty or 0.0
@@ -112,10 +114,10 @@ class ProductProduct(models.Model):
         """
         needs = Counter()
         for bom_line, bom_qty in exploded_components:
-            component = bom_line.product_id
-            needs += Counter({component: bom_qty})
-
-        return needs
+            needs[bom_line.product_id] += bom_qty
+        # Drop the components that are not really needed, as adding Counters
+        # would do
+        return +needs
 
     def explode_bom_quantities(self):
         """Explode a bill of material with quantities to consume
@@ -137,48 +139,83 @@ class ProductProduct(models.Model):
         """
         result = {}
         BOM = self.env["mrp.bom"]
+        bom_line_model = self.env["mrp.bom.line"]
         boms_by_product = BOM._get_product2bom(self)
+        cache_key = self._get_explode_bom_cache_key()
         for product in self:
             bom = boms_by_product[product]
             lines_done = []
-            bom_lines = [(bom, bom_line, product, 1.0) for bom_line in bom.bom_line_ids]
+            for line_id, line_quantity in self._explode_bom_cached(
+                bom.id, product.id, cache_key
+            ):
+                bom_line = bom_line_model.browse(line_id)
+                # We round up here because the user expects that if he has
+                # to consume a little more, the whole UOM unit should be
+                # consumed.
+                rounding = bom_line.product_uom_id.rounding
+                line_quantity = float_round(
+                    line_quantity,
+                    precision_rounding=rounding,
+                    rounding_method="UP",
+                )
+                lines_done.append((bom_line, line_quantity))
+
+            result[product.id] = lines_done
+
+        return result
+
+    def _get_explode_bom_cache_key(self):
+        """Return what, besides the BoM and the product, changes the BoMs found
+        while exploding a BoM
+        """
+        return (
+            self.env.su,
+            tuple(self.env.companies.ids),
+            self.env.context.get("company_id"),
+        )
 
-            while bom_lines:
-                (current_bom, current_line, current_product, current_qty) = bom_lines[0]
-                bom_lines = bom_lines[1:]
+    @api.model
+    @tools.ormcache("bom_id", "product_id", "cache_key")
+    def _explode_bom_cached(self, bom_id, product_id, cache_key):
+        """Return the exploded lines of a BoM for one unit of its product
+
+        The sub BoMs of all the lines of a same level are searched at once.
+        The result is cached until a BoM or a BoM line is modified, that's why
+        it only holds ids and quantities that are not rounded yet.
 
+        :return: tuple of (<bom-line-id>, <quantity>)
+        """
+        BOM = self.env["mrp.bom"]
+        bom = BOM.browse(bom_id)
+        product = self.browse(product_id)
+        lines_done = []
+        bom_lines = deque((bom_line, product, 1.0) for bom_line in bom.bom_line_ids)
+
+        while bom_lines:
+            # Handle a whole level of the BoMs at once
+            level = []
+            level_products = self.browse()
+            for __ in range(len(bom_lines)):
+                current_line, current_product, current_qty = bom_lines.popleft()
                 if current_line._skip_bom_line(current_product):
                     continue
-
+                level.append((current_line, current_product, current_qty))
+                level_products |= current_line.product_id
+            sub_boms = BOM._get_product2bom(level_products)
+            for current_line, _current_product, current_qty in level:
                 line_quantity = current_qty * current_line.product_qty
-                sub_bom = BOM._bom_find(product=current_line.product_id)
+                sub_bom = sub_boms[current_line.product_id]
                 if sub_bom.type == "phantom":
                     product_uom = current_line.product_uom_id
                     converted_line_quantity = product_uom._compute_quantity(
                         line_quantity / sub_bom.product_qty,
                         sub_bom.product_uom_id,
                     )
-                    bom_lines = [
-                        (
-                            sub_bom,
-                            line,
-                            current_line.product_id,
-                            converted_line_quantity,
-                        )
+                    bom_lines.extend(
+                        (line, current_line.product_id, converted_line_quantity)
                         for line in sub_bom.bom_line_ids
-                    ] + bom_lines
-                else:
-                    # We round up here because the user expects that if he has
-                    # to consume a little more, the whole UOM unit should be
-                    # consumed.
-                    rounding = current_line.product_uom_id.rounding
-                    line_quantity = float_round(
-                        line_quantity,
-                        precision_rounding=rounding,
-                        rounding_method="UP",
                     )
-                    lines_done.append((current_line, line_quantity))
-
-            result[product.id] = lines_done
+                else:
+                    lines_done.append((current_line.id, line_quantity))
 
-        return result
+        return tuple(lines_done)
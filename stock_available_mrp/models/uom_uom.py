@@ -0,0 +1,14 @@
+# Copyright 2026 Moduon Team S.L.
+# License AGPL-3.0 or later (http://www.gnu.org/licenses/agpl.html).
+from odoo import models
+
+
+class UomUom(models.Model):
+    _inherit = "uom.uom"
+
+    def write(self, vals):
+        # Exploded BoMs are cached with quantities converted between UoMs, see
+        # product.product._explode_bom_cached()
+        if {"factor", "factor_inv", "rounding"} & set(vals):
+            self.clear_caches()
+        return super().write(vals)
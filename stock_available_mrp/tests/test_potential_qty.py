@@ -596,3 +596,78 @@ class TestPotentialQty(SavepointCase):
         product2.invalidate_cache()
         self.assertEqual(product1.immediately_usable_qty, 0)
         self.assertEqual(product2.immediately_usable_qty, 1)
+
+    def test_multi_level_phantom_shared_kit(self):
+        # Two kits sharing a multi-level phantom sub kit: the exploded BoMs
+        # follow the modifications of the BoM lines despite being cached
+        component = self.product_model.create({"name": "Component", "type": "product"})
+        self.create_inventory(component.id, 96)
+        sub_kit = component
+        for level in range(4):
+            kit = self.product_model.create(
+                {"name": "Sub kit %s" % level, "type": "consu"}
+            )
+            bom = self.create_simple_bom(kit, sub_kit, sub_product_qty=2)
+            bom.type = "phantom"
+            sub_kit = kit
+        kit_1 = self.product_model.create({"name": "Kit 1", "type": "consu"})
+        kit_2 = self.product_model.create({"name": "Kit 2", "type": "consu"})
+        self.create_simple_bom(kit_1, sub_kit).type = "phantom"
+        bom_2 = self.create_simple_bom(kit_2, sub_kit, sub_product_qty=2)
+        bom_2.type = "phantom"
+
+        exploded = (kit_1 | kit_2).explode_bom_quantities()
+        self.assertEqual([qty for __, qty in exploded[kit_1.id]], [16.0])
+        self.assertEqual([qty for __, qty in exploded[kit_2.id]], [32.0])
+        self.assertEqual(exploded[kit_1.id][0][0].product_id, component)
+        (kit_1 | kit_2).invalidate_cache()
+        self.assertEqual(kit_1.potential_qty, 6.0)
+        self.assertEqual(kit_2.potential_qty, 3.0)
+
+        bom_2.bom_line_ids.product_qty = 1
+        exploded = kit_2.explode_bom_quantities()
+        self.assertEqual([qty for __, qty in exploded[kit_2.id]], [16.0])
+        kit_2.invalidate_cache()
+        self.assertEqual(kit_2.potential_qty, 6.0)
+
+    def test_multi_level_phantom_uom_change(self):
+        # The exploded BoMs follow the modifications of the UoMs despite being
+        # cached
+        component = self.product_model.create({"name": "Component", "type": "product"})
+        sub_kit = self.product_model.create({"name": "Sub kit", "type": "consu"})
+        self.create_simple_bom(sub_kit, component).type = "phantom"
+        pack = self.env["uom.uom"].create(
+            {
+                "name": "Pack",
+                "category_id": self.env.ref("uom.product_uom_categ_unit").id,
+                "uom_type": "bigger",
+                "factor_inv": 2,
+            }
+        )
+        kit = self.product_model.create({"name": "Kit", "type": "consu"})
+        bom = self.create_simple_bom(kit, sub_kit)
+        bom.type = "phantom"
+        bom.bom_line_ids.product_uom_id = pack
+        exploded = kit.explode_bom_quantities()
+        self.assertEqual([qty for __, qty in exploded[kit.id]], [2.0])
+        pack.factor_inv = 3
+        exploded = kit.explode_bom_quantities()
+        self.assertEqual([qty for __, qty in exploded[kit.id]], [3.0])
+
+    def test_components_needs(self):
+        # Needs of a component used on several lines are summed up, components
+        # that are not consumed are ignored
+        component_1 = self.product_model.create({"name": "C1", "type": "product"})
+        component_2 = self.product_model.create({"name": "C2", "type": "product"})
+        kit = self.product_model.create({"name": "Kit", "type": "consu"})
+        bom = self.create_simple_bom(kit, component_1, sub_product_qty=2)
+        bom.type = "phantom"
+        for product, qty in ((component_1, 3), (component_2, 0)):
+            self.bom_line_model.create(
+                {"bom_id": bom.id, "product_id": product.id, "product_qty": qty}
+            )
+        needs = kit._get_components_needs(kit.explode_bom_quantities()[kit.id])
+        self.assertEqual(dict(needs), {component_1: 5.0})
+        self.create_inventory(component_1.id, 10)
+        kit.invalidate_cache()
+        self.assertEqual(kit.potential_qty, 2.0)
@@ -0,0 +1,20 @@
+# Copyright 2026 Moduon Team S.L.
+# License AGPL-3.0 or later (http://www.gnu.org/licenses/agpl.html).
+
+{
+    "name": "Stock available to promise snapshot",
+    "summary": "Store the quantities available to promise per warehouse",
+    "version": "14.0.1.0.0",
+    "author": "Moduon, Odoo Community Association (OCA)",
+    "website": "https://github.com/OCA/stock-logistics-warehouse",
+    "development_status": "Alpha",
+    "category": "Warehouse",
+    "depends": ["stock_available"],
+    "license": "AGPL-3",
+    "data": [
+        "security/ir.model.access.csv",
+        "data/ir_cron.xml",
+    ],
+    "uninstall_hook": "uninstall_hook",
+    "installable": True,
+}
@@ -0,0 +1,14 @@
+# Copyright 2026 Moduon Team S.L.
+# License AGPL-3.0 or later (http://www.gnu.org/licenses/agpl.html).
+
+
+def uninstall_hook(cr, registry):
+    # The log of the changes and the snapshot of the transactions are created
+    # in `stock.available.snapshot.init()`, outside of the ORM
+    cr.execute(
+        """
+        DROP TABLE IF EXISTS stock_available_snapshot_change;
+        ALTER TABLE IF EXISTS stock_available_snapshot
+        DROP COLUMN IF EXISTS computed_snapshot;
+        """
+    )
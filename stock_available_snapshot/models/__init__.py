@@ -0,0 +1,4 @@
+from . import stock_available_snapshot
+from . import product_product
+from . import stock_move
+from . import stock_quant
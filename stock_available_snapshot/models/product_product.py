@@ -0,0 +1,67 @@
+# Copyright 2026 Moduon Team S.L.
+# License AGPL-3.0 or later (http://www.gnu.org/licenses/agpl.html).
+
+from odoo import models
+
+from .stock_available_snapshot import BYPASS_CONTEXT_KEYS
+
+
+class ProductProduct(models.Model):
+    _inherit = "product.product"
+
+    def _get_available_snapshot_warehouse(self):
+        """Return the warehouse whose snapshot matches the current context"""
+        warehouse_id = self.env.context.get("warehouse")
+        if not isinstance(warehouse_id, int) or any(
+            self.env.context.get(key) for key in BYPASS_CONTEXT_KEYS
+        ):
+            return self.env["stock.warehouse"]
+        return self.env["stock.warehouse"].browse(warehouse_id)
+
+    def _compute_available_quantities(self):
+        warehouse = self._get_available_snapshot_warehouse()
+        products = self.filtered("id")
+        if not warehouse or not products:
+            return super()._compute_available_quantities()
+        new_products = self - products
+        if new_products:
+            super(ProductProduct, new_products)._compute_available_quantities()
+        values = (
+            self.env["stock.available.snapshot"]
+            .sudo()
+            ._get_snapshot_values(products, warehouse)
+        )
+        for product in products:
+            for key, value in values[product.id].items():
+                product[key] = value
+
+    def _get_available_snapshot_impacted_products(self):
+        """Return the products whose availability depends on these ones
+
+        When manufacturing is installed, the potential quantity of the
+        products made from these ones changes with their stock.
+        """
+        products = self
+        if "mrp.bom.line" not in self.env:
+            return products
+        components = self
+        while components:
+            boms = (
+                self.env["mrp.bom.line"]
+                .sudo()
+                .search([("product_id", "in", components.ids)])
+                .bom_id
+            )
+            made_products = (
+                boms.product_id
+                | boms.filtered(
+                    lambda b: not b.product_id
+                ).product_tmpl_id.product_variant_ids
+            )
+            components = made_products - products
+            products |= made_products
+        return products
+
+    def _mark_available_snapshot_to_refresh(self):
+        # the products made from these ones are flagged by the cron
+        self.env["stock.available.snapshot"].sudo()._mark_to_refresh(self)
@@ -0,0 +1,382 @@
+# Copyright 2026 Moduon Team S.L.
+# License AGPL-3.0 or later (http://www.gnu.org/licenses/agpl.html).
+
+import logging
+
+import psycopg2
+from psycopg2.extras import execute_values
+
+from odoo import api, fields, models
+from odoo.tools import float_compare, mute_logger, split_every
+
+_logger = logging.getLogger(__name__)
+
+# Context keys changing the computation of the quantities in a way a
+# per warehouse snapshot cannot reflect
+BYPASS_CONTEXT_KEYS = (
+    "lot_id",
+    "owner_id",
+    "package_id",
+    "from_date",
+    "to_date",
+    "location",
+    "excluded_location_ids",
+    "skip_available_snapshot",
+)
+SNAPSHOT_FIELDS = ("immediately_usable_qty", "potential_qty")
+BATCH_SIZE = 1000
+# Changes are kept at least this long, so a transaction started before them
+# never stores values computed without them as up to date
+CHANGE_RETENTION = "1 hour"
+
+
+class StockAvailableSnapshot(models.Model):
+    _name = "stock.available.snapshot"
+    _description = "Quantities available to promise per warehouse"
+    _log_access = False
+
+    product_id = fields.Many2one(
+        comodel_name="product.product",
+        required=True,
+        index=True,
+        ondelete="cascade",
+        readonly=True,
+    )
+    warehouse_id = fields.Many2one(
+        comodel_name="stock.warehouse",
+        required=True,
+        ondelete="cascade",
+        readonly=True,
+    )
+    immediately_usable_qty = fields.Float(
+        digits="Product Unit of Measure",
+        string="Available to promise",
+        readonly=True,
+    )
+    potential_qty = fields.Float(
+        digits="Product Unit of Measure",
+        string="Potential",
+        readonly=True,
+    )
+    to_refresh = fields.Boolean(
+        index=True,
+        readonly=True,
+        help="A stock move or a quant of the product changed since the "
+        "quantities have been computed.",
+    )
+
+    _sql_constraints = [
+        (
+            "product_warehouse_uniq",
+            "unique(product_id, warehouse_id)",
+            "Only one snapshot per product and warehouse is allowed.",
+        )
+    ]
+
+    def init(self):
+        # The values are stored with the snapshot of the transaction which
+        # computed them, and every change of the stock of a product is logged
+        # with the id of its transaction: the values are up to date as long
+        # as all the changes of the product are visible in their snapshot.
+        self.env.cr.execute(
+            """
+            ALTER TABLE stock_available_snapshot
+            ADD COLUMN IF NOT EXISTS computed_snapshot txid_snapshot;
+            CREATE TABLE IF NOT EXISTS stock_available_snapshot_change (
+                product_id integer NOT NULL
+                    REFERENCES product_product(id) ON DELETE CASCADE,
+                txid bigint NOT NULL,
+                date timestamp NOT NULL DEFAULT (now() at time zone 'utc'),
+                propagated boolean NOT NULL DEFAULT false,
+                PRIMARY KEY (product_id, txid)
+            );
+            """
+        )
+
+    @api.model
+    def _mark_to_refresh(self, products, propagated=False):
+        """Log a change of the stock of the products
+
+        The snapshots of the products are flagged as outdated, and the change
+        is logged so a snapshot computed by a concurrent transaction, which
+        cannot see it, is not considered as up to date.
+
+        :param propagated: the products made from these ones are flagged too,
+                           otherwise the cron flags them
+        """
+        if not products:
+            return
+        self.env.cr.execute(
+            """
+            UPDATE stock_available_snapshot
+            SET to_refresh = true
+            WHERE product_id IN %s AND NOT to_refresh
+            """,
+            (tuple(products.ids),),
+        )
+        self.env.cr.execute(
+            """
+            INSERT INTO stock_available_snapshot_change (
+                product_id, txid, propagated
+            )
+            SELECT product_id, txid_current(), %s
+            FROM unnest(%s) AS product_id
+            ON CONFLICT (product_id, txid) DO NOTHING
+            """,
+            (propagated, list(products.ids)),
+        )
+        self.invalidate_cache(["to_refresh"])
+
+    @api.model
+    def _get_snapshot_values(self, products, warehouse):
+        """Return the quantities of the products for the warehouse
+
+        Products without an up to date snapshot are computed and their
+        snapshot is refreshed on the fly.
+
+        :return: dict {product_id: {field_name: qty}}
+        """
+        self.env.cr.execute(
+            """
+            SELECT snapshot.product_id, snapshot.immediately_usable_qty,
+                snapshot.potential_qty
+            FROM stock_available_snapshot snapshot
+            WHERE snapshot.warehouse_id = %s
+                AND snapshot.product_id IN %s
+                AND NOT snapshot.to_refresh
+                AND snapshot.computed_snapshot IS NOT NULL
+                AND NOT EXISTS (
+                    SELECT 1
+                    FROM stock_available_snapshot_change change
+                    WHERE change.product_id = snapshot.product_id
+                        AND NOT txid_visible_in_snapshot(
+                            change.txid, snapshot.computed_snapshot
+                        )
+                )
+            """,
+            (warehouse.id, tuple(products.ids)),
+        )
+        res = {
+            product_id: {
+                "immediately_usable_qty": immediately_usable_qty,
+                "potential_qty": potential_qty,
+            }
+            for product_id, immediately_usable_qty, potential_qty in (
+                self.env.cr.fetchall()
+            )
+        }
+        missing_products = products.filtered(lambda p: p.id not in res)
+        if missing_products:
+            res.update(self._refresh(missing_products, warehouse))
+        return res
+
+    @api.model
+    def _compute_snapshot_values(self, products, warehouse):
+        """Compute the quantities of the products for the warehouse
+
+        :return: dict {product_id: {field_name: qty}}
+        """
+        # the values are shared by all the users: compute them without the
+        # record rules and companies of the current one
+        res, _stock_dict = (
+            products.sudo()
+            .with_company(warehouse.company_id)
+            .with_context(warehouse=warehouse.id, skip_available_snapshot=True)
+            ._compute_available_quantities_dict()
+        )
+        return {
+            product_id: {fname: values[fname] for fname in SNAPSHOT_FIELDS}
+            for product_id, values in res.items()
+        }
+
+    @api.model
+    def _store_snapshot_values(self, warehouse, values):
+        """Insert or update the snapshots of the warehouse
+
+        They are stored with the snapshot of the current transaction, which
+        computed them: the changes this snapshot cannot see make them
+        outdated. A concurrent transaction may update the same snapshots, in
+        which case they are left untouched: they will be refreshed later.
+
+        :param values: dict {product_id: {field_name: qty}}
+        """
+        rows = [
+            (
+                product_id,
+                warehouse.id,
+                qties["immediately_usable_qty"],
+                qties["potential_qty"],
+            )
+            for product_id, qties in values.items()
+        ]
+        try:
+            with mute_logger("odoo.sql_db"), self.env.cr.savepoint():
+                execute_values(
+                    self.env.cr._obj,
+                    """
+                    INSERT INTO stock_available_snapshot (
+                        product_id, warehouse_id, immediately_usable_qty,
+                        potential_qty, to_refresh, computed_snapshot
+                    )
+                    VALUES %s
+                    ON CONFLICT (product_id, warehouse_id) DO UPDATE SET
+                        immediately_usable_qty = EXCLUDED.immediately_usable_qty,
+                        potential_qty = EXCLUDED.potential_qty,
+                        to_refresh = false,
+                        computed_snapshot = EXCLUDED.computed_snapshot
+                    """,
+                    rows,
+                    template="(%s, %s, %s, %s, false, txid_current_snapshot())",
+                )
+        except (psycopg2.OperationalError, psycopg2.IntegrityError):
+            _logger.debug(
+                "Availability snapshots of warehouse %s not stored: "
+                "concurrent update",
+                warehouse.id,
+            )
+        self.invalidate_cache()
+
+    @api.model
+    def _refresh(self, products, warehouse):
+        """Compute and store the quantities of the products for the warehouse
+
+        :return: dict {product_id: {field_name: qty}}
+        """
+        values = self._compute_snapshot_values(products, warehouse)
+        self._store_snapshot_values(warehouse, values)
+        return values
+
+    @api.model
+    def _get_inconsistencies(self, products, warehouse, values=None):
+        """Compare the up to date snapshots with the computed quantities
+
+        :param values: already computed quantities, computed when not given
+        :return: dict {product_id: (snapshot values, computed values)}
+        """
+        if values is None:
+            values = self._compute_snapshot_values(products, warehouse)
+        precision = self.env["decimal.precision"].precision_get(
+            "Product Unit of Measure"
+        )
+        snapshots = self.search(
+            [
+                ("product_id", "in", products.ids),
+                ("warehouse_id", "=", warehouse.id),
+                ("to_refresh", "=", False),
+            ]
+        )
+        res = {}
+        for snapshot in snapshots:
+            computed = values[snapshot.product_id.id]
+            stored = {fname: snapshot[fname] for fname in SNAPSHOT_FIELDS}
+            if any(
+                float_compare(
+                    stored[fname], computed[fname], precision_digits=precision
+                )
+                for fname in SNAPSHOT_FIELDS
+            ):
+                res[snapshot.product_id.id] = (stored, computed)
+        return res
+
+    @api.model
+    def _get_products_to_rebuild(self):
+        product_model = self.env["product.product"]
+        products = product_model.search(
+            product_model._get_search_immediately_usable_qty_domain()
+        )
+        return products | self.search([]).product_id
+
+    @api.model
+    def _propagate_changes(self):
+        """Flag the snapshots of the products made from the changed ones
+
+        Looking for the bills of materials using the changed products would
+        slow down every stock move, it is done here for all of them at once.
+        """
+        self.env.cr.execute(
+            """
+            UPDATE stock_available_snapshot_change
+            SET propagated = true
+            WHERE NOT propagated
+            RETURNING product_id
+            """
+        )
+        products = self.env["product.product"].browse(
+            {row[0] for row in self.env.cr.fetchall()}
+        )
+        made_products = products._get_available_snapshot_impacted_products()
+        self._mark_to_refresh(made_products - products, propagated=True)
+
+    @api.model
+    def _get_outdated_snapshots(self):
+        """Return the snapshots flagged as outdated or missing a change"""
+        self.env.cr.execute(
+            """
+            SELECT snapshot.id
+            FROM stock_available_snapshot snapshot
+            WHERE snapshot.to_refresh
+                OR snapshot.computed_snapshot IS NULL
+                OR EXISTS (
+                    SELECT 1
+                    FROM stock_available_snapshot_change change
+                    WHERE change.product_id = snapshot.product_id
+                        AND NOT txid_visible_in_snapshot(
+                            change.txid, snapshot.computed_snapshot
+                        )
+                )
+            """
+        )
+        return self.browse([row[0] for row in self.env.cr.fetchall()])
+
+    @api.model
+    def _clean_changes(self):
+        """Forget the old changes already seen by the snapshots"""
+        self.env.cr.execute(
+            """
+            DELETE FROM stock_available_snapshot_change change
+            WHERE change.propagated
+                AND change.date < (now() at time zone 'utc') - %s::interval
+                AND NOT EXISTS (
+                    SELECT 1
+                    FROM stock_available_snapshot snapshot
+                    WHERE snapshot.product_id = change.product_id
+                        AND NOT txid_visible_in_snapshot(
+                            change.txid, snapshot.computed_snapshot
+                        )
+                )
+            """,
+            (CHANGE_RETENTION,),
+        )
+
+    @api.model
+    def cron_refresh(self):
+        """Compute again the outdated snapshots"""
+        self._propagate_changes()
+        snapshots = self._get_outdated_snapshots()
+        for warehouse in snapshots.warehouse_id:
+            products = snapshots.filtered(
+                lambda s, wh=warehouse: s.warehouse_id == wh
+            ).product_id
+            for batch_ids in split_every(BATCH_SIZE, products.ids):
+                self._refresh(products.browse(batch_ids), warehouse)
+        self._clean_changes()
+
+    @api.model
+    def cron_rebuild(self):
+        """Compute again all the snapshots and report the inconsistent ones"""
+        products = self._get_products_to_rebuild()
+        for warehouse in self.env["stock.warehouse"].search([]):
+            inconsistencies = 0
+            for batch_ids in split_every(BATCH_SIZE, products.ids):
+                batch_products = products.browse(batch_ids)
+                values = self._compute_snapshot_values(batch_products, warehouse)
+                inconsistencies += len(
+                    self._get_inconsistencies(batch_products, warehouse, values)
+                )
+                self._store_snapshot_values(warehouse, values)
+            if inconsistencies:
+                _logger.warning(
+                    "%s inconsistent availability snapshots fixed for warehouse %s",
+                    inconsistencies,
+                    warehouse.name,
+                )
@@ -0,0 +1,34 @@
+# Copyright 2026 Moduon Team S.L.
+# License AGPL-3.0 or later (http://www.gnu.org/licenses/agpl.html).
+
+from odoo import api, models
+
+
+class StockMove(models.Model):
+    _inherit = "stock.move"
+
+    def _get_available_snapshot_fields(self):
+        """Fields changing the quantities available to promise"""
+        return [
+            "state",
+            "product_id",
+            "product_uom_qty",
+            "product_uom",
+            "location_id",
+            "location_dest_id",
+            "date",
+        ]
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        moves = super().create(vals_list)
+        moves.product_id._mark_available_snapshot_to_refresh()
+        return moves
+
+    def write(self, vals):
+        if not any(fname in vals for fname in self._get_available_snapshot_fields()):
+            return super().write(vals)
+        products = self.product_id
+        res = super().write(vals)
+        (products | self.product_id)._mark_available_snapshot_to_refresh()
+        return res
@@ -0,0 +1,22 @@
+# Copyright 2026 Moduon Team S.L.
+# License AGPL-3.0 or later (http://www.gnu.org/licenses/agpl.html).
+
+from odoo import api, models
+
+
+class StockQuant(models.Model):
+    _inherit = "stock.quant"
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        quants = super().create(vals_list)
+        quants.product_id._mark_available_snapshot_to_refresh()
+        return quants
+
+    def write(self, vals):
+        if not {"quantity", "location_id", "product_id"} & set(vals):
+            return super().write(vals)
+        products = self.product_id
+        res = super().write(vals)
+        (products | self.product_id)._mark_available_snapshot_to_refresh()
+        return res
@@ -0,0 +1 @@
+from . import test_stock_available_snapshot
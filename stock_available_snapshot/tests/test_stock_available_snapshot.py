@@ -0,0 +1,121 @@
+# Copyright 2026 Moduon Team S.L.
+# License AGPL-3.0 or later (http://www.gnu.org/licenses/agpl.html).
+
+from odoo.tests.common import SavepointCase
+
+
+class TestStockAvailableSnapshot(SavepointCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.snapshot_model = cls.env["stock.available.snapshot"]
+        cls.warehouse = cls.env.ref("stock.warehouse0")
+        cls.customer_location = cls.env.ref("stock.stock_location_customers")
+        cls.product = cls.env["product.product"].create(
+            {"name": "Snapshot product", "type": "product"}
+        )
+        cls.env["stock.quant"]._update_available_quantity(
+            cls.product, cls.warehouse.lot_stock_id, 10.0
+        )
+
+    def _get_snapshot(self):
+        return self.snapshot_model.search(
+            [
+                ("product_id", "=", self.product.id),
+                ("warehouse_id", "=", self.warehouse.id),
+            ]
+        )
+
+    def _read_qty(self, **context):
+        self.product.invalidate_cache()
+        return self.product.with_context(**context).immediately_usable_qty
+
+    def test_read_creates_snapshot(self):
+        self.assertFalse(self._get_snapshot())
+        self.assertEqual(self._read_qty(warehouse=self.warehouse.id), 10.0)
+        snapshot = self._get_snapshot()
+        self.assertEqual(snapshot.immediately_usable_qty, 10.0)
+        self.assertFalse(snapshot.to_refresh)
+
+    def test_move_flags_snapshot(self):
+        self._read_qty(warehouse=self.warehouse.id)
+        move = self.env["stock.move"].create(
+            {
+                "name": "Out",
+                "product_id": self.product.id,
+                "product_uom": self.product.uom_id.id,
+                "product_uom_qty": 3.0,
+                "location_id": self.warehouse.lot_stock_id.id,
+                "location_dest_id": self.customer_location.id,
+            }
+        )
+        move._action_confirm()
+        self.assertTrue(self._get_snapshot().to_refresh)
+        self.assertEqual(self._read_qty(warehouse=self.warehouse.id), 7.0)
+        self.assertFalse(self._get_snapshot().to_refresh)
+
+    def test_context_bypass(self):
+        self.assertEqual(
+            self._read_qty(
+                warehouse=self.warehouse.id,
+                location=self.warehouse.lot_stock_id.id,
+            ),
+            10.0,
+        )
+        self.assertEqual(self._read_qty(), 10.0)
+        self.assertFalse(self._get_snapshot())
+
+    def test_cron_refresh(self):
+        self._read_qty(warehouse=self.warehouse.id)
+        self.env["stock.quant"]._update_available_quantity(
+            self.product, self.warehouse.lot_stock_id, 5.0
+        )
+        self.assertTrue(self._get_snapshot().to_refresh)
+        self.snapshot_model.cron_refresh()
+        snapshot = self._get_snapshot()
+        self.assertFalse(snapshot.to_refresh)
+        self.assertEqual(snapshot.immediately_usable_qty, 15.0)
+
+    def test_inconsistencies_and_rebuild(self):
+        self._read_qty(warehouse=self.warehouse.id)
+        self.env.cr.execute(
+            "UPDATE stock_available_snapshot SET immediately_usable_qty = 42 "
+            "WHERE product_id = %s",
+            (self.product.id,),
+        )
+        self.snapshot_model.invalidate_cache()
+        inconsistencies = self.snapshot_model._get_inconsistencies(
+            self.product, self.warehouse
+        )
+        self.assertIn(self.product.id, inconsistencies)
+        self.snapshot_model.cron_rebuild()
+        self.assertFalse(
+            self.snapshot_model._get_inconsistencies(self.product, self.warehouse)
+        )
+        self.assertEqual(self._read_qty(warehouse=self.warehouse.id), 10.0)
+
+    def test_concurrent_change(self):
+        """Values computed without a change are not served"""
+        self._read_qty(warehouse=self.warehouse.id)
+        self.env.cr.execute(
+            "DELETE FROM stock_available_snapshot_change WHERE product_id = %s",
+            (self.product.id,),
+        )
+        self.env.cr.execute(
+            "UPDATE stock_available_snapshot "
+            "SET immediately_usable_qty = 42, to_refresh = false, "
+            "computed_snapshot = txid_current_snapshot() "
+            "WHERE product_id = %s",
+            (self.product.id,),
+        )
+        self.assertEqual(self._read_qty(warehouse=self.warehouse.id), 42.0)
+        # a change committed by a transaction the snapshot cannot see
+        self.env.cr.execute(
+            "INSERT INTO stock_available_snapshot_change (product_id, txid) "
+            "SELECT %s, txid_snapshot_xmax(txid_current_snapshot()) + 1",
+            (self.product.id,),
+        )
+        self.assertEqual(self._read_qty(warehouse=self.warehouse.id), 10.0)
+        self.assertIn(
+            self._get_snapshot(), self.snapshot_model._get_outdated_snapshots()
+        )
@@ -88,8 +88,61 @@ class ProductProduct(models.Model):
         if not isinstance(value, (float, int)):
             raise UserError(_("Invalid domain right operand %s") % value)
 
-        ids = []
-        for product in self.search([]):
-            if OPERATORS[operator](product.qty_available_not_res, value):
-                ids.append(product.id)
-        return [("id", "in", ids)]
+        # Products without quant have no unreserved quantity: depending on
+        # whether zero matches, look for the products matching the condition
+        # or for the ones not matching it.
+        zero_matches = OPERATORS[operator](0.0, value)
+        product_ids = self._get_product_ids_by_qty_unreserved(
+            operator, value, negate=zero_matches
+        )
+        return [("id", "not in" if zero_matches else "in", product_ids)]
+
+    @api.model
+    def _get_product_ids_by_qty_unreserved(self, operator, value, negate=False):
+        """Return the ids of the products having quants in the locations of the
+        context and whose unreserved quantity, rounded to their unit of
+        measure, matches the condition. The sums are computed by the
+        database.
+
+        :param operator: one of the keys of OPERATORS
+        :param value: float
+        :param negate: return the products not matching the condition
+        :return: list of ids
+        """
+        quant_model = self.env["stock.quant"]
+        quant_model.flush(
+            ["product_id", "location_id", "company_id", "quantity", "reserved_quantity"]
+        )
+        query = quant_model._where_calc(self._get_domain_locations()[0])
+        quant_model._apply_ir_rules(query, "read")
+        from_clause, where_clause, where_params = query.get_sql()
+        condition = "ROUND(qty.unreserved / uom.rounding) * uom.rounding {} %s".format(
+            operator
+        )
+        if negate:
+            condition = "NOT ({})".format(condition)
+        # pylint: disable=sql-injection
+        self.env.cr.execute(
+            """
+            SELECT qty.product_id
+            FROM (
+                SELECT
+                    stock_quant.product_id,
+                    SUM(stock_quant.quantity - stock_quant.reserved_quantity)
+                        AS unreserved
+                FROM {from_clause}
+                WHERE {where_clause}
+                GROUP BY stock_quant.product_id
+            ) AS qty
+            JOIN product_product product ON product.id = qty.product_id
+            JOIN product_template tmpl ON tmpl.id = product.product_tmpl_id
+            JOIN uom_uom uom ON uom.id = tmpl.uom_id
+            WHERE {condition}
+            """.format(
+                from_clause=from_clause,
+                where_clause=where_clause or "TRUE",
+                condition=condition,
+            ),
+            where_params + [value],
+        )
+        return [row[0] for row in self.env.cr.fetchall()]
@@ -85,10 +85,13 @@ class StockCycleCount(models.Model):
             "responsible_id": self.responsible_id.id,
         }
 
-    @api.model
-    def create(self, vals):
-        vals["name"] = self.env["ir.sequence"].next_by_code("stock.cycle.count") or ""
-        return super(StockCycleCount, self).create(vals)
+    @api.model_create_multi
+    def create(self, vals_list):
+        for vals in vals_list:
+            vals["name"] = (
+                self.env["ir.sequence"].next_by_code("stock.cycle.count") or ""
+            )
+        return super(StockCycleCount, self).create(vals_list)
 
     def action_create_inventory_adjustment(self):
         if any([s != "draft" for s in self.mapped("state")]):
@@ -2,10 +2,19 @@
 #   (http://www.forgeflow.com)
 # License AGPL-3.0 or later (https://www.gnu.org/licenses/agpl.html).
 
+import logging
+import time
+from collections import defaultdict
 from datetime import datetime, timedelta
 
 from odoo import _, api, fields, models
 from odoo.exceptions import UserError, ValidationError
+from odoo.tools import split_every
+
+_logger = logging.getLogger(__name__)
+
+# Number of locations whose done moves are read at once for the turnover
+TURNOVER_BATCH_SIZE = 1000
 
 
 class StockCycleCountRule(models.Model):
@@ -146,12 +155,20 @@ class StockCycleCountRule(models.Model):
     )
 
     def compute_rule(self, locs):
+        start = time.perf_counter()
         if self.rule_type == "periodic":
             proposed_cycle_counts = self._compute_rule_periodic(locs)
         elif self.rule_type == "turnover":
             proposed_cycle_counts = self._compute_rule_turnover(locs)
         elif self.rule_type == "accuracy":
             proposed_cycle_counts = self._compute_rule_accuracy(locs)
+        _logger.info(
+            "Cycle count rule %s: %d counts proposed for %d locations in %.2fs",
+            self.name,
+            len(proposed_cycle_counts),
+            len(locs),
+            time.perf_counter() - start,
+        )
         return proposed_cycle_counts
 
     @api.model
@@ -163,22 +180,54 @@ class StockCycleCountRule(models.Model):
         }
         return cycle_count
 
+    @api.model
+    def _get_latest_inventory_dates(self, locs):
+        """Return the date of the latest inventory of each location
+
+        :return: dict {location id: datetime}, without the locations never
+                 counted
+        """
+        if not locs:
+            return {}
+        inventory_model = self.env["stock.inventory"]
+        field = inventory_model._fields["location_ids"]
+        inventory_model.flush(["date", "state", "location_ids"])
+        query = inventory_model._where_calc(
+            [
+                ("location_ids", "in", locs.ids),
+                ("state", "in", ["confirm", "done", "draft"]),
+            ]
+        )
+        inventory_model._apply_ir_rules(query, "read")
+        from_clause, where_clause, where_params = query.get_sql()
+        # pylint: disable=sql-injection
+        self.env.cr.execute(
+            """
+            SELECT rel.{location_column}, MAX(inventory.date)
+            FROM {relation} rel
+            JOIN stock_inventory inventory ON inventory.id = rel.{inventory_column}
+            WHERE rel.{location_column} IN %s
+                AND inventory.id IN (
+                    SELECT stock_inventory.id FROM {from_clause} WHERE {where_clause}
+                )
+            GROUP BY rel.{location_column}
+            """.format(
+                relation=field.relation,
+                inventory_column=field.column1,
+                location_column=field.column2,
+                from_clause=from_clause,
+                where_clause=where_clause or "TRUE",
+            ),
+            [tuple(locs.ids)] + where_params,
+        )
+        return dict(self.env.cr.fetchall())
+
     @api.model
     def _compute_rule_periodic(self, locs):
         cycle_counts = []
+        latest_inventory_dates = self._get_latest_inventory_dates(locs)
         for loc in locs:
-            latest_inventory_date = (
-                self.env["stock.inventory"]
-                .search(
-                    [
-                        ("location_ids", "in", [loc.id]),
-                        ("state", "in", ["confirm", "done", "draft"]),
-                    ],
-                    order="date desc",
-                    limit=1,
-                )
-                .date
-            )
+            latest_inventory_date = latest_inventory_dates.get(loc.id)
             if latest_inventory_date:
                 try:
                     period = self.periodic_count_period / self.periodic_qty_per_period
@@ -203,16 +252,73 @@ class StockCycleCountRule(models.Model):
 
     @api.model
     def _get_turnover_moves(self, location, date):
-        moves = self.env["stock.move"].search(
-            [
-                "|",
-                ("location_id", "=", location.id),
-                ("location_dest_id", "=", location.id),
-                ("date", ">", date),
-                ("state", "=", "done"),
-            ]
-        )
-        return moves
+        """Return the moves done in the location since the date
+
+        Kept for compatibility, the moves of all the locations are read at once
+        by _get_turnover_moves_by_location().
+        """
+        moves = self._search_turnover_moves({location: date}).get(location)
+        return moves or self.env["stock.move"]
+
+    @api.model
+    def _get_turnover_moves_by_location(self, dates):
+        """Return the moves done in the locations since the given dates
+
+        :param dates: dict {location: datetime}
+        :return: dict {location: stock.move recordset}
+        """
+        if (
+            type(self)._get_turnover_moves
+            is not StockCycleCountRule._get_turnover_moves
+        ):
+            # _get_turnover_moves() is overridden, apply it on each location
+            return {
+                loc: self._get_turnover_moves(loc, date) for loc, date in dates.items()
+            }
+        return self._search_turnover_moves(dates)
+
+    @api.model
+    def _search_turnover_moves(self, dates):
+        """Read the moves done in the locations since the given dates at once
+
+        :param dates: dict {location: datetime}
+        :return: dict {location: stock.move recordset}
+        """
+        move_model = self.env["stock.move"]
+        move_model.flush(["date", "state", "location_id", "location_dest_id"])
+        query = move_model._where_calc([("state", "=", "done")])
+        move_model._apply_ir_rules(query, "read")
+        from_clause, where_clause, where_params = query.get_sql()
+        # each location is joined with its own date, as a move is counted
+        # in both its source and destination locations
+        # pylint: disable=sql-injection
+        sql = """
+            SELECT dates.location_id, stock_move.id
+            FROM unnest(%s::integer[], %s::timestamp[]) AS dates(location_id, date),
+                {from_clause}
+            WHERE stock_move.{location_column} = dates.location_id
+                AND stock_move.date > dates.date
+                AND {where_clause}
+        """
+        move_ids_by_location = defaultdict(list)
+        for locations in split_every(TURNOVER_BATCH_SIZE, list(dates)):
+            for location_column in ("location_id", "location_dest_id"):
+                self.env.cr.execute(
+                    sql.format(
+                        from_clause=from_clause,
+                        location_column=location_column,
+                        where_clause=where_clause or "TRUE",
+                    ),
+                    [[loc.id for loc in locations], [dates[loc] for loc in locations]]
+                    + where_params,
+                )
+                for location_id, move_id in self.env.cr.fetchall():
+                    move_ids_by_location[location_id].append(move_id)
+        locations = self.env["stock.location"].browse(move_ids_by_location)
+        return {
+            loc: move_model.browse(list(dict.fromkeys(move_ids_by_location[loc.id])))
+            for loc in locations
+        }
 
     @api.model
     def _compute_turnover(self, move):
@@ -223,20 +329,17 @@ class StockCycleCountRule(models.Model):
     @api.model
     def _compute_rule_turnover(self, locs):
         cycle_counts = []
+        latest_inventory_dates = self._get_latest_inventory_dates(locs)
+        moves_by_location = self._get_turnover_moves_by_location(
+            {
+                loc: latest_inventory_dates[loc.id]
+                for loc in locs
+                if loc.id in latest_inventory_dates
+            }
+        )
         for loc in locs:
-            last_inventories = (
-                self.env["stock.inventory"]
-                .search(
-                    [
-                        ("location_ids", "in", [loc.id]),
-                        ("state", "in", ["confirm", "done", "draft"]),
-                    ]
-                )
-                .mapped("date")
-            )
-            if last_inventories:
-                latest_inventory = sorted(last_inventories, reverse=True)[0]
-                moves = self._get_turnover_moves(loc, latest_inventory)
+            if loc.id in latest_inventory_dates:
+                moves = moves_by_location.get(loc)
                 if moves:
                     total_turnover = 0.0
                     for m in moves:
@@ -264,9 +367,14 @@ class StockCycleCountRule(models.Model):
     def _compute_rule_accuracy(self, locs):
         self.ensure_one()
         cycle_counts = []
-        for loc in locs:
-            if loc.loc_accuracy < self.accuracy_threshold:
-                next_date = datetime.today()
-                cycle_count = self._propose_cycle_count(next_date, loc)
-                cycle_counts.append(cycle_count)
+        inaccurate_locs = self.env["stock.location"].search(
+            [
+                ("id", "in", locs.ids),
+                ("loc_accuracy", "<", self.accuracy_threshold),
+            ]
+        )
+        for loc in inaccurate_locs:
+            next_date = datetime.today()
+            cycle_count = self._propose_cycle_count(next_date, loc)
+            cycle_counts.append(cycle_count)
         return cycle_counts
@@ -54,6 +54,9 @@ class StockInventory(models.Model):
         for inv in self:
             if inv.cycle_count_id and inv.state == "done":
                 inv.cycle_count_id.state = "done"
+        self.filtered(
+            lambda inv: inv.state == "done"
+        ).location_ids.sudo()._update_loc_accuracy()
         return True
 
     def _domain_cycle_count_candidate(self):
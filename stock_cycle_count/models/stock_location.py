@@ -5,43 +5,93 @@
 import logging
 from datetime import datetime
 
-from odoo import fields, models, tools
+from odoo import fields, models
 from odoo.tools import DEFAULT_SERVER_DATETIME_FORMAT
 
 _logger = logging.getLogger(__name__)
 
-try:
-    from statistics import mean
-
-    STATS_PATH = tools.find_in_path("statistics")
-except (ImportError, IOError) as err:
-    _logger.debug(err)
-
 
 class StockLocation(models.Model):
     _inherit = "stock.location"
 
+    def _get_counts_for_accuracy_qty(self):
+        """Return the number of latest inventories used to compute the
+        accuracy of each location, 0 to use all of them
+
+        :return: dict {location id: number of inventories}
+        """
+        warehouses = (
+            self.env["stock.warehouse"].with_context(active_test=False).search([])
+        )
+        qty_by_view = {
+            wh.view_location_id.id: wh.counts_for_accuracy_qty for wh in warehouses
+        }
+        res = {}
+        for loc in self:
+            path = [int(loc_id) for loc_id in (loc.parent_path or "").split("/")[:-1]]
+            res[loc.id] = next(
+                (qty_by_view[loc_id] for loc_id in path if loc_id in qty_by_view), 0
+            )
+        return res
+
+    def _get_loc_accuracies(self):
+        """Return the mean accuracy of the latest done inventories of the
+        locations, the locations never counted are not returned
+
+        :return: dict {location id: accuracy}
+        """
+        locations = self.filtered("id")
+        if not locations:
+            return {}
+        inventory_model = self.env["stock.inventory"]
+        inventory_model.flush(["state", "inventory_accuracy", "location_ids"])
+        field = inventory_model._fields["location_ids"]
+        # pylint: disable=sql-injection
+        self.env.cr.execute(
+            """
+            SELECT location_id, AVG(inventory_accuracy)
+            FROM (
+                SELECT rel.{location_column} AS location_id,
+                    inventory.inventory_accuracy,
+                    ROW_NUMBER() OVER (
+                        PARTITION BY rel.{location_column}
+                        ORDER BY inventory.write_date DESC, inventory.id DESC
+                    ) AS rank
+                FROM {relation} rel
+                JOIN stock_inventory inventory
+                    ON inventory.id = rel.{inventory_column}
+                WHERE rel.{location_column} IN %s AND inventory.state = 'done'
+            ) history
+            JOIN (VALUES {values}) AS window_size (location_id, qty)
+                USING (location_id)
+            WHERE window_size.qty = 0 OR history.rank <= window_size.qty
+            GROUP BY location_id
+            """.format(
+                relation=field.relation,
+                inventory_column=field.column1,
+                location_column=field.column2,
+                values=", ".join(["(%s, %s)"] * len(locations)),
+            ),
+            [tuple(locations.ids)]
+            + [
+                param
+                for item in locations._get_counts_for_accuracy_qty().items()
+                for param in item
+            ],
+        )
+        return dict(self.env.cr.fetchall())
+
     def _compute_loc_accuracy(self):
+        accuracies = self._get_loc_accuracies()
         for rec in self:
-            history = self.env["stock.inventory"].search(
-                [("location_ids", "in", rec.id), ("state", "=", "done")],
-                order="write_date desc",
-            )
-            if history:
-                wh = rec.get_warehouse()
-                if (
-                    wh.counts_for_accuracy_qty
-                    and len(history) > wh.counts_for_accuracy_qty
-                ):
-                    rec.loc_accuracy = mean(
-                        history[: wh.counts_for_accuracy_qty].mapped(
-                            "inventory_accuracy"
-                        )
-                    )
-                else:
-                    rec.loc_accuracy = mean(history.mapped("inventory_accuracy"))
-            else:
-                rec.loc_accuracy = 0
+            rec.loc_accuracy = accuracies.get(rec.id, 0.0)
+
+    def _update_loc_accuracy(self):
+        """Recompute the stored accuracy of the locations, to call when
+        their inventory history changes
+        """
+        self.env.add_to_compute(self._fields["loc_accuracy"], self)
+        self.recompute(["loc_accuracy"])
 
     zero_confirmation_disabled = fields.Boolean(
         string="Disable Zero Confirmations",
@@ -57,7 +107,13 @@ class StockLocation(models.Model):
         string="Acceptable Inventory Quantity Variance Threshold"
     )
     loc_accuracy = fields.Float(
-        string="Inventory Accuracy", compute="_compute_loc_accuracy", digits=(3, 2)
+        string="Inventory Accuracy",
+        compute="_compute_loc_accuracy",
+        digits=(3, 2),
+        store=True,
+        index=True,
+        help="Mean accuracy of the latest inventories done in the location, "
+        "updated when an inventory is validated.",
     )
 
     def _get_zero_confirmation_domain(self):
@@ -3,6 +3,8 @@
 # License AGPL-3.0 or later (https://www.gnu.org/licenses/agpl.html).
 
 import logging
+import time
+from collections import defaultdict
 from datetime import datetime, timedelta
 
 from odoo import api, fields, models
@@ -31,6 +33,14 @@ class StockWarehouse(models.Model):
         help="Number of latest inventories used to calculate location " "accuracy",
     )
 
+    def write(self, vals):
+        res = super().write(vals)
+        if "counts_for_accuracy_qty" in vals:
+            self.env["stock.location"].sudo().search(
+                [("id", "child_of", self.view_location_id.ids)]
+            )._update_loc_accuracy()
+        return res
+
     def get_horizon_date(self):
         self.ensure_one()
         date = datetime.today()
@@ -81,56 +91,75 @@ class StockWarehouse(models.Model):
         returns a list with required dates for the cycle count of each
         location"""
         for rec in self:
-            proposed_cycle_counts = []
+            start = time.perf_counter()
+            # earliest proposed cycle count per location
+            proposed_by_location = {}
             rules = rec._cycle_count_rules_to_compute()
             for rule in rules:
                 locations = rec._search_cycle_count_locations(rule)
-                if locations:
-                    proposed_cycle_counts.extend(rule.compute_rule(locations))
-            if proposed_cycle_counts:
-                locations = list({d["location"] for d in proposed_cycle_counts})
-                for loc in locations:
-                    proposed_for_loc = list(
-                        filter(lambda x: x["location"] == loc, proposed_cycle_counts)
+                if not locations:
+                    continue
+                for proposed in rule.compute_rule(locations):
+                    current = proposed_by_location.get(proposed["location"])
+                    if current is None or proposed["date"] < current["date"]:
+                        proposed_by_location[proposed["location"]] = proposed
+            if proposed_by_location:
+                rec._plan_cycle_counts(proposed_by_location)
+            _logger.info(
+                "Cycle counts of warehouse %s computed for %d locations in %.2fs",
+                rec.name,
+                len(proposed_by_location),
+                time.perf_counter() - start,
+            )
+
+    def _plan_cycle_counts(self, proposed_by_location):
+        """Create the proposed cycle counts, or move the earliest draft cycle
+        count of the locations to the proposed date when it is earlier
+
+        :param proposed_by_location: dict {location: proposed cycle count}
+        """
+        self.ensure_one()
+        cycle_count_model = self.env["stock.cycle.count"]
+        existing_by_location = defaultdict(lambda: cycle_count_model)
+        existing_cycle_counts = cycle_count_model.search(
+            [
+                ("location_id", "in", [loc.id for loc in proposed_by_location]),
+                ("state", "in", ["draft"]),
+            ]
+        )
+        for cycle_count in existing_cycle_counts:
+            existing_by_location[cycle_count.location_id] |= cycle_count
+        to_update = defaultdict(lambda: cycle_count_model)
+        vals_list = []
+        today = datetime.today()
+        for loc, cycle_count_proposed in proposed_by_location.items():
+            existing_cycle_counts = existing_by_location.get(loc)
+            if existing_cycle_counts:
+                existing_earliest_date = min(
+                    existing_cycle_counts.mapped("date_deadline")
+                )
+                cycle_count_proposed_date = fields.Date.to_date(
+                    cycle_count_proposed["date"]
+                )
+                if cycle_count_proposed_date < existing_earliest_date:
+                    cc_to_update = existing_cycle_counts.filtered(
+                        lambda cc, date=existing_earliest_date: cc.date_deadline == date
                     )
-                    earliest_date = min([d["date"] for d in proposed_for_loc])
-                    cycle_count_proposed = list(
-                        filter(lambda x: x["date"] == earliest_date, proposed_for_loc)
-                    )[0]
-                    domain = [("location_id", "=", loc.id), ("state", "in", ["draft"])]
-                    existing_cycle_counts = self.env["stock.cycle.count"].search(domain)
-                    if existing_cycle_counts:
-                        existing_earliest_date = sorted(
-                            existing_cycle_counts.mapped("date_deadline")
-                        )[0]
-                        existing_earliest_date = fields.Date.from_string(
-                            existing_earliest_date
-                        )
-                        cycle_count_proposed_date = fields.Date.from_string(
-                            cycle_count_proposed["date"]
-                        )
-                        if cycle_count_proposed_date < existing_earliest_date:
-                            cc_to_update = existing_cycle_counts.search(
-                                [("date_deadline", "=", existing_earliest_date)]
-                            )
-                            cc_to_update.write(
-                                {
-                                    "date_deadline": cycle_count_proposed_date,
-                                    "cycle_count_rule_id": cycle_count_proposed[
-                                        "rule_type"
-                                    ].id,
-                                }
-                            )
-                    delta = (
-                        fields.Datetime.from_string(cycle_count_proposed["date"])
-                        - datetime.today()
+                    key = (
+                        cycle_count_proposed_date,
+                        cycle_count_proposed["rule_type"].id,
                     )
-                    if (
-                        not existing_cycle_counts
-                        and delta.days < rec.cycle_count_planning_horizon
-                    ):
-                        cc_vals = self._prepare_cycle_count(cycle_count_proposed)
-                        self.env["stock.cycle.count"].create(cc_vals)
+                    to_update[key] |= cc_to_update
+                continue
+            delta = fields.Datetime.to_datetime(cycle_count_proposed["date"]) - today
+            if delta.days < self.cycle_count_planning_horizon:
+                vals_list.append(self._prepare_cycle_count(cycle_count_proposed))
+        for (date_deadline, rule_id), cycle_counts in to_update.items():
+            cycle_counts.write(
+                {"date_deadline": date_deadline, "cycle_count_rule_id": rule_id}
+            )
+        if vals_list:
+            cycle_count_model.create(vals_list)
 
     @api.model
     def cron_cycle_count(self):
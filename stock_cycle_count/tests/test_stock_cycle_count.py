@@ -2,6 +2,7 @@
 #   (http://www.forgeflow.com)
 # License AGPL-3.0 or later (https://www.gnu.org/licenses/agpl.html).
 from datetime import datetime, timedelta
+from unittest import mock
 
 from odoo.exceptions import AccessError, ValidationError
 from odoo.tests import common
@@ -147,7 +148,7 @@ class TestStockCycleCount(common.TransactionCase):
         counts = self.cycle_count_model.search([("location_id", "in", locs.ids)])
         self.assertFalse(counts, "Existing cycle counts before execute planner.")
         date_pre_existing_cc = datetime.today() + timedelta(days=30)
-        loc = locs.filtered(lambda l: l.usage != "view")[0]
+        loc = locs.filtered(lambda location: location.usage != "view")[0]
         pre_existing_count = self.cycle_count_model.create(
             {
                 "name": "To be cancelled when running cron job.",
@@ -226,6 +227,22 @@ class TestStockCycleCount(common.TransactionCase):
         )
         self.assertTrue(count, "Zero confirmation not being created.")
 
+    def test_cycle_count_planner_bulk(self):
+        """Planning twice creates a single cycle count per location."""
+        self.big_wh.write({"cycle_count_rule_ids": [(6, 0, self.rule_periodic.ids)]})
+        locs = self.big_wh._search_cycle_count_locations(self.rule_periodic)
+        date = datetime.today() - timedelta(days=10)
+        self.inventory_model.create(
+            {"name": "Old inventory", "location_ids": [(6, 0, locs.ids)], "date": date}
+        )
+        latest_dates = self.rule_periodic._get_latest_inventory_dates(locs)
+        self.assertEqual(set(latest_dates), set(locs.ids))
+        self.big_wh.action_compute_cycle_count_rules()
+        self.big_wh.action_compute_cycle_count_rules()
+        counts = self.cycle_count_model.search([("location_id", "in", locs.ids)])
+        self.assertEqual(counts.location_id, locs)
+        self.assertEqual(len(counts), len(locs))
+
     def test_cycle_count_workflow(self):
         """Tests workflow."""
         self.cycle_count_1.action_create_inventory_adjustment()
@@ -243,6 +260,38 @@ class TestStockCycleCount(common.TransactionCase):
             self.cycle_count_1.state, "cancelled", "Cycle count not set as cancelled."
         )
 
+    def _validate_inventory(self, location, counted_qty):
+        inventory = self.inventory_model.create(
+            {
+                "name": "Accuracy inventory",
+                "location_ids": [(4, location.id)],
+                "product_ids": [(4, self.product1.id)],
+            }
+        )
+        inventory.action_start()
+        inventory.line_ids.product_qty = counted_qty
+        inventory.action_validate()
+        return inventory
+
+    def test_loc_accuracy(self):
+        """The accuracy of a location is stored when validating inventories."""
+        loc = self.big_wh.lot_stock_id
+        self.quant_model._update_available_quantity(self.product1, loc, 10.0)
+        self.assertEqual(loc.loc_accuracy, 0.0)
+        self._validate_inventory(loc, 5.0)
+        self.assertEqual(loc.loc_accuracy, 50.0)
+        self._validate_inventory(loc, 5.0)
+        self.assertEqual(loc.loc_accuracy, 100.0)
+        self.big_wh.counts_for_accuracy_qty = 2
+        self.assertEqual(loc.loc_accuracy, 75.0)
+        self.assertIn(
+            loc,
+            self.stock_location_model.search([("loc_accuracy", "<", 80.0)]),
+        )
+        self.assertEqual(self.rule_accuracy._compute_rule_accuracy(loc), [])
+        self.rule_accuracy.accuracy_threshold = 80.0
+        self.assertEqual(len(self.rule_accuracy._compute_rule_accuracy(loc)), 1)
+
     def test_view_methods(self):
         """Tests the methods used to handle views."""
         self.cycle_count_1.action_create_inventory_adjustment()
@@ -337,3 +386,16 @@ class TestStockCycleCount(common.TransactionCase):
         company = self.env["res.company"].create({"name": "Test"})
         with self.assertRaises(ValidationError):
             inventory.company_id = company
+
+    def test_turnover_moves_override(self):
+        # An override of _get_turnover_moves() is still applied
+        location = self.env.ref("stock.stock_location_stock")
+        date = datetime.today() - timedelta(days=1)
+        moves = self.env["stock.move"].search([], limit=1)
+        rule_model = self.stock_cycle_count_rule_model
+        with mock.patch.object(
+            type(rule_model), "_get_turnover_moves", return_value=moves
+        ) as get_turnover_moves:
+            res = rule_model._get_turnover_moves_by_location({location: date})
+        get_turnover_moves.assert_called_once_with(location, date)
+        self.assertEqual(res, {location: moves})
@@ -3,15 +3,47 @@
 #   (http://www.forgeflow.com)
 # License AGPL-3.0 or later (http://www.gnu.org/licenses/agpl.html).
 
-from odoo import api, models
+from odoo import api, models, tools
 
 
 class StockInventory(models.Model):
     _inherit = "stock.inventory"
 
+    @api.model
+    def _get_open_inventories_location_paths(self):
+        """Parent paths of the locations of each open exhaustive inventory
+
+        A location is locked when its parent path starts with one of them.
+        The paths are cached for the set of open inventories, which is read
+        at each call so that the cache key changes with their states.
+        """
+        self.flush(["state", "location_ids"])
+        self.env.cr.execute(
+            """
+            SELECT array_agg(id ORDER BY id), max(write_date)
+            FROM stock_inventory
+            WHERE state = 'confirm'
+            """
+        )
+        inventory_ids, write_date = self.env.cr.fetchone()
+        if not inventory_ids:
+            return ()
+        return self._get_inventories_location_paths(tuple(inventory_ids), write_date)
+
+    @api.model
+    @tools.ormcache("inventory_ids", "write_date")
+    def _get_inventories_location_paths(self, inventory_ids, write_date):
+        return tuple(
+            tuple(inventory.location_ids.mapped("parent_path"))
+            for inventory in self.sudo().browse(inventory_ids)
+        )
+
     @api.model
     def _get_locations_open_inventories(self, locations_ids=None):
         """IDs of locations in open exhaustive inventories, with children"""
+        if not self._get_open_inventories_location_paths():
+            # Early exit if no inventory is open
+            return []
         inventory_domain = [("state", "=", "confirm")]
         if locations_ids:
             inventory_domain.append(("location_ids", "child_of", locations_ids))
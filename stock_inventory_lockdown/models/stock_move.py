@@ -18,30 +18,53 @@ class StockMove(models.Model):
         self.ensure_one()
         return self.move_line_ids.mapped("location_dest_id")
 
+    def _is_in_locked_location(self, locked_paths):
+        """Whether the move reaches a location of an open inventory
+
+        Only the inventories of the source and destination locations of the
+        move, or of their sublocations, are considered.
+
+        :param locked_paths: parent paths of the locations of each open
+                             inventory
+        """
+        self.ensure_one()
+        if "inventory" in (self.location_dest_id.usage, self.location_id.usage):
+            return False
+        move_paths = tuple(
+            filter(
+                None, (self.location_dest_id.parent_path, self.location_id.parent_path)
+            )
+        )
+        paths = tuple(
+            path
+            for inventory_paths in locked_paths
+            if any(path.startswith(move_paths) for path in inventory_paths)
+            for path in inventory_paths
+        )
+        if not paths:
+            return False
+        locations = (
+            self.location_dest_id
+            | self._get_dest_locations()
+            | self._get_reserved_locations()
+        )
+        return any(
+            loc.usage in ("internal", "transit")
+            and (loc.parent_path or "").startswith(paths)
+            for loc in locations
+        )
+
     @api.constrains("location_dest_id", "location_id", "state")
     def _check_locked_location(self):
+        inventory_model = self.env["stock.inventory"]
+        locked_paths = inventory_model.sudo()._get_open_inventories_location_paths()
+        if not locked_paths:
+            return
         for move in self.filtered(lambda m: m.state != "draft"):
-            locked_location_ids = self.env[
-                "stock.inventory"
-            ]._get_locations_open_inventories(
-                [move.location_dest_id.id, move.location_id.id]
-            )
-            reserved_locs = move._get_reserved_locations()
-            dest_locs = move._get_dest_locations()
-            if (
-                locked_location_ids
-                and not any(
-                    [
-                        move.location_dest_id.usage == "inventory",
-                        move.location_id.usage == "inventory",
-                    ]
-                )
-                and (
-                    move.location_dest_id in locked_location_ids
-                    or any([loc in locked_location_ids for loc in dest_locs])
-                    or any([loc in locked_location_ids for loc in reserved_locs])
+            if move._is_in_locked_location(locked_paths):
+                locked_location_ids = inventory_model._get_locations_open_inventories(
+                    [move.location_dest_id.id, move.location_id.id]
                 )
-            ):
                 location_names = locked_location_ids.mapped("complete_name")
                 raise ValidationError(
                     _(
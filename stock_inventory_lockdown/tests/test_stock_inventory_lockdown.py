@@ -158,3 +158,27 @@ class StockInventoryLocationTest(TestStockCommon):
             move2._action_assign()
             move2.move_line_ids[0].qty_done = 10.0
             move2._action_done()
+
+    def test_open_inventories_location_paths(self):
+        """The locked locations follow the state of the inventories"""
+        inventory_model = self.env["stock.inventory"]
+        self.assertIn(
+            (self.new_location.parent_path,),
+            inventory_model._get_open_inventories_location_paths(),
+        )
+        self.inventory.action_cancel_draft()
+        self.assertNotIn(
+            (self.new_location.parent_path,),
+            inventory_model._get_open_inventories_location_paths(),
+        )
+        move = self.create_stock_move(self.productA, dest_id=self.new_location.id)
+        move._action_confirm()
+        self.inventory.action_start()
+        self.assertIn(
+            (self.new_location.parent_path,),
+            inventory_model._get_open_inventories_location_paths(),
+        )
+        with self.assertRaises(ValidationError):
+            self.create_stock_move(
+                self.productA, dest_id=self.new_location.id
+            )._action_confirm()
@@ -12,4 +12,5 @@
     "application": False,
     "installable": True,
     "depends": ["stock"],
+    "post_init_hook": "post_init_hook",
 }
@@ -0,0 +1,10 @@
+# Copyright 2026 Moduon Team S.L.
+# License AGPL-3.0 or later (https://www.gnu.org/licenses/agpl)
+from odoo import SUPERUSER_ID, api
+
+
+def post_init_hook(cr, registry):
+    env = api.Environment(cr, SUPERUSER_ID, {})
+    env["stock.location"].with_context(active_test=False).search(
+        [("location_id", "=", False)]
+    )._update_children_ids()
@@ -1,7 +1,11 @@
 # Copyright 2020 Camptocamp SA
 # License AGPL-3.0 or later (https://www.gnu.org/licenses/agpl)
+import logging
+
 from odoo import api, fields, models
 
+_logger = logging.getLogger(__name__)
+
 
 class StockLocation(models.Model):
 
@@ -12,34 +16,67 @@ class StockLocation(models.Model):
         "stock_location_children_ids",
         "parent_id",
         "children_id",
-        compute="_compute_children_ids",
-        store=True,
+        readonly=True,
         help="All the children (multi-level) stock location of this location",
     )
 
-    @api.depends("child_ids", "children_ids.child_ids")
+    @api.model_create_multi
+    def create(self, vals_list):
+        records = super().create(vals_list)
+        records.filtered("location_id")._update_children_ids()
+        return records
+
+    def write(self, vals):
+        res = super().write(vals)
+        if "location_id" in vals:
+            self._update_children_ids()
+        return res
+
+    def _update_children_ids(self):
+        """Update the children of the ancestors of these locations and of
+        their sublocations
+
+        The ancestor/descendant pairs are derived from the parent path of the
+        sublocations: only the pairs which are missing in the relation are
+        inserted and only the obsolete ones are deleted, whatever the size of
+        the trees.
+        """
+        self.flush(["location_id", "parent_path"])
+        patterns = [loc.parent_path + "%" for loc in self if loc.parent_path]
+        if not patterns:
+            return
+        self.env.cr.execute(
+            """
+            DELETE FROM stock_location_children_ids rel
+            USING stock_location loc
+            WHERE rel.children_id = loc.id
+                AND loc.parent_path LIKE ANY (%s)
+                AND position('/' || rel.parent_id || '/' IN '/' || loc.parent_path) = 0
+            """,
+            (patterns,),
+        )
+        removed = self.env.cr.rowcount
+        self.env.cr.execute(
+            """
+            INSERT INTO stock_location_children_ids (parent_id, children_id)
+            SELECT ancestor.id::integer, loc.id
+            FROM stock_location loc,
+                unnest(string_to_array(rtrim(loc.parent_path, '/'), '/')) ancestor(id)
+            WHERE loc.parent_path LIKE ANY (%s)
+                AND ancestor.id::integer != loc.id
+            ON CONFLICT DO NOTHING
+            """,
+            (patterns,),
+        )
+        _logger.debug(
+            "Location children: %s pairs removed, %s pairs added",
+            removed,
+            self.env.cr.rowcount,
+        )
+        self.invalidate_cache(["children_ids"])
+
     def _compute_children_ids(self):
-        query = """SELECT sub.id, ARRAY_AGG(sl2.id) AS children
-            FROM stock_location sl2,
-            (
-            SELECT id, parent_path
-            FROM stock_location sl
-            ) sub
-            WHERE sl2.parent_path LIKE sub.parent_path || '%%'
-            AND sl2.id != sub.id
-            AND sub.id IN %s
-            GROUP BY sub.id;
+        """Kept for compatibility: the children are maintained on the
+        creation and moves of the locations
         """
-        self.flush(["location_id", "child_ids"])
-        self.env.cr.execute(query, (tuple(self.ids),))
-        rows = self.env.cr.dictfetchall()
-        for loc in self:
-            all_ids = []
-            for row in rows:
-                if row.get("id") == loc.id:
-                    all_ids = row.get("children")
-                    break
-            if all_ids:
-                loc.children_ids = [(6, 0, all_ids)]
-            else:
-                loc.children_ids = [(5, 0, 0)]
+        self._update_children_ids()
@@ -68,3 +68,36 @@ class TestStockLocationChildren(SavepointCase):
             self.test_location.children_ids,
             self.stock_shelf_1 | self.stock_shelf_2 | self.stock_shelf_2_refrigerator,
         )
+
+    def _assert_children_match_parent_path(self, locations):
+        for location in locations:
+            self.assertEqual(
+                location.children_ids,
+                self.env["stock.location"].search(
+                    [("id", "child_of", location.id), ("id", "!=", location.id)]
+                ),
+            )
+
+    def test_move_deep_and_wide_tree(self):
+        location_model = self.env["stock.location"]
+        levels = location_model
+        deep = self.test_location
+        for level in range(10):
+            deep = location_model.create(
+                {"name": "Level %s" % level, "location_id": deep.id}
+            )
+            levels |= deep
+        wide = location_model.create(
+            [
+                {"name": "Bin %s" % index, "location_id": deep.location_id.id}
+                for index in range(50)
+            ]
+        )
+        self._assert_children_match_parent_path(self.test_location | wide)
+        levels[0].location_id = self.stock_shelf_1
+        wide[:10].location_id = self.stock_shelf_2_refrigerator
+        self._assert_children_match_parent_path(
+            self.stock_location | self.test_location.children_ids | wide
+        )
+        self.assertIn(deep, self.stock_shelf_1.children_ids)
+        self.assertIn(wide[0], self.stock_shelf_2.children_ids)
@@ -1,4 +1,5 @@
 from . import stock_location_orderpoint
+from . import stock_location_orderpoint_buffer
 from . import stock_rule
 from . import stock_move
 from . import stock_location
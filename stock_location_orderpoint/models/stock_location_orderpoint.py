@@ -6,7 +6,7 @@ from copy import copy
 from odoo import _, api, fields, models
 from odoo.exceptions import ValidationError
 from odoo.osv import expression
-from odoo.tools import float_compare, split_every
+from odoo.tools import float_compare, float_round, split_every
 
 from odoo.addons.stock.models.stock_move import PROCUREMENT_PRIORITIES
 
@@ -198,15 +198,170 @@ class StockLocationOrderpoint(models.Model):
 
     @api.model
     def _compute_quantities_dict(self, locations, products):
+        """Return the quantities of the products in the locations and their
+        children, as computed by product.product._product_available()
+
+        The quantities of all the locations are computed in one query on the
+        quants and one query on the moves.
+
+        :return: dict {location: {product: {field_name: qty}}}
+        """
+        quant_qties = self._get_quant_quantities_by_location(locations, products)
+        move_qties = self._get_move_quantities_by_location(locations, products)
         qties = {}
         for location in locations:
             qties_on_location = qties.setdefault(location, {})
-            products = products.with_context(location=location.id)
-            for product_id, qties_dict in products._product_available().items():
-                product = products.browse(product_id)
-                qties_on_location[product] = qties_dict
+            for product in products:
+                key = (location.id, product.id)
+                rounding = product.uom_id.rounding
+                qty_available, reserved_qty = quant_qties.get(key, (0.0, 0.0))
+                incoming_qty, outgoing_qty = move_qties.get(key, (0.0, 0.0))
+                qties_on_location[product] = {
+                    "qty_available": float_round(
+                        qty_available, precision_rounding=rounding
+                    ),
+                    "free_qty": float_round(
+                        qty_available - reserved_qty, precision_rounding=rounding
+                    ),
+                    "incoming_qty": float_round(
+                        incoming_qty, precision_rounding=rounding
+                    ),
+                    "outgoing_qty": float_round(
+                        outgoing_qty, precision_rounding=rounding
+                    ),
+                    "virtual_available": float_round(
+                        qty_available + incoming_qty - outgoing_qty,
+                        precision_rounding=rounding,
+                    ),
+                }
         return qties
 
+    @api.model
+    def _get_quant_quantities_by_location(self, locations, products):
+        """Sum the quants of the products in the locations and their children
+
+        :return: dict {(location_id, product_id): (quantity, reserved quantity)}
+        """
+        if not locations or not products:
+            return {}
+        quant_model = self.env["stock.quant"].with_context(active_test=False)
+        quant_model.flush(
+            ["product_id", "location_id", "quantity", "reserved_quantity"]
+        )
+        self.env["stock.location"].flush(["parent_path"])
+        query = quant_model._where_calc(
+            [
+                ("product_id", "in", products.ids),
+                ("location_id", "child_of", locations.ids),
+            ]
+        )
+        quant_model._apply_ir_rules(query, "read")
+        from_clause, where_clause, where_params = query.get_sql()
+        # pylint: disable=sql-injection
+        self.env.cr.execute(
+            """
+            SELECT loc.id, quant.product_id, SUM(quant.quantity),
+                SUM(quant.reserved_quantity)
+            FROM (
+                SELECT
+                    stock_quant.location_id,
+                    stock_quant.product_id,
+                    SUM(stock_quant.quantity) AS quantity,
+                    SUM(stock_quant.reserved_quantity) AS reserved_quantity
+                FROM {from_clause}
+                WHERE {where_clause}
+                GROUP BY stock_quant.location_id, stock_quant.product_id
+            ) AS quant
+            JOIN stock_location quant_loc ON quant_loc.id = quant.location_id
+            JOIN stock_location loc
+                ON quant_loc.parent_path LIKE loc.parent_path || '%%'
+            WHERE loc.id IN %s
+            GROUP BY loc.id, quant.product_id
+            """.format(
+                from_clause=from_clause, where_clause=where_clause or "TRUE"
+            ),
+            where_params + [tuple(locations.ids)],
+        )
+        return {
+            (location_id, product_id): (quantity, reserved_quantity)
+            for location_id, product_id, quantity, reserved_quantity in (
+                self.env.cr.fetchall()
+            )
+        }
+
+    @api.model
+    def _get_move_quantities_by_location(self, locations, products):
+        """Sum the moves of the products entering and leaving the locations
+        and their children
+
+        :return: dict {(location_id, product_id): (incoming qty, outgoing qty)}
+        """
+        if not locations or not products:
+            return {}
+        move_model = self.env["stock.move"].with_context(active_test=False)
+        move_model.flush(
+            ["product_id", "location_id", "location_dest_id", "product_qty", "state"]
+        )
+        self.env["stock.location"].flush(["parent_path"])
+        query = move_model._where_calc(
+            [
+                ("product_id", "in", products.ids),
+                (
+                    "state",
+                    "in",
+                    ("waiting", "confirmed", "assigned", "partially_available"),
+                ),
+                "|",
+                ("location_id", "child_of", locations.ids),
+                ("location_dest_id", "child_of", locations.ids),
+            ]
+        )
+        move_model._apply_ir_rules(query, "read")
+        from_clause, where_clause, where_params = query.get_sql()
+        # pylint: disable=sql-injection
+        self.env.cr.execute(
+            """
+            SELECT loc.id, move.product_id,
+                SUM(CASE
+                    WHEN dest_loc.parent_path LIKE loc.parent_path || '%%'
+                    THEN move.product_qty ELSE 0 END),
+                SUM(CASE
+                    WHEN src_loc.parent_path LIKE loc.parent_path || '%%'
+                    THEN move.product_qty ELSE 0 END)
+            FROM (
+                SELECT
+                    stock_move.location_id,
+                    stock_move.location_dest_id,
+                    stock_move.product_id,
+                    SUM(stock_move.product_qty) AS product_qty
+                FROM {from_clause}
+                WHERE {where_clause}
+                GROUP BY
+                    stock_move.location_id,
+                    stock_move.location_dest_id,
+                    stock_move.product_id
+            ) AS move
+            JOIN stock_location src_loc ON src_loc.id = move.location_id
+            JOIN stock_location dest_loc ON dest_loc.id = move.location_dest_id
+            JOIN stock_location loc ON (
+                src_loc.parent_path LIKE loc.parent_path || '%%'
+            ) != (
+                dest_loc.parent_path LIKE loc.parent_path || '%%'
+            )
+            WHERE loc.id IN %s
+            GROUP BY loc.id, move.product_id
+            """.format(
+                from_clause=from_clause, where_clause=where_clause or "TRUE"
+            ),
+            where_params + [tuple(locations.ids)],
+        )
+        return {
+            (location_id, product_id): (incoming_qty, outgoing_qty)
+            for location_id, product_id, incoming_qty, outgoing_qty in (
+                self.env.cr.fetchall()
+            )
+        }
+
     def _get_qty_to_replenish(
         self, product, qties_on_locations, qty_already_replenished=0
     ):
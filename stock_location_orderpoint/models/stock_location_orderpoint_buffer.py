@@ -0,0 +1,142 @@
+# Copyright 2026 Moduon Team S.L.
+# License AGPL-3.0 or later (https://www.gnu.org/licenses/agpl).
+import logging
+from collections import defaultdict
+
+from psycopg2.extras import execute_values
+
+from odoo import _, api, fields, models
+
+from odoo.addons.queue_job.job import identity_exact
+
+_logger = logging.getLogger(__name__)
+
+DELAY_PARAM = "stock_location_orderpoint.auto_replenishment_delay"
+
+
+class StockLocationOrderpointBuffer(models.Model):
+    """Locations and products waiting for an auto replenishment
+
+    When a delay is configured, the moves do not enqueue one job per location
+    and product anymore: they are collected here and replenished together by
+    a single job once the delay is over.
+
+    The rows are only inserted, one per request, so concurrent moves and the
+    job never update the same rows. The duplicates are merged by the job.
+    """
+
+    _name = "stock.location.orderpoint.buffer"
+    _description = "Stock location orderpoint replenishment buffer"
+    _log_access = False
+
+    location_id = fields.Many2one(
+        "stock.location", "Location", required=True, ondelete="cascade"
+    )
+    product_id = fields.Many2one(
+        "product.product", "Product", required=True, ondelete="cascade"
+    )
+    location_field = fields.Selection(
+        [("location_id", "Location"), ("location_src_id", "Source Location")],
+        required=True,
+        help="Field of the orderpoints to match with the location",
+    )
+    date = fields.Datetime(
+        default=fields.Datetime.now,
+        help="Date of the replenishment request",
+    )
+
+    @api.model
+    def _get_delay(self):
+        """Return the delay in seconds to wait before running the buffered
+        replenishments, 0 when the replenishments are not buffered
+        """
+        return int(
+            self.env["ir.config_parameter"].sudo().get_param(DELAY_PARAM, default="0")
+        )
+
+    @api.model
+    def _add(self, locations_products, location_field):
+        """Buffer the replenishment of the products in the locations
+
+        :param locations_products: dict {location: product.product recordset}
+        :param location_field: location_id or location_src_id
+        """
+        rows = [
+            (location.id, product_id, location_field)
+            for location, products in locations_products.items()
+            for product_id in products.ids
+        ]
+        if not rows:
+            return
+        execute_values(
+            self.env.cr._obj,
+            """
+            INSERT INTO stock_location_orderpoint_buffer (
+                location_id, product_id, location_field, date
+            )
+            VALUES %s
+            """,
+            rows,
+            template="(%s, %s, %s, now() at time zone 'utc')",
+        )
+        self.invalidate_cache()
+        self._enqueue_run_replenishment()
+
+    def _enqueue_run_replenishment(self, **job_options):
+        """Enqueue a job stock.location.orderpoint.buffer.run_replenishment()
+
+        Only one job is pending at a time: the replenishments buffered until
+        it starts are all run by it.
+
+        return: a `Job` instance
+        """
+        job_options = job_options.copy()
+        job_options.setdefault(
+            "description", _("Run the buffered location replenishments")
+        )
+        job_options.setdefault("eta", self._get_delay())
+        job_options.setdefault("identity_key", identity_exact)
+        return self.browse().delayable(**job_options).run_replenishment().delay()
+
+    @api.model
+    def run_replenishment(self):
+        """Run the auto replenishment of the buffered locations and products
+
+        Each orderpoint is run once for all the products buffered on its
+        locations. The rows inserted while the job runs are not visible to it
+        and are kept for the next job.
+        """
+        self.env.cr.execute(
+            """
+            DELETE FROM stock_location_orderpoint_buffer
+            RETURNING location_id, product_id, location_field,
+                (now() at time zone 'utc') - date
+            """
+        )
+        rows = self.env.cr.fetchall()
+        self.invalidate_cache()
+        if not rows:
+            return
+        location_ids = defaultdict(set)
+        product_ids = defaultdict(set)
+        requests = set()
+        for location_id, product_id, location_field, __ in rows:
+            location_ids[location_field].add(location_id)
+            product_ids[location_field].add(product_id)
+            requests.add((location_id, product_id, location_field))
+        orderpoint_model = self.env["stock.location.orderpoint"]
+        for location_field in location_ids:
+            orderpoint_model.run_auto_replenishment(
+                self.env["product.product"].browse(list(product_ids[location_field])),
+                self.env["stock.location"].browse(list(location_ids[location_field])),
+                location_field,
+            )
+        _logger.info(
+            "Auto replenishment of %s products in %s locations for %s "
+            "requests (coalescing ratio %.2f), oldest request waited %s",
+            sum(len(ids) for ids in product_ids.values()),
+            sum(len(ids) for ids in location_ids.values()),
+            len(rows),
+            len(rows) / len(requests),
+            max(row[3] for row in rows),
+        )
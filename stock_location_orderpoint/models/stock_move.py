@@ -55,13 +55,29 @@ class StockMove(models.Model):
         orderpoints = self.env["stock.location.orderpoint"]._get_orderpoints(
             "auto", list(location_ids), location_field
         )
+        locations_products = {
+            location: product_obj.browse(products)
+            for location, products in locations_products.items()
+            if orderpoints._is_location_parent_of(location, location_field)
+        }
+        buffer_model = self.env["stock.location.orderpoint.buffer"].sudo()
+        buffered = bool(buffer_model._get_delay())
+        to_buffer = defaultdict(lambda: product_obj)
         for location, products in locations_products.items():
-            if not orderpoints._is_location_parent_of(location, location_field):
-                continue
-            for product in product_obj.browse(products):
-                self._enqueue_auto_replenishment(
+            for product in products:
+                job = self._enqueue_auto_replenishment(
                     location, product, location_field
-                ).delay()
+                )
+                if not job:
+                    continue
+                if buffered:
+                    # The buffer runs the replenishments of all the buffered
+                    # products in one job instead of one job per product
+                    to_buffer[location] |= product
+                else:
+                    job.delay()
+        if to_buffer:
+            buffer_model._add(to_buffer, location_field)
 
     def _enqueue_auto_replenishment(
         self, location, product, location_field, **job_options
@@ -70,6 +86,9 @@ class StockMove(models.Model):
 
         Can be extended to pass different options to the job (priority, ...).
         The usage of `.setdefault` allows to override the options set by default.
+        When the replenishments are buffered, the returned job is not enqueued:
+        the location and product are added to the buffer instead, unless
+        nothing is returned.
 
         return: a `Job` instance
         """
@@ -1,6 +1,8 @@
 # Copyright 2023 Michael Tietz (MT Software) <mtietz@mt-software.de>
 # License AGPL-3.0 or later (https://www.gnu.org/licenses/agpl).
 
+from unittest import mock
+
 from psycopg2 import IntegrityError
 
 from odoo.exceptions import ValidationError
@@ -191,3 +193,79 @@ class TestLocationOrderpoint(TestLocationOrderpointCommon):
         self.assertEqual(1, self.location_dest.location_orderpoint_count)
         _, _ = self._create_orderpoint_complete("Stock3", trigger="cron")
         self.assertEqual(2, self.location_dest.location_orderpoint_count)
+
+    def test_compute_quantities_dict(self):
+        location_src = self._create_location("Stock2")
+        sublocation = self.env["stock.location"].create(
+            {"name": "Stock Shelf", "location_id": self.location_dest.id}
+        )
+        self._create_quants(self.product, location_src, 20)
+        self._create_quants(self.product, sublocation, 5)
+        self._create_outgoing_move(8)
+        self._create_move("Internal", 3, location_src, sublocation)
+        locations = self.location_dest | sublocation | location_src
+        qties = self.env["stock.location.orderpoint"]._compute_quantities_dict(
+            locations, self.product
+        )
+        for location in locations:
+            self.product.invalidate_cache()
+            expected = self.product.with_context(
+                location=location.id
+            )._product_available()[self.product.id]
+            for fname, qty in qties[location][self.product].items():
+                self.assertEqual(qty, expected[fname], f"{location.name} {fname}")
+
+    def test_auto_replenishment_buffer(self):
+        self.env["ir.config_parameter"].sudo().set_param(
+            "stock_location_orderpoint.auto_replenishment_delay", "10"
+        )
+        buffer_model = self.env["stock.location.orderpoint.buffer"]
+        orderpoint_func = self.env["stock.location.orderpoint"].run_auto_replenishment
+        orderpoint, location_src = self._create_orderpoint_complete(
+            "Stock2", trigger="auto"
+        )
+        self._create_quants(self.product, location_src, 20)
+        with trap_jobs() as trap:
+            move = self._create_outgoing_move(12)
+            self._create_outgoing_move(3)
+            trap.assert_jobs_count(0, only=orderpoint_func)
+            trap.assert_enqueued_job(
+                buffer_model.run_replenishment,
+                args=(),
+                kwargs={},
+                properties=dict(identity_key=identity_exact),
+            )
+            buffered = buffer_model.search([])
+            self.assertRecordValues(
+                buffered,
+                [
+                    {
+                        "location_id": move.location_id.id,
+                        "product_id": self.product.id,
+                        "location_field": "location_id",
+                    }
+                ]
+                * 2,
+            )
+            self.product.invalidate_cache()
+            buffer_model.run_replenishment()
+        self.assertFalse(buffered.exists())
+        replenish_move = self._get_replenishment_move(orderpoint)
+        self._check_replenishment_move(replenish_move, 15, orderpoint)
+
+    def test_auto_replenishment_buffer_hook(self):
+        self.env["ir.config_parameter"].sudo().set_param(
+            "stock_location_orderpoint.auto_replenishment_delay", "10"
+        )
+        buffer_model = self.env["stock.location.orderpoint.buffer"]
+        self._create_orderpoint_complete("Stock2", trigger="auto")
+        # The buffered moves still go through the extension hook
+        with mock.patch.object(
+            type(self.env["stock.move"]),
+            "_enqueue_auto_replenishment",
+            return_value=None,
+        ) as hook, trap_jobs() as trap:
+            move = self._create_outgoing_move(12)
+            trap.assert_jobs_count(0)
+        hook.assert_called_once_with(move.location_id, self.product, "location_id")
+        self.assertFalse(buffer_model.search([]))
@@ -19,6 +19,8 @@ class StockLocation(models.Model):
     )
     tray_cell_contains_stock = fields.Boolean(
         compute="_compute_tray_cell_contains_stock",
+        store=True,
+        index=True,
         help="Used to know if a cell of a Tray location is empty.",
     )
     tray_matrix = Serialized(string="Cells", compute="_compute_tray_matrix")
@@ -36,28 +38,90 @@ class StockLocation(models.Model):
     def _default_cell_name_format(self):
         return "x{x:0>2}y{y:0>2}"
 
-    @api.depends("quant_ids.quantity")
+    @api.depends("quant_ids.quantity", "cell_in_tray_type_id")
     def _compute_tray_cell_contains_stock(self):
+        # Not a tray cell so the value is irrelevant,
+        # best to skip them for performance.
+        cells = self.filtered("cell_in_tray_type_id")
+        cell_ids_with_stock = cells._origin._get_location_ids_with_stock()
         for location in self:
-            if not location.cell_in_tray_type_id:
-                # Not a tray cell so the value is irrelevant,
-                # best to skip them for performance.
-                location.tray_cell_contains_stock = False
-                continue
-            quants = location.quant_ids.filtered(lambda r: r.quantity > 0)
-            location.tray_cell_contains_stock = bool(quants)
+            location.tray_cell_contains_stock = (
+                location._origin.id in cell_ids_with_stock
+            )
 
-    @api.depends("quant_ids.quantity", "tray_type_id", "location_id.tray_type_id")
+    @api.depends(
+        "quant_ids.quantity",
+        "child_ids.quant_ids.quantity",
+        "location_id.child_ids.quant_ids.quantity",
+        "tray_type_id",
+        "location_id.tray_type_id",
+    )
     def _compute_tray_matrix(self):
+        trays = self.filtered("tray_type_id") | self.filtered(
+            "cell_in_tray_type_id"
+        ).mapped("location_id")
+        bitmaps = trays._origin._get_tray_cell_bitmaps()
         for location in self:
-            if not (location.tray_type_id or location.cell_in_tray_type_id):
+            if location.tray_type_id:
+                tray = location
+            elif location.cell_in_tray_type_id:
+                tray = location.location_id
+            else:
                 location.tray_matrix = {}
                 continue
-            location.tray_matrix = location._tray_matrix_for_widget()
+            location.tray_matrix = location._tray_matrix_for_widget(
+                bitmap=bitmaps.get(tray._origin.id, 0)
+            )
+
+    def _get_location_ids_with_stock(self):
+        """Return the ids of the locations containing a positive quant"""
+        if not self.ids:
+            return set()
+        self.env["stock.quant"].flush(["location_id", "quantity"])
+        self.env.cr.execute(
+            """
+            SELECT DISTINCT location_id
+            FROM stock_quant
+            WHERE location_id IN %s AND quantity > 0
+            """,
+            (tuple(self.ids),),
+        )
+        return {row[0] for row in self.env.cr.fetchall()}
+
+    def _get_tray_cell_bitmaps(self):
+        """Return the cells containing stock of the trays as bitmaps
+
+        The bit ``(posy - 1) * cols + (posx - 1)`` of the bitmap of a tray is
+        set when the cell at this position contains stock. All the trays are
+        read in a single query.
+
+        :return: dict {tray id: int}
+        """
+        trays = self.filtered("tray_type_id")
+        bitmaps = dict.fromkeys(trays.ids, 0)
+        if not trays:
+            return bitmaps
+        self.env["stock.quant"].flush(["location_id", "quantity"])
+        self.flush(["location_id", "posx", "posy", "active"])
+        self.env.cr.execute(
+            """
+            SELECT DISTINCT cell.location_id, cell.posx, cell.posy
+            FROM stock_quant quant
+            JOIN stock_location cell ON cell.id = quant.location_id
+            WHERE cell.location_id IN %s AND cell.active AND quant.quantity > 0
+            """,
+            (tuple(trays.ids),),
+        )
+        tray_types = {tray.id: tray.tray_type_id for tray in trays}
+        for tray_id, posx, posy in self.env.cr.fetchall():
+            tray_type = tray_types[tray_id]
+            if 0 < posx <= tray_type.cols and 0 < posy <= tray_type.rows:
+                bitmaps[tray_id] |= 1 << ((posy - 1) * tray_type.cols + posx - 1)
+        return bitmaps
 
-    def _tray_matrix_for_widget(self):
+    def _tray_matrix_for_widget(self, bitmap=None):
         selected = self._tray_cell_coords()
-        cells = self._tray_cell_matrix()
+        cells = self._tray_cell_matrix(bitmap=bitmap)
         return {
             # x, y: position of the selected cell
             "selected": selected,
@@ -152,18 +216,15 @@ class StockLocation(models.Model):
             return []
         return [self.posx - 1, self.posy - 1]
 
-    def _tray_cell_matrix(self):
+    def _tray_cell_matrix(self, bitmap=None):
         assert self.tray_type_id or self.cell_in_tray_type_id
         if self.tray_type_id:
             location = self
         else:  # cell
             location = self.location_id
-        cells = location.tray_type_id._generate_cells_matrix()
-        for cell in location.child_ids:
-            if cell.tray_cell_contains_stock:
-                # 1 means used
-                cells[cell.posy - 1][cell.posx - 1] = 1
-        return cells
+        if bitmap is None:
+            bitmap = location._get_tray_cell_bitmaps().get(location.id, 0)
+        return location.tray_type_id._generate_cells_matrix(bitmap=bitmap)
 
     def _format_tray_sublocation_name(self, x, y, z):
         template = self.cell_name_format or self._default_cell_name_format()
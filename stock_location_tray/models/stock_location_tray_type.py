@@ -70,8 +70,20 @@ class StockLocationTrayType(models.Model):
             expression.AND([domain, args]), limit=limit, access_rights_uid=name_get_uid
         )
 
-    def _generate_cells_matrix(self, default_state=0):
-        return [[default_state] * self.cols for __ in range(self.rows)]
+    def _generate_cells_matrix(self, default_state=0, bitmap=0):
+        """Return the matrix of the cells, as a list of rows
+
+        :param bitmap: int whose bit ``row * cols + col`` is set for the
+                       used cells, the other cells are in the default state
+        """
+        cols = self.cols
+        return [
+            [
+                1 if bitmap >> (row * cols + col) & 1 else default_state
+                for col in range(cols)
+            ]
+            for row in range(self.rows)
+        ]
 
     @api.constrains("active")
     def _location_check_active(self):
@@ -92,6 +92,36 @@ class TestLocation(LocationTrayTypeCase):
             },
         )
 
+    def test_matrix_several_trays(self):
+        tray_z = self._create_tray_z()
+        self._update_quantity_in_cell(
+            self._cell_for(self.tray_location, x=2, y=1), self.product, 100
+        )
+        self._update_quantity_in_cell(
+            self._cell_for(tray_z, x=1, y=2), self.product, 100
+        )
+        trays = self.tray_location | tray_z
+        self.assertEqual(
+            trays._get_tray_cell_bitmaps(),
+            # bit (posy - 1) * cols + (posx - 1) is set for used cells
+            {self.tray_location.id: 0b10, tray_z.id: 1 << tray_z.tray_type_id.cols},
+        )
+        cell = self._cell_for(tray_z, x=1, y=2)
+        self.assertTrue(cell.tray_cell_contains_stock)
+        self.assertEqual(cell.tray_matrix["cells"][1][0], 1)
+        self.assertEqual(
+            trays.mapped("tray_matrix"),
+            [
+                {"selected": [], "cells": [[0, 1, 0, 0], [0, 0, 0, 0]]},
+                {
+                    "selected": [],
+                    "cells": tray_z.tray_type_id._generate_cells_matrix(
+                        bitmap=1 << tray_z.tray_type_id.cols
+                    ),
+                },
+            ],
+        )
+
     def test_action_tray_matrix_click(self):
         location_view = self.tray_location.action_tray_matrix_click(2, 1)
         self.assertEqual(location_view["res_model"], "stock.location")
@@ -1,2 +1,3 @@
 from . import product
+from . import product_packaging
 from . import product_qty_by_packaging_mixin
@@ -3,9 +3,10 @@
 # License LGPL-3.0 or later (https://www.gnu.org/licenses/lgpl)
 
 from collections import namedtuple
+from decimal import Decimal
 
-from odoo import api, models
-from odoo.tools import float_compare
+from odoo import api, models, tools
+from odoo.tools import float_compare, float_is_zero
 
 from odoo.addons.base_sparse_field.models.fields import Serialized
 
@@ -72,6 +73,45 @@ class Product(models.Model):
             with_contained=with_contained,
         )
 
+    @api.model
+    def product_qty_by_packaging_bulk(self, product_qties, with_contained=False):
+        """Calculate quantity by packaging for many products at once.
+
+        Meant for reports and labels: the packagings of all the products are
+        read at once and ordered once per product.
+
+        :product_qties: list of tuples (product, qty)
+        :with_contained: include calculation of contained packagings.
+        :returns: list of `product_qty_by_packaging` results, in the order
+            of `product_qties`
+        """
+        product_qties = list(product_qties)
+        product_ids = list({product.id for product, __ in product_qties})
+        # share the prefetching of the packagings between all the products
+        products = self.browse(product_ids)
+        products.packaging_ids.read(["name", "qty", "barcode"], load=False)
+        ordered_packaging = {}
+        res = []
+        for product, qty in product_qties:
+            product = products.browse(product.id)
+            if product not in ordered_packaging:
+                ordered_packaging[product] = product._ordered_packaging()
+            res.append(
+                product._product_qty_by_packaging(
+                    ordered_packaging[product], qty, with_contained=with_contained
+                )
+            )
+        return res
+
+    @tools.ormcache("self.id", "tuple(self.env.companies.ids)")
+    def _ordered_packaging_ids(self):
+        """Return the ids of the packaging ordered by qty, w/o the empty ones.
+
+        Cached until a packaging is changed.
+        """
+        packaging = self.packaging_ids.filtered("qty")
+        return tuple(packaging.sorted(key=lambda x: x.qty, reverse=True).ids)
+
     def _ordered_packaging(self):
         """Prepare packaging ordered by qty and exclude empty ones.
 
@@ -85,16 +125,13 @@ class Product(models.Model):
         name_getter = self.env.context.get(
             "_packaging_name_getter", self._packaging_name_getter
         )
-        packagings = sorted(
-            [
-                Packaging(x.id, name_getter(x), x.qty, x.barcode, False)
-                for x in self.packaging_ids.filtered(custom_filter)
-                # Exclude the ones w/ zero qty as they are useless for the math
-                if x.qty
-            ],
-            reverse=True,
-            key=lambda x: x.qty,
+        packaging_records = self.env["product.packaging"].browse(
+            self._ordered_packaging_ids()
         )
+        packagings = [
+            Packaging(x.id, name_getter(x), x.qty, x.barcode, False)
+            for x in packaging_records.filtered(custom_filter)
+        ]
         # Add minimal unit
         packagings.append(
             # NOTE: the ID here could clash w/ one of the packaging's.
@@ -116,7 +153,7 @@ class Product(models.Model):
         )
         for pkg in pkg_by_qty:
             # Boost perf: no need to deduce the qty_per_pkg if the pkg_qty is 1
-            if float_compare(pkg.qty, 1, precision_digits=self.uom_id.rounding) == 0:
+            if float_compare(pkg.qty, 1, precision_rounding=self.uom_id.rounding) == 0:
                 qty_per_pkg = int(qty)
                 qty = 0.0
             else:
@@ -136,15 +173,22 @@ class Product(models.Model):
         return res
 
     def _qty_by_pkg(self, pkg_qty, qty):
-        """Calculate qty needed for given package qty."""
-        qty_per_pkg = 0
-        while (
-            float_compare(qty - pkg_qty, 0.0, precision_digits=self.uom_id.rounding)
-            >= 0.0
+        """Calculate qty needed for given package qty.
+
+        The division is made on decimals to be exact, a remaining qty
+        equal to the package qty according to the UoM rounding counts
+        as one more package.
+        """
+        if qty <= 0:
+            return 0, qty
+        pkg_qty = Decimal(str(pkg_qty))
+        qty_per_pkg, remaining = divmod(Decimal(str(qty)), pkg_qty)
+        if float_is_zero(
+            float(pkg_qty - remaining), precision_rounding=self.uom_id.rounding
         ):
-            qty -= pkg_qty
             qty_per_pkg += 1
-        return qty_per_pkg, qty
+            remaining -= pkg_qty
+        return int(qty_per_pkg), float(remaining)
 
     def _prepare_qty_by_packaging_values(self, packaging, qty_per_pkg):
         return {
@@ -160,3 +160,77 @@ class TestCalc(TestCommon):
             self.product_a.product_qty_by_packaging(2655, with_contained=True),
             expected,
         )
+
+    def test_calc_large_qty(self):
+        """Test big quantities are split at once."""
+        self.pkg_box.qty = 6
+        expected = [
+            make_pkg_values(self.pkg_pallet, qty=499),
+            make_pkg_values(self.pkg_big_box, qty=9),
+            make_pkg_values(self.pkg_box, qty=33),
+            make_pkg_values(self.uom_unit, qty=1),
+        ]
+        self.assertEqual(self.product_a.product_qty_by_packaging(999999), expected)
+
+    def test_calc_uom_rounding(self):
+        """Test a remaining qty within the UoM rounding makes a package."""
+        self.uom_unit.rounding = 1.0
+        expected = [
+            make_pkg_values(self.pkg_big_box, qty=1),
+            make_pkg_values(self.pkg_box, qty=1),
+        ]
+        self.assertEqual(self.product_a.product_qty_by_packaging(249.6), expected)
+
+    def test_calc_negative_qty(self):
+        """Test negative quantities are not split in packagings."""
+        self.assertEqual(self.product_a._qty_by_pkg(10, -25), (0, -25))
+        self.assertEqual(
+            self.product_a.product_qty_by_packaging(-25),
+            [make_pkg_values(self.uom_unit, qty=-25)],
+        )
+
+    def test_ordered_packaging_cache(self):
+        self.assertEqual(
+            [pkg.id for pkg in self.product_a._ordered_packaging()],
+            [
+                self.pkg_pallet.id,
+                self.pkg_big_box.id,
+                self.pkg_box.id,
+                self.uom_unit.id,
+            ],
+        )
+        self.pkg_box.qty = 5000
+        self.assertEqual(
+            [pkg.id for pkg in self.product_a._ordered_packaging()],
+            [
+                self.pkg_box.id,
+                self.pkg_pallet.id,
+                self.pkg_big_box.id,
+                self.uom_unit.id,
+            ],
+        )
+
+    def test_calc_bulk(self):
+        product_b = self.product_a.copy({"name": "Product B"})
+        pkg_b = self.env["product.packaging"].create(
+            {"name": "Pack", "product_id": product_b.id, "qty": 10}
+        )
+        self.assertEqual(
+            self.env["product.product"].product_qty_by_packaging_bulk(
+                [(self.product_a, 350), (product_b, 25), (self.product_a, 80)]
+            ),
+            [
+                [
+                    make_pkg_values(self.pkg_big_box, qty=1),
+                    make_pkg_values(self.pkg_box, qty=3),
+                ],
+                [
+                    make_pkg_values(pkg_b, qty=2),
+                    make_pkg_values(self.uom_unit, qty=5),
+                ],
+                [
+                    make_pkg_values(self.pkg_box, qty=1),
+                    make_pkg_values(self.uom_unit, qty=30),
+                ],
+            ],
+        )
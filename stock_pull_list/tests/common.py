@@ -81,6 +81,34 @@ class TestPullListCommon(TransactionCase):
         picking.action_confirm()
         return picking
 
+    def create_picking_in_a(self, date_move, qty):
+        supplier_loc = self.env.ref("stock.stock_location_suppliers")
+        picking = self.picking_obj.create(
+            {
+                "picking_type_id": self.ref("stock.picking_type_in"),
+                "location_id": supplier_loc.id,
+                "location_dest_id": self.warehouse.lot_stock_id.id,
+                "scheduled_date": date_move,
+                "move_lines": [
+                    (
+                        0,
+                        0,
+                        {
+                            "name": "Test incoming move",
+                            "product_id": self.product_a.id,
+                            "date": date_move,
+                            "product_uom": self.product_a.uom_id.id,
+                            "product_uom_qty": qty,
+                            "location_id": supplier_loc.id,
+                            "location_dest_id": self.warehouse.lot_stock_id.id,
+                        },
+                    )
+                ],
+            }
+        )
+        picking.action_confirm()
+        return picking
+
     def _update_product_qty(self, product, quantity):
         """Update Product quantity."""
         change_product_qty = self.stock_change_obj.create(
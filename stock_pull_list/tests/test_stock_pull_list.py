@@ -1,6 +1,8 @@
 # Copyright 2020 ForgeFlow, S.L.
 # License AGPL-3.0 or later (https://www.gnu.org/licenses/agpl.html).
 
+from datetime import timedelta as td
+
 from odoo.exceptions import UserError
 
 from .common import TestPullListCommon
@@ -11,14 +13,14 @@ class TestStockPullList(TestPullListCommon):
         self._generate_moves()
         wiz = self.wiz_obj.create({})
         wiz.action_prepare()
-        lines = wiz.line_ids.filtered(lambda l: l.product_id == self.product_a)
+        lines = wiz.line_ids.filtered(lambda line: line.product_id == self.product_a)
         self.assertEqual(len(lines), 2)
-        line_1 = lines.filtered(lambda l: l.date == self.yesterday.date())
+        line_1 = lines.filtered(lambda line: line.date == self.yesterday.date())
         self.assertEqual(line_1.raw_demand_qty, 50)
         self.assertEqual(line_1.needed_qty, 50)
         self.assertEqual(line_1.stock_rule_id, self.transfer_rule)
 
-        line_2 = lines.filtered(lambda l: l.date == self.date_3.date())
+        line_2 = lines.filtered(lambda line: line.date == self.date_3.date())
         self.assertEqual(line_2.raw_demand_qty, 70)
         self.assertEqual(line_2.needed_qty, 70)
 
@@ -26,7 +28,7 @@ class TestStockPullList(TestPullListCommon):
         self._generate_moves()
         wiz = self.wiz_obj.create({"consolidate_by_product": True})
         wiz.action_prepare()
-        line = wiz.line_ids.filtered(lambda l: l.product_id == self.product_a)
+        line = wiz.line_ids.filtered(lambda line: line.product_id == self.product_a)
         self.assertEqual(len(line), 1)
         self.assertEqual(line.date, self.today.date())
         expected = 50 + 70
@@ -41,7 +43,7 @@ class TestStockPullList(TestPullListCommon):
         self._generate_moves()
         wiz = self.wiz_obj.create({"consolidate_by_product": True})
         wiz.action_prepare()
-        line = wiz.line_ids.filtered(lambda l: l.product_id == self.product_a)
+        line = wiz.line_ids.filtered(lambda line: line.product_id == self.product_a)
         self.assertEqual(len(line), 0)
 
     def test_04_server_action(self):
@@ -56,11 +58,30 @@ class TestStockPullList(TestPullListCommon):
         picking.picking_type_id.update({"allow_pull_list_server_action": True})
         picking.action_create_pull_list()
         wizard = self.env["stock.pull.list.wizard"].search([])
-        lines = wizard.line_ids.filtered(lambda l: l.product_id == self.product_a)
+        lines = wizard.line_ids.filtered(lambda line: line.product_id == self.product_a)
         self.assertEqual(len(lines), 2)
-        line_1 = lines.filtered(lambda l: l.date == self.yesterday.date())
+        line_1 = lines.filtered(lambda line: line.date == self.yesterday.date())
         self.assertEqual(line_1.raw_demand_qty, 50)
         self.assertEqual(line_1.needed_qty, 50)
         self.assertEqual(line_1.stock_rule_id, self.transfer_rule)
         picking[0].update({"location_id": self.customer_loc.id})
         self.assertRaises(UserError, picking.action_create_pull_list)
+
+    def test_05_incoming_supply(self):
+        """Incoming moves supply the next demand of the product, available
+        stock is assigned to the earliest demand."""
+        self._update_product_qty(self.product_a, 10.0)
+        self._generate_moves()
+        self.create_picking_in_a(self.today, 20)
+        self.create_picking_in_a(self.date_3 + td(days=2), 30)
+        wiz = self.wiz_obj.create({})
+        wiz.action_prepare()
+        lines = wiz.line_ids.filtered(lambda line: line.product_id == self.product_a)
+        line_1 = lines.filtered(lambda line: line.date == self.yesterday.date())
+        self.assertEqual(line_1.available_qty, 10)
+        self.assertEqual(line_1.incoming_qty, 0)
+        self.assertEqual(line_1.needed_qty, 40)
+        line_2 = lines.filtered(lambda line: line.date == self.date_3.date())
+        self.assertEqual(line_2.available_qty, 0)
+        self.assertEqual(line_2.incoming_qty, 20)
+        self.assertEqual(line_2.needed_qty, 50)
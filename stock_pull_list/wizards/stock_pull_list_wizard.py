@@ -2,6 +2,7 @@
 # License AGPL-3.0 or later (https://www.gnu.org/licenses/agpl.html).
 
 import itertools
+from collections import defaultdict
 
 from odoo import _, api, fields, models
 from odoo.exceptions import UserError
@@ -88,14 +89,17 @@ class PullListWizard(models.TransientModel):
     @api.model
     def _prepare_line_values(self, key, demand_qty, supply_qty):
         product, location, date = key
-        rule = self._get_stock_rule_id(product, location)
-        global qty_assigned
-        prev = qty_assigned.setdefault(product, 0.0)
-        qty_available = self._get_available_qty(product, location) - prev
-        need_without_stock = max(demand_qty - supply_qty, 0.0)
-        qty_assigned_now = min(qty_available, need_without_stock)
+        # the quantities and rules of all the lines are computed at once by
+        # _get_lines_values()
+        qty_available = self.env.context.get("pull_list_available_qties", {}).get(key)
+        if qty_available is None:
+            qty_available = self._get_available_qty(product, location)
+        rules = self.env.context.get("pull_list_stock_rules", {})
+        if (product, location) in rules:
+            rule = rules[product, location]
+        else:
+            rule = self._get_stock_rule_id(product, location)
         qty_needed = max(demand_qty - qty_available - supply_qty, 0.0)
-        qty_assigned[product] = prev + qty_assigned_now
         return {
             "product_id": product.id if product else False,
             "location_id": location.id if location else False,
@@ -107,14 +111,21 @@ class PullListWizard(models.TransientModel):
             "needed_qty": qty_needed,
         }
 
+    def _get_available_qties(self, products_by_location):
+        """Return the quantities of the products available in the locations
+
+        :param products_by_location: dict {location: product.product recordset}
+        :return: dict {(product, location): qty}
+        """
+        field_name = "free_qty" if self.exclude_reserved else "qty_available"
+        res = {}
+        for location, products in products_by_location.items():
+            for product in products.with_context(location=location.id):
+                res[product, location] = product[field_name]
+        return res
+
     def _get_available_qty(self, product, location):
-        product_obj = self.env["product.product"]
-        product_l = product_obj.with_context({"location": location.id}).browse(
-            product.id
-        )
-        if self.exclude_reserved:
-            return product_l.free_qty
-        return product_l.qty_available
+        return self._get_available_qties({location: product})[product, location]
 
     @api.model
     def _get_stock_rule_id(self, product_id, location_id):
@@ -127,51 +138,141 @@ class PullListWizard(models.TransientModel):
         )
         return stock_rule_id
 
-    def action_prepare(self):
-        domain = self._get_moves_demand_domain()
-        # `read_group` is not possible here because of the date format the
-        # method returns.
-        demand_moves = self.env["stock.move"].search(domain, order="date asc")
-        demand_dict = {}
+    def _get_move_rows(self, domain, location_field):
+        """Return the product, location, date and quantity of the moves
+        matching the domain, sorted by date
+        """
+        move_model = self.env["stock.move"]
+        move_model.flush(
+            [
+                "product_id",
+                "location_id",
+                "location_dest_id",
+                "date",
+                "state",
+                "product_uom_qty",
+                "group_id",
+            ]
+        )
+        query = move_model._where_calc(domain)
+        move_model._apply_ir_rules(query, "read")
+        from_clause, where_clause, where_params = query.get_sql()
+        # pylint: disable=sql-injection
+        self.env.cr.execute(
+            """
+            SELECT stock_move.product_id, stock_move.{location_field},
+                stock_move.date, stock_move.product_uom_qty
+            FROM {from_clause}
+            WHERE {where_clause}
+            ORDER BY stock_move.date, stock_move.id
+            """.format(
+                location_field=location_field,
+                from_clause=from_clause,
+                where_clause=where_clause or "TRUE",
+            ),
+            where_params,
+        )
+        return self.env.cr.fetchall()
+
+    def _get_demand_and_supply(self):
+        """Group the demand and net the incoming moves against it
+
+        Each incoming move supplies the first demand of its product planned
+        at the same date or later. As both are read sorted by date, this is
+        found by sweeping once through the demand dates of each product.
+
+        :return: tuple of dicts {(product, location, date): qty}, for the
+                 demand and for the supply
+        """
+        self.ensure_one()
         force_date = fields.Date.today() if self.consolidate_by_product else False
-        for demand in demand_moves:
+        demand_rows = self._get_move_rows(
+            self._get_moves_demand_domain(), "location_id"
+        )
+        supply_rows = self._get_move_rows(
+            self._get_moves_incoming_domain(), "location_dest_id"
+        )
+        demand_dates = defaultdict(list)
+        for product_id, __, date, __ in demand_rows:
+            demand_dates[product_id].append(date)
+        supply_rows = [row for row in supply_rows if row[0] in demand_dates]
+        products = self.env["product.product"].browse(list(demand_dates))
+        product_by_id = {product.id: product for product in products}
+        locations = self.env["stock.location"].browse(
+            list({row[1] for row in demand_rows + supply_rows})
+        )
+        location_by_id = {location.id: location for location in locations}
+
+        demand_dict = {}
+        for product_id, location_id, date, qty in demand_rows:
             key = (
-                demand.product_id,
-                demand.location_id,
-                fields.Date.to_date(demand.date) if not force_date else force_date,
+                product_by_id[product_id],
+                location_by_id[location_id],
+                force_date or fields.Date.to_date(date),
             )
-            prev = demand_dict.setdefault(key, 0.0)
             # TODO: when exclude_reserved is selected, handle partially avail.
-            demand_dict[key] = prev + demand.product_uom_qty
+            demand_dict[key] = demand_dict.get(key, 0.0) + qty
 
-        domain = self._get_moves_incoming_domain()
-        incoming_moves = self.env["stock.move"].search(domain, order="date asc")
         incoming_dict = {}
-        for supply in incoming_moves:
-            move_for_date = demand_moves.filtered(
-                lambda m: m.product_id == supply.product_id and m.date >= supply.date
-            )
-            if move_for_date:
-                date_selected = move_for_date[0].date if not force_date else force_date
-            else:
+        # index of the first demand date of each product not before the
+        # supply dates, which only grow
+        demand_index = defaultdict(int)
+        for product_id, location_id, date, qty in supply_rows:
+            dates = demand_dates[product_id]
+            index = demand_index[product_id]
+            while index < len(dates) and dates[index] < date:
+                index += 1
+            demand_index[product_id] = index
+            if index == len(dates):
                 # Supply is later than last demand -> ignore it.
                 continue
             key = (
-                supply.product_id,
-                supply.location_dest_id,
-                fields.Date.to_date(date_selected),
+                product_by_id[product_id],
+                location_by_id[location_id],
+                force_date or fields.Date.to_date(dates[index]),
             )
-            prev = incoming_dict.setdefault(key, 0.0)
-            incoming_dict[key] = prev + supply.product_uom_qty
+            incoming_dict[key] = incoming_dict.get(key, 0.0) + qty
+        return demand_dict, incoming_dict
 
-        lines = []
-        global qty_assigned
-        qty_assigned = {}
+    def _get_lines_values(self, demand_dict, incoming_dict):
+        """Return the values of the lines for the demand not covered by the
+        stock and the supply
+
+        The available stock of a product is assigned to its demand in the
+        order of the demand dates.
+        """
+        products_by_location = defaultdict(lambda: self.env["product.product"])
+        for product, location, __ in demand_dict:
+            products_by_location[location] |= product
+        available_qties = self._get_available_qties(products_by_location)
+        rules = {}
+        qty_assigned = defaultdict(float)
+        line_available_qties = {}
         for key, demand_qty in demand_dict.items():
+            product, location, __ = key
+            if (product, location) not in rules:
+                rules[product, location] = self._get_stock_rule_id(product, location)
             supply_qty = incoming_dict.get(key, 0.0)
-            line_data = self._prepare_line_values(key, demand_qty, supply_qty)
-            if line_data["needed_qty"] > 0.0:
-                lines.append((0, 0, line_data))
+            qty_available = available_qties[product, location] - qty_assigned[product]
+            line_available_qties[key] = qty_available
+            need_without_stock = max(demand_qty - supply_qty, 0.0)
+            qty_assigned[product] += min(qty_available, need_without_stock)
+        wizard = self.with_context(
+            pull_list_available_qties=line_available_qties,
+            pull_list_stock_rules=rules,
+        )
+        return [
+            wizard._prepare_line_values(key, demand_qty, incoming_dict.get(key, 0.0))
+            for key, demand_qty in demand_dict.items()
+        ]
+
+    def action_prepare(self):
+        demand_dict, incoming_dict = self._get_demand_and_supply()
+        lines = [
+            (0, 0, line_data)
+            for line_data in self._get_lines_values(demand_dict, incoming_dict)
+            if line_data["needed_qty"] > 0.0
+        ]
         self.update({"line_ids": lines})
         res = self._act_window_pull_list_step_2()
         return res
@@ -265,7 +366,7 @@ class PullListWizard(models.TransientModel):
             group = pg_obj.create(self._prepare_proc_group_values())
             proc_groups.append(group.id)
             procurements = []
-            for line in lines.filtered(lambda l: l.selected):
+            for line in lines.filtered("selected"):
                 n += 1
                 if 0 < self.max_lines < n:
                     n = 0
@@ -1,6 +1,7 @@
 # Copyright 2017-2020 ForgeFlow, S.L.
 # License LGPL-3.0 or later (https://www.gnu.org/licenses/lgpl.html).
 
+from collections import defaultdict
 from datetime import datetime, time
 
 from dateutil import relativedelta
@@ -9,6 +10,8 @@ from odoo import _, api, fields, models
 from odoo.exceptions import UserError, ValidationError
 from odoo.tools import float_compare
 
+from odoo.addons.stock.models.stock_rule import ProcurementException
+
 
 class StockRequest(models.Model):
     _name = "stock.request"
@@ -388,6 +391,23 @@ class StockRequest(models.Model):
                 move.quantity_done = move.product_uom_qty
                 move._action_done()
 
+    def _get_free_qties(self):
+        """Free quantities of the requested products in the request locations
+
+        The quantities of all the products requested in a location are
+        computed at once.
+
+        :return: dict {(product id, location id): free qty}
+        """
+        products_by_location = defaultdict(lambda: self.env["product.product"])
+        for request in self:
+            products_by_location[request.location_id] |= request.product_id
+        res = {}
+        for location, products in products_by_location.items():
+            for product in products.sudo().with_context(location=location.id):
+                res[product.id, location.id] = product.free_qty
+        return res
+
     def _action_launch_procurement_rule(self):
         """
         Launch procurement group (if not enough stock is available) run method
@@ -395,11 +415,19 @@ class StockRequest(models.Model):
         stock request. procurement group will launch '_run_move',
         '_run_buy' or '_run_manufacture'
         depending on the stock request product rule.
+
+        The procurements of all the requests are run together, the errors
+        of all the procurements are reported at once.
         """
         precision = self.env["decimal.precision"].precision_get(
             "Product Unit of Measure"
         )
         errors = []
+        procurements = []
+        free_qties = self.filtered(
+            lambda r: r.company_id.stock_request_check_available_first
+            and not r._skip_procurement()
+        )._get_free_qties()
         for request in self:
             if request._skip_procurement():
                 continue
@@ -412,37 +440,50 @@ class StockRequest(models.Model):
 
             # If stock is available we use it and we do not execute rule
             if request.company_id.stock_request_check_available_first:
-                if (
-                    float_compare(
+                key = (request.product_id.id, request.location_id.id)
+                if key not in free_qties:
+                    # the stock of the product has been used by a request
+                    free_qties[key] = (
                         request.product_id.sudo()
                         .with_context(location=request.location_id.id)
-                        .free_qty,
+                        .free_qty
+                    )
+                if (
+                    float_compare(
+                        free_qties[key],
                         request.product_uom_qty,
                         precision_digits=precision,
                     )
                     >= 0
                 ):
                     request._action_use_stock_available()
+                    # the free quantities of the product in the other
+                    # locations (parent or children) may have changed too
+                    free_qties = {k: v for k, v in free_qties.items() if k[0] != key[0]}
                     continue
 
             values = request._prepare_procurement_values(
                 group_id=request.procurement_group_id
             )
+            procurements.append(
+                self.env["procurement.group"].Procurement(
+                    request.product_id,
+                    request.product_uom_qty,
+                    request.product_uom_id,
+                    request.location_id,
+                    request.name,
+                    request.name,
+                    self.env.company,
+                    values,
+                )
+            )
+        if procurements:
             try:
-                procurements = []
-                procurements.append(
-                    self.env["procurement.group"].Procurement(
-                        request.product_id,
-                        request.product_uom_qty,
-                        request.product_uom_id,
-                        request.location_id,
-                        request.name,
-                        request.name,
-                        self.env.company,
-                        values,
-                    )
+                self.env["procurement.group"].sudo().run(
+                    procurements, raise_user_error=False
                 )
-                self.env["procurement.group"].sudo().run(procurements)
+            except ProcurementException as error:
+                errors += [message for __, message in error.procurement_exceptions]
             except UserError as error:
                 errors.append(error.name)
         if errors:
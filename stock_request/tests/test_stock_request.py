@@ -633,6 +633,62 @@ class TestStockRequestBase(TestStockRequest):
         self.assertEqual(order.state, "done")
         self.assertEqual(len(order.stock_request_ids.move_ids), 2)
 
+    def _prepare_order_line_vals(self, product, qty, expected_date):
+        return {
+            "product_id": product.id,
+            "product_uom_id": product.uom_id.id,
+            "product_uom_qty": qty,
+            "company_id": self.main_company.id,
+            "warehouse_id": self.warehouse.id,
+            "location_id": self.warehouse.lot_stock_id.id,
+            "expected_date": expected_date,
+        }
+
+    def test_stock_request_order_available_stock_04(self):
+        """The stock used by a request is not available for the next ones"""
+        self.main_company.stock_request_check_available_first = True
+        self.product.route_ids = [(6, 0, self.route.ids)]
+        self._create_stock_quant(self.product, self.warehouse.lot_stock_id, 6)
+        expected_date = fields.Datetime.now()
+        vals = {
+            "company_id": self.main_company.id,
+            "warehouse_id": self.warehouse.id,
+            "location_id": self.warehouse.lot_stock_id.id,
+            "expected_date": expected_date,
+            "stock_request_ids": [
+                (0, 0, self._prepare_order_line_vals(self.product, 4.0, expected_date)),
+                (0, 0, self._prepare_order_line_vals(self.product, 4.0, expected_date)),
+            ],
+        }
+        order = self.request_order.with_user(self.stock_request_user).create(vals)
+        order.with_user(self.stock_request_manager).action_confirm()
+        self.assertEqual(
+            sorted(order.stock_request_ids.mapped("state")), ["done", "open"]
+        )
+        procured = order.stock_request_ids.filtered(lambda r: r.state == "open")
+        self.assertEqual(len(procured.picking_ids), 1)
+        self.assertEqual(procured.picking_ids.location_id, self.ressuply_loc)
+
+    def test_stock_request_order_procurement_errors(self):
+        """The errors of all the requests are reported together"""
+        product_2 = self._create_product("SH2", "Sandals", False)
+        expected_date = fields.Datetime.now()
+        vals = {
+            "company_id": self.main_company.id,
+            "warehouse_id": self.warehouse.id,
+            "location_id": self.warehouse.lot_stock_id.id,
+            "expected_date": expected_date,
+            "stock_request_ids": [
+                (0, 0, self._prepare_order_line_vals(self.product, 5.0, expected_date)),
+                (0, 0, self._prepare_order_line_vals(product_2, 5.0, expected_date)),
+            ],
+        }
+        order = self.request_order.with_user(self.stock_request_user).create(vals)
+        with self.assertRaises(exceptions.UserError) as error:
+            order.with_user(self.stock_request_manager).action_confirm()
+        self.assertIn(self.product.display_name, error.exception.name)
+        self.assertIn(product_2.display_name, error.exception.name)
+
     def test_stock_request_validations_01(self):
         vals = {
             "product_id": self.product.id,
@@ -2,3 +2,4 @@ from . import stock_move
 from . import stock_quant
 from . import stock_picking_type
 from . import stock_reserve_rule
+from . import stock_location
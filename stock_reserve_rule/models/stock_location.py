@@ -0,0 +1,39 @@
+# Copyright 2026 Moduon Team S.L.
+# License AGPL-3.0 or later (http://www.gnu.org/licenses/agpl.html).
+
+from odoo import api, fields, models
+
+
+class StockLocation(models.Model):
+    _inherit = "stock.location"
+
+    reserve_rule_product_ids = fields.Many2many(
+        comodel_name="product.product",
+        compute="_compute_reserve_rule_product_ids",
+        string="Products in the location",
+        help="Products having a positive quantity directly in the location.",
+    )
+
+    @api.depends("quant_ids.product_id", "quant_ids.quantity")
+    def _compute_reserve_rule_product_ids(self):
+        # Not stored, but computed at once for all the locations being read,
+        # then kept in cache for the other moves reserved in the transaction
+        groups = (
+            self.env["stock.quant"]
+            .sudo()
+            .read_group(
+                [("location_id", "in", self.ids), ("quantity", ">", 0)],
+                ["location_id", "product_id"],
+                ["location_id", "product_id"],
+                lazy=False,
+            )
+        )
+        product_ids_per_location = {}
+        for group in groups:
+            product_ids_per_location.setdefault(group["location_id"][0], []).append(
+                group["product_id"][0]
+            )
+        for location in self:
+            location.reserve_rule_product_ids = [
+                (6, 0, product_ids_per_location.get(location.id, []))
+            ]
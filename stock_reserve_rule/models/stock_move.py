@@ -8,6 +8,71 @@ from odoo.tools.float_utils import float_compare
 class StockMove(models.Model):
     _inherit = "stock.move"
 
+    def _gather_for_removal_rules(
+        self, removal_rules, lot_id=None, package_id=None, owner_id=None, strict=False
+    ):
+        """Return the quants of the move's product for each removal rule
+
+        When the removal rules apply the same removal strategy (fifo,
+        fefo, ...) as their reservation rule's location, the quants are
+        gathered once in this location then dispatched in the removal rules
+        by keeping their order.
+
+        :return: dict {removal rule: quants}
+        """
+        self.ensure_one()
+        quant_model = self.env["stock.quant"]
+        product = self.product_id
+        gather_location = removal_rules.rule_id.location_id
+        if len(removal_rules) > 1 and len(gather_location) == 1:
+            strategies = {
+                quant_model._get_removal_strategy(product, location)
+                for location in removal_rules.location_id | gather_location
+            }
+            if len(strategies) == 1:
+                quants = quant_model._gather(
+                    product,
+                    gather_location,
+                    lot_id=lot_id,
+                    package_id=package_id,
+                    owner_id=owner_id,
+                    strict=strict,
+                )
+                return {
+                    removal_rule: quants.filtered(
+                        lambda quant, location=removal_rule.location_id: (
+                            quant.location_id.is_sublocation_of(location)
+                        )
+                    )
+                    for removal_rule in removal_rules
+                }
+        return {
+            removal_rule: quant_model._gather(
+                product,
+                removal_rule.location_id,
+                lot_id=lot_id,
+                package_id=package_id,
+                owner_id=owner_id,
+                strict=strict,
+            )
+            for removal_rule in removal_rules
+        }
+
+    def _action_assign(self):
+        rule_model = self.env["stock.reserve.rule"]
+        # The time budget of the optimal packagings is shared by all the moves
+        context = {
+            "reserve_rule_packaging_deadline": rule_model._get_packaging_deadline()
+        }
+        # Evaluate the domains of the reservation rules once for all the moves
+        matching_moves = rule_model._get_rules_matching_moves(self)
+        if matching_moves:
+            context.update(
+                reserve_rule_matching_moves=matching_moves,
+                reserve_rule_move_ids=frozenset(self.ids),
+            )
+        return super(StockMove, self.with_context(**context))._action_assign()
+
     def _update_reserved_quantity(
         self,
         need,
@@ -41,32 +106,33 @@ class StockMove(models.Model):
             if not rule._is_rule_applicable(self):
                 continue
 
-            for removal_rule in rule.rule_removal_ids:
-                # Exclude any rule which does not share the same path as the
-                # move's location. Example:
-                # Rule location: Stock
-                # Removal rule 1: Stock/Zone1
-                # Removal rule 2: Stock/Zone2
-                # If we have a stock.move with "Stock" as source location,
-                # it can use both rules.
-                # If we have a stock.move with "Stock/Zone2" as source location,
-                # it should never use "Stock/Zone1"
-                # If we have a stock.move with "Stock/Zone1/A" as source location,
-                # it should use "Stock/Zone1" rule
-                if not (
+            # Exclude any rule which does not share the same path as the
+            # move's location. Example:
+            # Rule location: Stock
+            # Removal rule 1: Stock/Zone1
+            # Removal rule 2: Stock/Zone2
+            # If we have a stock.move with "Stock" as source location,
+            # it can use both rules.
+            # If we have a stock.move with "Stock/Zone2" as source location,
+            # it should never use "Stock/Zone1"
+            # If we have a stock.move with "Stock/Zone1/A" as source location,
+            # it should use "Stock/Zone1" rule
+            removal_rules = rule.rule_removal_ids.filtered(
+                lambda removal_rule: (
                     removal_rule.location_id.is_sublocation_of(location_id)
                     or location_id.is_sublocation_of(removal_rule.location_id)
-                ):
-                    continue
-
-                quants = self.env["stock.quant"]._gather(
-                    self.product_id,
-                    removal_rule.location_id,
-                    lot_id=lot_id,
-                    package_id=forced_package_id,
-                    owner_id=owner_id,
-                    strict=strict,
                 )
+            )
+            quants_per_removal_rule = self._gather_for_removal_rules(
+                removal_rules,
+                lot_id=lot_id,
+                package_id=forced_package_id,
+                owner_id=owner_id,
+                strict=strict,
+            )
+
+            for removal_rule in removal_rules:
+                quants = quants_per_removal_rule[removal_rule]
 
                 # get quants allowed by the rule
                 rule_quants = removal_rule._filter_quants(self, quants)
@@ -1,15 +1,25 @@
 # Copyright 2019 Camptocamp SA
 # License AGPL-3.0 or later (http://www.gnu.org/licenses/agpl.html).
 import logging
+import math
+import time
 
-from odoo import _, api, fields, models
+from odoo import _, api, fields, models, tools
 from odoo.exceptions import ValidationError
 from odoo.osv import expression
-from odoo.tools.float_utils import float_compare
+from odoo.tools.float_utils import float_compare, float_round
 from odoo.tools.safe_eval import safe_eval
 
 _logger = logging.getLogger(__name__)
 
+# Maximum time, in seconds, spent to find the optimal packagings to take for
+# the moves of a reservation before falling back on the 'Full Packaging'
+# strategy
+PACKAGING_OPTIMAL_TIME_BUDGET = 0.5
+# Largest need, in units of the greatest common divisor of the packagings,
+# for which the optimal packagings are searched
+PACKAGING_OPTIMAL_MAX_UNITS = 100000
+
 
 def _default_sequence(record):
     maxrule = record.search([], order="sequence desc", limit=1)
@@ -19,6 +29,77 @@ def _default_sequence(record):
         return 0
 
 
+def _fewest_packagings(pack_units, max_units, deadline):
+    """Return the fewest packagings needed to make each number of units
+
+    :param pack_units: number of units of each packaging
+    :param max_units: the largest number of units to compute
+    :param deadline: value of time.monotonic() after which the search stops
+    :return: list indexed by number of units, None when it cannot be made, or
+             None when the deadline is exceeded
+    """
+    packs_for_units = [0] + [None] * max_units
+    for units in range(1, max_units + 1):
+        if not units % 1000 and time.monotonic() > deadline:
+            return None
+        candidates = [
+            packs_for_units[units - pack]
+            for pack in pack_units
+            if pack <= units and packs_for_units[units - pack] is not None
+        ]
+        if candidates:
+            packs_for_units[units] = min(candidates) + 1
+    return packs_for_units
+
+
+def _optimal_takes(bins_units, packs_for_units, need_units, deadline):
+    """Return the units to take in each bin
+
+    Maximize the units taken without exceeding the need, then minimize the
+    number of packagings, the number of bins and favor the first bins.
+
+    :param bins_units: units available in each bin
+    :param packs_for_units: result of _fewest_packagings
+    :param need_units: the units needed
+    :param deadline: value of time.monotonic() after which the search stops
+    :return: list of the units to take in each bin or None when the deadline
+             is exceeded
+    """
+    # best cost (packagings, bins, bins index) per units taken
+    best = {0: (0, 0, 0)}
+    choices = []
+    for index, bin_units in enumerate(bins_units):
+        options = [
+            units
+            for units in range(1, bin_units + 1)
+            if packs_for_units[units] is not None
+        ]
+        new_best = dict(best)
+        choice = {}
+        for total, (packs, bins, indexes) in best.items():
+            if time.monotonic() > deadline:
+                return None
+            for units in options:
+                new_total = total + units
+                if new_total > need_units:
+                    break
+                cost = (packs + packs_for_units[units], bins + 1, indexes + index)
+                if new_total not in new_best or cost < new_best[new_total]:
+                    new_best[new_total] = cost
+                    choice[new_total] = units
+        best = new_best
+        choices.append(choice)
+
+    total = max(best)
+    takes = [0] * len(bins_units)
+    for index in reversed(range(len(bins_units))):
+        units = choices[index].get(total)
+        if units:
+            takes[index] = units
+            total -= units
+    return takes
+
+
 class StockReserveRule(models.Model):
     """Rules for stock reservations
 
@@ -63,8 +144,89 @@ class StockReserveRule(models.Model):
         "rule is applicable or not.",
     )
 
+    @api.model_create_multi
+    def create(self, vals_list):
+        # The rules are indexed, see _get_rules_index()
+        self.clear_caches()
+        return super().create(vals_list)
+
+    def write(self, vals):
+        self.clear_caches()
+        return super().write(vals)
+
+    def unlink(self):
+        self.clear_caches()
+        return super().unlink()
+
+    @api.model
+    @tools.ormcache("self.env.su", "tuple(self.env.companies.ids)")
+    def _get_rules_index(self):
+        """Return the active rules as a tuple of (rule id, location id, domain)
+
+        The rules are sorted by priority and their domain is already parsed.
+        The index is cached until a rule is modified.
+        """
+        rules = self.with_context(active_test=True).search([])
+        return tuple(
+            (rule.id, rule.location_id.id, safe_eval(rule.rule_domain or "[]") or [])
+            for rule in rules
+        )
+
+    def _get_rule_domain(self):
+        self.ensure_one()
+        for rule_id, __, domain in self._get_rules_index():
+            if rule_id == self.id:
+                return domain
+        return safe_eval(self.rule_domain or "[]") or []
+
     def _rules_for_location(self, location):
-        return self.search([("location_id", "parent_of", location.id)])
+        index = self._get_rules_index()
+        # parent_path is read for all the locations of the rules at once
+        rule_locations = self.env["stock.location"].browse(
+            {location_id for __, location_id, __ in index}
+        )
+        parent_paths = {loc.id: loc.parent_path for loc in rule_locations}
+        return self.browse(
+            [
+                rule_id
+                for rule_id, location_id, __ in index
+                if location.parent_path.startswith(parent_paths[location_id])
+            ]
+        )
+
+    @api.model
+    def _get_packaging_deadline(self):
+        """Return the time after which the search of the optimal packagings
+        falls back on the 'Full Packaging' strategy
+        """
+        return time.monotonic() + PACKAGING_OPTIMAL_TIME_BUDGET
+
+    @api.model
+    def _get_rules_matching_moves(self, moves):
+        """Evaluate the domain of the rules on all the moves at once
+
+        Only the rules which may be used by the moves, the ones of a parent
+        location of the moves, are evaluated.
+
+        :return: frozendict {rule id: frozenset of matching move ids}
+        """
+        res = {}
+        for location in moves.location_id:
+            for rule in self._rules_for_location(location):
+                domain = rule._get_rule_domain()
+                if rule.id in res or not domain:
+                    continue
+                res[rule.id] = frozenset(
+                    rule._eval_rule_domain_moves(moves, domain).ids
+                )
+        return tools.frozendict(res)
+
+    def _eval_rule_domain_moves(self, moves, domain):
+        """Return the moves matching the domain, counterpart of
+        _eval_rule_domain() for many moves
+        """
+        move_domain = [("id", "in", moves.ids)]
+        return self.env["stock.move"].search(expression.AND([move_domain, domain]))
 
     def _eval_rule_domain(self, move, domain):
         move_domain = [("id", "=", move.id)]
@@ -86,7 +248,13 @@ class StockReserveRule(models.Model):
             picking_type = move.picking_type_id or move.picking_id.picking_type_id
             if picking_type not in self.picking_type_ids:
                 return False
-        domain = safe_eval(self.rule_domain) or []
+        # The domains may have been evaluated for all the moves being
+        # assigned, see StockMove._action_assign()
+        matching_moves = self.env.context.get("reserve_rule_matching_moves") or {}
+        evaluated_move_ids = self.env.context.get("reserve_rule_move_ids") or ()
+        if self.id in matching_moves and move.id in evaluated_move_ids:
+            return move.id in matching_moves[self.id]
+        domain = self._get_rule_domain()
         if domain:
             return self._eval_rule_domain(move, domain)
         return True
@@ -134,6 +302,7 @@ class StockReserveRuleRemoval(models.Model):
             ("empty_bin", "Empty Bins"),
             ("packaging", "Full Packaging"),
             ("full_bin", "Full Bin"),
+            ("packaging_optimal", "Optimal Packaging"),
         ],
         required=True,
         default="default",
@@ -144,12 +313,16 @@ class StockReserveRuleRemoval(models.Model):
         " empty afterwards.\n"
         "Full Packaging: take goods from a location only if the location "
         "quantity matches a packaging quantity (do not open boxes).\n"
-        "Full Bin: take goods from a location if it reserves all its content",
+        "Full Bin: take goods from a location if it reserves all its content\n"
+        "Optimal Packaging: as Full Packaging, but look for the combination "
+        "of locations and packagings reserving the most with the fewest "
+        "packagings.",
     )
 
     packaging_type_ids = fields.Many2many(
         comodel_name="product.packaging.type",
-        help="Optional packaging when using 'Full Packaging'.\n"
+        help="Optional packaging when using 'Full Packaging' or "
+        "'Optimal Packaging'.\n"
         "Only the quantities matching one of the packaging are removed.\n"
         "When empty, any packaging can be removed.",
     )
@@ -227,20 +400,9 @@ class StockReserveRuleRemoval(models.Model):
         # The original ordering (fefo, fifo, ...) must be kept.
         product = fields.first(quants).product_id
         rounding = product.uom_id.rounding
-        locations_with_other_quants = [
-            group["location_id"][0]
-            for group in quants.read_group(
-                [
-                    ("location_id", "in", quants.location_id.ids),
-                    ("product_id", "not in", quants.product_id.ids),
-                    ("quantity", ">", 0),
-                ],
-                ["location_id"],
-                "location_id",
-            )
-        ]
         for location, location_quants in quants_per_bin:
-            if location.id in locations_with_other_quants:
+            if location.reserve_rule_product_ids - quants.product_id:
+                # the location holds other products
                 continue
 
             location_quantity = sum(location_quants.mapped("quantity")) - sum(
@@ -261,23 +423,9 @@ class StockReserveRuleRemoval(models.Model):
 
         product = fields.first(quants).product_id
 
-        packaging_type_filter = self.packaging_type_ids
-
         # we'll walk the packagings from largest to smallest to have the
         # largest containers as possible (1 pallet rather than 10 boxes)
-        packaging_quantities = sorted(
-            product.packaging_ids.filtered(
-                lambda packaging: (
-                    packaging.qty > 0
-                    and (
-                        packaging.packaging_type_id in packaging_type_filter
-                        if packaging_type_filter
-                        else True
-                    )
-                )
-            ).mapped("qty"),
-            reverse=True,
-        )
+        packaging_quantities = self._get_packaging_quantities(product)
 
         rounding = product.uom_id.rounding
 
@@ -299,6 +447,119 @@ class StockReserveRuleRemoval(models.Model):
                     take = (need // pack_quantity) * pack_quantity
                     need = yield location, location_quantity, take, None, None
 
+    def _get_packaging_quantities(self, product):
+        """Return the quantities of the packagings that can be taken, from the
+        largest to the smallest
+        """
+        packaging_type_filter = self.packaging_type_ids
+        return sorted(
+            product.packaging_ids.filtered(
+                lambda packaging: (
+                    packaging.qty > 0
+                    and (
+                        packaging.packaging_type_id in packaging_type_filter
+                        if packaging_type_filter
+                        else True
+                    )
+                )
+            ).mapped("qty"),
+            reverse=True,
+        )
+
+    def _apply_strategy_packaging_optimal(self, quants):
+        need = yield
+        plan = self._solve_packaging_optimal(quants, need)
+        if plan is None:
+            # no solution found in time or need too large, use the greedy
+            # strategy
+            strategy = self._apply_strategy_packaging(quants)
+            next(strategy)
+            try:
+                while True:
+                    need = yield strategy.send(need)
+            except StopIteration:
+                return
+        product = fields.first(quants).product_id
+        rounding = product.uom_id.rounding
+        for location, location_quantity, take in plan:
+            if float_compare(need, take, precision_rounding=rounding) < 0:
+                # something else has been reserved meanwhile
+                break
+            need = yield location, location_quantity, take, None, None
+
+    def _solve_packaging_optimal(self, quants, need):
+        """Find which packagings to take in which locations
+
+        Solve a knapsack of the packagings that the locations can provide,
+        maximizing the quantity taken without exceeding the need, then
+        minimizing the number of packagings, the number of locations and
+        favoring the first locations (according to the default removal
+        strategy).
+
+        :return: list of (location, location quantity, quantity to take) in the
+                 order of the locations or None when no solution has been
+                 found within the time budget of the reservation or when the
+                 need exceeds PACKAGING_OPTIMAL_MAX_UNITS
+        """
+        product = fields.first(quants).product_id
+        rounding = product.uom_id.rounding
+        packaging_quantities = self._get_packaging_quantities(product)
+        if not packaging_quantities:
+            return []
+
+        # Work on integers, in units of the greatest common divisor of the
+        # packaging quantities
+        def to_units(qty):
+            return int(float_round(qty / rounding, precision_digits=0))
+
+        unit = 0
+        for pack_quantity in packaging_quantities:
+            unit = math.gcd(unit, to_units(pack_quantity))
+        pack_units = [
+            to_units(pack_quantity) // unit for pack_quantity in packaging_quantities
+        ]
+        need_units = to_units(need) // unit
+
+        bins = []
+        for location, location_quants in quants._group_by_location():
+            location_quantity = sum(location_quants.mapped("quantity")) - sum(
+                location_quants.mapped("reserved_quantity")
+            )
+            location_units = min(to_units(location_quantity) // unit, need_units)
+            if location_units > 0:
+                bins.append((location, location_quantity, location_units))
+        if not bins or not need_units:
+            return []
+        if need_units > PACKAGING_OPTIMAL_MAX_UNITS:
+            return None
+
+        deadline = self.env.context.get("reserve_rule_packaging_deadline")
+        if deadline is None:
+            deadline = self.env["stock.reserve.rule"]._get_packaging_deadline()
+        packs_for_units = _fewest_packagings(pack_units, need_units, deadline)
+        if packs_for_units is None:
+            return None
+
+        takes = _optimal_takes(
+            [location_units for __, __, location_units in bins],
+            packs_for_units,
+            need_units,
+            deadline,
+        )
+        if takes is None:
+            return None
+        return [
+            (
+                location,
+                location_quantity,
+                float_round(
+                    takes[index] * unit * rounding, precision_rounding=rounding
+                ),
+            )
+            for index, (location, location_quantity, __) in enumerate(bins)
+            if takes[index]
+        ]
+
     def _apply_strategy_full_bin(self, quants):
         need = yield
         # Only location with nothing reserved can be fully emptied
@@ -310,20 +571,9 @@ class StockReserveRuleRemoval(models.Model):
         # The original ordering (fefo, fifo, ...) must be kept.
         product = fields.first(quants).product_id
         rounding = product.uom_id.rounding
-        locations_with_other_quants = [
-            group["location_id"][0]
-            for group in quants.read_group(
-                [
-                    ("location_id", "in", quants.location_id.ids),
-                    ("product_id", "not in", quants.product_id.ids),
-                    ("quantity", ">", 0),
-                ],
-                ["location_id"],
-                "location_id",
-            )
-        ]
         for location, location_quants in quants_per_bin:
-            if location.id in locations_with_other_quants:
+            if location.reserve_rule_product_ids - quants.product_id:
+                # the location holds other products
                 continue
 
             location_quantity = sum(location_quants.mapped("quantity"))
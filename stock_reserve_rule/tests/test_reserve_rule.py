@@ -1,9 +1,13 @@
 # Copyright 2019 Camptocamp (https://www.camptocamp.com)
 # Copyright 2019-2021 Jacques-Etienne Baudoux (BCIM) <je@bcim.be>
 
+from unittest import mock
+
 from odoo import exceptions, fields
 from odoo.tests import common
 
+from odoo.addons.stock_reserve_rule.models import stock_reserve_rule
+
 
 class TestReserveRule(common.SavepointCase):
     @classmethod
@@ -822,3 +826,185 @@ class TestReserveRule(common.SavepointCase):
             ml, [{"location_id": self.loc_zone2_bin1.id, "product_qty": 80.0}]
         )
         self.assertEqual(move.state, "assigned")
+
+    def test_rules_index(self):
+        rule_model = self.env["stock.reserve.rule"]
+        rules = rule_model._rules_for_location(self.loc_zone1_bin1)
+        self._create_rule(
+            {"rule_domain": [("product_id", "=", self.product1.id)]},
+            [{"location_id": self.loc_zone1.id}],
+        )
+        new_rule = rule_model.search([], order="id desc", limit=1)
+        # the index follows the modifications of the rules
+        self.assertEqual(
+            rule_model._rules_for_location(self.loc_zone1_bin1), rules | new_rule
+        )
+        self.assertNotIn(new_rule, rule_model._rules_for_location(self.customer_loc))
+        new_rule.location_id = self.loc_zone2
+        self.assertNotIn(new_rule, rule_model._rules_for_location(self.loc_zone1_bin1))
+        self.assertIn(new_rule, rule_model._rules_for_location(self.loc_zone2_bin1))
+
+        # the domains are evaluated for all the moves at once
+        picking = self._create_picking(
+            self.wh,
+            [(self.product1, 10), (self.product2, 10)],
+            location_src_id=self.loc_zone2.id,
+        )
+        matching = rule_model._get_rules_matching_moves(picking.move_lines)
+        move1 = picking.move_lines.filtered(lambda m: m.product_id == self.product1)
+        self.assertEqual(matching[new_rule.id], frozenset(move1.ids))
+
+    def test_gather_for_removal_rules(self):
+        self._update_qty_in_location(self.loc_zone1_bin1, self.product1, 10)
+        self._update_qty_in_location(self.loc_zone2_bin1, self.product1, 20)
+        self._update_qty_in_location(self.loc_zone2_bin1, self.product2, 5)
+        self._create_rule(
+            {},
+            [
+                {"location_id": self.loc_zone1.id, "sequence": 1},
+                {"location_id": self.loc_zone2.id, "sequence": 2},
+            ],
+        )
+        rule = self.env["stock.reserve.rule"].search([], order="id desc", limit=1)
+        picking = self._create_picking(self.wh, [(self.product1, 30)])
+        quants_per_rule = picking.move_lines._gather_for_removal_rules(
+            rule.rule_removal_ids
+        )
+        zone1_rule, zone2_rule = rule.rule_removal_ids
+        self.assertEqual(quants_per_rule[zone1_rule].location_id, self.loc_zone1_bin1)
+        self.assertEqual(quants_per_rule[zone2_rule].location_id, self.loc_zone2_bin1)
+        self.assertEqual(
+            self.loc_zone2_bin1.reserve_rule_product_ids, self.product1 | self.product2
+        )
+        self.assertEqual(self.loc_zone1_bin1.reserve_rule_product_ids, self.product1)
+
+    def test_rule_packaging_optimal(self):
+        self._setup_packagings(
+            self.product1,
+            [
+                ("Transport Box", 50, self.transport_box),
+                ("Retail Box", 30, self.retail_box),
+            ],
+        )
+        self._update_qty_in_location(self.loc_zone1_bin1, self.product1, 30)
+        self._update_qty_in_location(self.loc_zone1_bin2, self.product1, 50)
+        self._update_qty_in_location(self.loc_zone2_bin1, self.product1, 50)
+        self._create_rule(
+            {},
+            [
+                {
+                    "location_id": self.wh.lot_stock_id.id,
+                    "removal_strategy": "packaging_optimal",
+                }
+            ],
+        )
+        # The greedy packaging strategy would take 30 in zone1/bin1, then 50
+        # in zone1/bin2 and could not take the remaining 20 in full boxes
+        picking = self._create_picking(self.wh, [(self.product1, 100)])
+        picking.action_assign()
+        self.assertRecordValues(
+            picking.move_lines.move_line_ids,
+            [
+                {"location_id": self.loc_zone1_bin2.id, "product_qty": 50.0},
+                {"location_id": self.loc_zone2_bin1.id, "product_qty": 50.0},
+            ],
+        )
+        self.assertEqual(picking.move_lines.state, "assigned")
+
+    def test_rule_packaging_optimal_budget_per_reservation(self):
+        for product in (self.product1, self.product2):
+            self._setup_packagings(
+                product,
+                [
+                    ("Transport Box", 50, self.transport_box),
+                    ("Retail Box", 30, self.retail_box),
+                ],
+            )
+            self._update_qty_in_location(self.loc_zone1_bin1, product, 30)
+            self._update_qty_in_location(self.loc_zone1_bin2, product, 50)
+            self._update_qty_in_location(self.loc_zone2_bin1, product, 50)
+        # no domain on the rule
+        self._create_rule(
+            {},
+            [
+                {
+                    "location_id": self.wh.lot_stock_id.id,
+                    "removal_strategy": "packaging_optimal",
+                }
+            ],
+        )
+        picking = self._create_picking(
+            self.wh, [(self.product1, 100), (self.product2, 100)]
+        )
+        # The budget of the reservation is over before the first move: both
+        # moves use the greedy packaging strategy
+        with mock.patch.object(
+            type(self.env["stock.reserve.rule"]),
+            "_get_packaging_deadline",
+            return_value=0,
+        ) as get_deadline:
+            picking.action_assign()
+        get_deadline.assert_called_once()
+        for move in picking.move_lines:
+            self.assertRecordValues(
+                move.move_line_ids,
+                [
+                    {"location_id": self.loc_zone1_bin1.id, "product_qty": 30.0},
+                    {"location_id": self.loc_zone1_bin2.id, "product_qty": 50.0},
+                ],
+            )
+
+    def test_rule_packaging_optimal_fallback(self):
+        self._setup_packagings(
+            self.product1,
+            [
+                ("Transport Box", 50, self.transport_box),
+                ("Retail Box", 30, self.retail_box),
+            ],
+        )
+        self._update_qty_in_location(self.loc_zone1_bin1, self.product1, 30)
+        self._update_qty_in_location(self.loc_zone1_bin2, self.product1, 50)
+        self._update_qty_in_location(self.loc_zone2_bin1, self.product1, 50)
+        self._create_rule(
+            {},
+            [
+                {
+                    "location_id": self.wh.lot_stock_id.id,
+                    "removal_strategy": "packaging_optimal",
+                }
+            ],
+        )
+        picking = self._create_picking(self.wh, [(self.product1, 100)])
+        # Out of time: the greedy packaging strategy is used
+        with mock.patch.object(stock_reserve_rule, "PACKAGING_OPTIMAL_TIME_BUDGET", -1):
+            picking.action_assign()
+        self.assertRecordValues(
+            picking.move_lines.move_line_ids,
+            [
+                {"location_id": self.loc_zone1_bin1.id, "product_qty": 30.0},
+                {"location_id": self.loc_zone1_bin2.id, "product_qty": 50.0},
+            ],
+        )
+        self.assertEqual(picking.move_lines.state, "partially_available")
+        picking.do_unreserve()
+        # Too large to be solved: the greedy packaging strategy is used
+        with mock.patch.object(stock_reserve_rule, "PACKAGING_OPTIMAL_MAX_UNITS", 5):
+            picking.action_assign()
+        self.assertRecordValues(
+            picking.move_lines.move_line_ids,
+            [
+                {"location_id": self.loc_zone1_bin1.id, "product_qty": 30.0},
+                {"location_id": self.loc_zone1_bin2.id, "product_qty": 50.0},
+            ],
+        )
+        picking.do_unreserve()
+        # Within the budget: the optimal packagings are taken
+        picking.action_assign()
+        self.assertRecordValues(
+            picking.move_lines.move_line_ids,
+            [
+                {"location_id": self.loc_zone1_bin2.id, "product_qty": 50.0},
+                {"location_id": self.loc_zone2_bin1.id, "product_qty": 50.0},
+            ],
+        )
+        self.assertEqual(picking.move_lines.state, "assigned")
@@ -19,5 +19,19 @@ class VerticalLiftController(http.Controller):
             _logger.error("secret mismatch: %r", secret)
             return Unauthorized()
 
+    @http.route(["/vertical-lift/batch"], type="http", auth="public", csrf=False)
+    def vertical_lift_batch(self, secret, **kwargs):
+        """Record all the ``answer`` parameters in one transaction
+
+        Returns the ids of the recorded commands, one per line.
+        """
+        if secret == self._get_env_secret():
+            answers = request.httprequest.form.getlist("answer")
+            recs = request.env["vertical.lift.command"].sudo().record_answers(answers)
+            return "\n".join(str(rec_id) for rec_id in recs.ids)
+        else:
+            _logger.error("secret mismatch: %r", secret)
+            return Unauthorized()
+
     def _get_env_secret(self):
         return os.environ.get("VERTICAL_LIFT_SECRET", "")
@@ -36,6 +36,7 @@ class StockLocation(models.Model):
         comodel_name="vertical.lift.shuttle",
         compute="_compute_vertical_lift_shuttle_id",
         store=True,
+        index=True,
     )
 
     @api.depends(
@@ -33,6 +33,36 @@ class VerticalLiftCommand(models.Model):
         record.shuttle_id._hardware_response_callback(record)
         return record
 
+    @api.model
+    def record_answers(self, answers):
+        """Record many answers at once
+
+        Answers that do not match any command, or whose processing fails,
+        are logged and skipped without preventing the others to be recorded.
+
+        :return: the commands whose answer has been recorded
+        """
+        keys = [self._get_key(answer) for answer in answers]
+        commands = {}
+        for command in self.search([("name", "in", keys)]):
+            # same as the limit=1 of record_answer
+            commands.setdefault(command.name, command)
+        records = self.browse()
+        for key, answer in zip(keys, answers):
+            record = commands.get(key)
+            if not record:
+                _logger.error("unable to match answer to a command: %r", answer)
+                continue
+            try:
+                with self.env.cr.savepoint():
+                    record.answer = answer
+                    record.shuttle_id._hardware_response_callback(record)
+            except Exception:
+                _logger.exception("unable to record answer %r", answer)
+                continue
+            records |= record
+        return records
+
     def _get_key(self, answer):
         key = answer.split("|")[1:2]
         if key:
@@ -2,9 +2,10 @@
 # License AGPL-3.0 or later (http://www.gnu.org/licenses/agpl).
 
 import logging
-from collections import namedtuple
+from collections import defaultdict, namedtuple
 
 from odoo import _, api, fields, models
+from odoo.osv.expression import is_leaf
 
 from odoo.addons.base_sparse_field.models.fields import Serialized
 
@@ -247,6 +248,55 @@ class VerticalLiftOperationBase(models.AbstractModel):
         self.ensure_one()
         # to implement in sub-classes
 
+    def _barcode_lookup_domains(self, barcode):
+        """Domains of the records matching a scanned barcode, per model"""
+        return {
+            "stock.quant.package": [("name", "=", barcode)],
+            "stock.production.lot": [("name", "=", barcode)],
+            "product.product": [("barcode", "=", barcode)],
+            "product.packaging": [
+                ("product_id", "!=", False),
+                ("barcode", "=", barcode),
+            ],
+            "stock.location": [("barcode", "=", barcode)],
+        }
+
+    def _resolve_barcode(self, barcode, model_names):
+        """Find the records matching a scanned barcode in a single query
+
+        :param model_names: models to look into, among the ones of
+                            ``_barcode_lookup_domains()``
+        :return: dict {model name: recordset}, with an empty recordset for
+                 the models without match
+        """
+        domains = self._barcode_lookup_domains(barcode)
+        selects = []
+        params = []
+        for model_name in model_names:
+            model = self.env[model_name]
+            domain = domains[model_name]
+            model.flush([leaf[0] for leaf in domain if is_leaf(leaf)])
+            query = model._where_calc(domain)
+            model._apply_ir_rules(query, "read")
+            from_clause, where_clause, where_params = query.get_sql()
+            selects.append(
+                'SELECT %s, "{table}".id FROM {from_clause} WHERE {where_clause}'.format(
+                    table=model._table,
+                    from_clause=from_clause,
+                    where_clause=where_clause or "TRUE",
+                )
+            )
+            params += [model_name] + where_params
+        # pylint: disable=sql-injection
+        self.env.cr.execute(" UNION ALL ".join(selects), params)
+        record_ids = defaultdict(list)
+        for model_name, record_id in self.env.cr.fetchall():
+            record_ids[model_name].append(record_id)
+        return {
+            model_name: self.env[model_name].browse(record_ids[model_name])
+            for model_name in model_names
+        }
+
     def on_screen_open(self):
         """Called when the screen is opened"""
         self.reset_steps()
@@ -350,9 +400,24 @@ class VerticalLiftOperationBase(models.AbstractModel):
         bus_message = {
             "action": "refresh",
             "params": self._get_user_notification_params(),
+            "counters": self._get_notification_counters(),
         }
         self.env["bus.bus"].sendone(channel, bus_message)
 
+    def _get_notification_counters(self):
+        """Number of operations sent with the refresh notifications
+
+        The screens of the other shuttles only read their counters again
+        when they differ from these values.
+
+        :return: dict {"number_of_ops": {shuttle id: count},
+                       "number_of_ops_all": count}
+        """
+        return {
+            "number_of_ops": {self.shuttle_id.id: self.number_of_ops},
+            "number_of_ops_all": self.number_of_ops_all,
+        }
+
     def _get_user_notification_params(self):
         return {
             "model": self._name,
@@ -374,6 +439,9 @@ class VerticalLiftOperationTransfer(models.AbstractModel):
     current_move_line_id = fields.Many2one(
         comodel_name="stock.move.line", readonly=True
     )
+    # both counters are computed with a single query for all the shuttles
+    number_of_ops = fields.Integer(compute="_compute_number_of_ops_by_shuttle")
+    number_of_ops_all = fields.Integer(compute="_compute_number_of_ops_by_shuttle")
 
     tray_location_id = fields.Many2one(
         comodel_name="stock.location",
@@ -439,14 +507,12 @@ class VerticalLiftOperationTransfer(models.AbstractModel):
             record.product_packagings = content
 
     @api.depends()
-    def _compute_number_of_ops(self):
+    def _compute_number_of_ops_by_shuttle(self):
+        counts = self._get_number_of_ops_by_shuttle()
+        number_of_ops_all = sum(counts.values())
         for record in self:
-            record.number_of_ops = record.count_move_lines_to_do()
-
-    @api.depends()
-    def _compute_number_of_ops_all(self):
-        for record in self:
-            record.number_of_ops_all = record.count_move_lines_to_do_all()
+            record.number_of_ops = counts.get(record.shuttle_id.id, 0)
+            record.number_of_ops_all = number_of_ops_all
 
     @api.depends("tray_location_id", "current_move_line_id.product_id")
     def _compute_tray_qty(self):
@@ -474,11 +540,62 @@ class VerticalLiftOperationTransfer(models.AbstractModel):
             record.tray_y = location.posy
             record.tray_matrix = location.tray_matrix
 
+    def _get_tray_position(self, tray):
+        """Position of the tray in the shuttle, to minimize carrier travel"""
+        return tray.posz or 0
+
+    def _get_move_line_location_field(self):
+        """Field of the move lines with the location in the shuttle"""
+        return "location_id"
+
+    def _get_number_of_ops_by_shuttle(self):
+        """Count the move lines to process of all the shuttles at once
+
+        The lines of _domain_move_lines_to_do_all() are counted by shuttle of
+        their location, overrides of _domain_move_lines_to_do() are not
+        applied.
+
+        :return: dict {shuttle id: count}, the lines to process outside of
+                 any shuttle are counted with the False key
+        """
+        location_field = self._get_move_line_location_field()
+        groups = self.env["stock.move.line"].read_group(
+            self._domain_move_lines_to_do_all(),
+            [location_field],
+            [location_field],
+            orderby=location_field,
+        )
+        locations = self.env["stock.location"].browse(
+            [group[location_field][0] for group in groups]
+        )
+        counts = defaultdict(int)
+        for location, group in zip(locations, groups):
+            shuttle_id = location.vertical_lift_shuttle_id.id
+            counts[shuttle_id] += group["{}_count".format(location_field)]
+        return dict(counts)
+
+    def _get_notification_counters(self):
+        counts = self._get_number_of_ops_by_shuttle()
+        return {
+            "number_of_ops": {
+                shuttle_id: count for shuttle_id, count in counts.items() if shuttle_id
+            },
+            "number_of_ops_all": sum(counts.values()),
+        }
+
     def _domain_move_lines_to_do(self):
+        """Domain of the move lines to process in the shuttle
+
+        The number_of_ops field does not use this domain: it counts the lines
+        of _domain_move_lines_to_do_all() in the locations of the shuttle, for
+        all the shuttles at once. An override restricting the lines must
+        restrict _domain_move_lines_to_do_all() the same way.
+        """
         # to implement in sub-classes
         return [("id", "=", 0)]
 
     def _domain_move_lines_to_do_all(self):
+        """Domain of the move lines to process in all the shuttles"""
         # to implement in sub-classes
         return [("id", "=", 0)]
 
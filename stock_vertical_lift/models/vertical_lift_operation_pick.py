@@ -1,9 +1,12 @@
 # Copyright 2019 Camptocamp SA
 # License AGPL-3.0 or later (http://www.gnu.org/licenses/agpl).
 
-from itertools import cycle
+from collections import OrderedDict
 
 from odoo import _, models
+from odoo.osv import expression
+
+from odoo.addons.base_sparse_field.models.fields import Serialized
 
 
 class VerticalLiftOperationPick(models.Model):
@@ -13,6 +16,10 @@ class VerticalLiftOperationPick(models.Model):
 
     _initial_state = "noop"
 
+    # ordered ids of the move lines of the current wave, in a
+    # {"move_line_ids": [...]} dict
+    pick_queue = Serialized(readonly=True)
+
     def _selection_states(self):
         return [
             ("noop", "No operations"),
@@ -56,7 +63,9 @@ class VerticalLiftOperationPick(models.Model):
         if not self.current_move_line_id or self.current_move_line_id.state == "done":
             return
         if self.step() == "scan_destination":
-            location = self.env["stock.location"].search([("barcode", "=", barcode)])
+            location = self._resolve_barcode(barcode, ("stock.location",))[
+                "stock.location"
+            ]
             if location:
                 self.location_dest_id = location
                 self.next_step()
@@ -86,22 +95,171 @@ class VerticalLiftOperationPick(models.Model):
     def fetch_tray(self):
         self.current_move_line_id.fetch_vertical_lift_tray_source()
 
+    def on_screen_open(self):
+        # start a new wave
+        self.pick_queue = {}
+        return super().on_screen_open()
+
+    def _pick_queue_ids(self):
+        return (self.pick_queue or {}).get("move_line_ids", [])
+
+    def _pick_queue_tray(self, move_line):
+        """Tray from which the move line is picked"""
+        location = move_line.location_id
+        if location.vertical_lift_kind == "cell":
+            return location.location_id
+        return location
+
+    def _sequence_pick_queue_trays(self, trays, start_tray):
+        """Order the trays to visit them in a single sweep of the carrier
+
+        The open tray (if any) comes first, then the carrier goes first
+        towards the nearest end of the trays to visit, then to the other
+        end.
+        """
+        positions = {tray: self._get_tray_position(tray) for tray in trays}
+        if not positions:
+            return []
+        start = positions.get(start_tray, min(positions.values()))
+        ordered = sorted(trays, key=lambda tray: (positions[tray], tray.id))
+        at_start = [tray for tray in ordered if positions[tray] == start]
+        below = [tray for tray in reversed(ordered) if positions[tray] < start]
+        above = [tray for tray in ordered if positions[tray] > start]
+        lowest = positions[ordered[0]]
+        highest = positions[ordered[-1]]
+        if start - lowest <= highest - start:
+            return at_start + below + above
+        return at_start + above + below
+
+    def _sort_pick_queue(self, move_lines):
+        """Return the ids of the move lines in the order to pick them
+
+        The lines are grouped by tray so each tray is fetched once per wave.
+        Skipped lines stay at the end of the queue. Within a tray, the lines
+        keep the order of ``move_lines``.
+        """
+        start_tray = self._pick_queue_tray(self.current_move_line_id)
+        res = []
+        for skipped in (False, True):
+            lines_by_tray = OrderedDict()
+            for line in move_lines:
+                if line.vertical_lift_skipped == skipped:
+                    tray = self._pick_queue_tray(line)
+                    lines_by_tray.setdefault(tray, []).append(line.id)
+            for tray in self._sequence_pick_queue_trays(
+                list(lines_by_tray), start_tray
+            ):
+                res += lines_by_tray[tray]
+        return res
+
+    def _pick_queue_add(self, move_lines):
+        """Insert new move lines in the queue of the current wave
+
+        A line is added after the lines of its tray when the tray has not
+        been visited yet, at the end of the queue otherwise.
+        """
+        queue = self._pick_queue_ids()
+        if not queue:
+            # the queue is built with all the lines at the next step
+            return
+        queued_lines = self.env["stock.move.line"].browse(queue).exists()
+        trays = {line.id: self._pick_queue_tray(line) for line in queued_lines}
+        current_id = self.current_move_line_id.id
+        start = queue.index(current_id) if current_id in queue else 0
+        for line in move_lines:
+            if line.id in trays:
+                continue
+            tray = trays[line.id] = self._pick_queue_tray(line)
+            index = len(queue)
+            for position in range(len(queue) - 1, start - 1, -1):
+                if trays.get(queue[position]) == tray:
+                    index = position + 1
+                    break
+            queue.insert(index, line.id)
+        self.pick_queue = {"move_line_ids": queue}
+
+    def _pick_queue_filter_todo(self, move_line_ids):
+        move_lines = self.env["stock.move.line"].browse(move_line_ids).exists()
+        return move_lines.filtered(
+            lambda line: line.state in ("assigned", "partially_available")
+            and line.location_id.vertical_lift_shuttle_id == self.shuttle_id
+        ).ids
+
+    def _search_move_lines_to_do(self, order, after_id=0):
+        """Search the lines to do, only the ones created after ``after_id``
+        when given
+        """
+        domain = self._domain_move_lines_to_do()
+        if after_id:
+            domain = expression.AND([domain, [("id", ">", after_id)]])
+        return self.env["stock.move.line"].search(domain, order=order)
+
     def _get_next_move_line(self, order):
-        def get_next(move_lines, current_move_line):
+        queue = self._pick_queue_ids()
+        if queue:
+            # the lines reserved since the start of the wave join it
+            new_lines = self._search_move_lines_to_do(order, after_id=max(queue))
+            if new_lines:
+                self._pick_queue_add(new_lines)
+                queue = self._pick_queue_ids()
+        todo_ids = set(self._pick_queue_filter_todo(queue))
+        current = self.current_move_line_id
+        next_ids = []
+        if current.id in queue:
+            index = queue.index(current.id)
+            next_ids = [id_ for id_ in queue[index + 1 :] if id_ in todo_ids]
+            queue = [id_ for id_ in queue if id_ in todo_ids]
+            if current.id in todo_ids and current.vertical_lift_skipped:
+                # skipped lines are processed after the others
+                queue.remove(current.id)
+                queue.append(current.id)
+        else:
+            queue = [id_ for id_ in queue if id_ in todo_ids]
+            next_ids = queue
+        if not next_ids:
+            # the wave is over, start a new one with all the lines to do
+            queue = self._sort_pick_queue(self._search_move_lines_to_do(order))
+            next_ids = [id_ for id_ in queue if id_ != current.id] or queue
+        self.pick_queue = {"move_line_ids": queue}
+        return self.env["stock.move.line"].browse(next_ids[:1])
+
+    def _count_tray_fetches(self, move_line_ids):
+        """Number of trays fetched to pick the lines in this order"""
+        trays = [
+            self._pick_queue_tray(line)
+            for line in self.env["stock.move.line"].browse(move_line_ids)
+        ]
+        return sum(1 for prev, tray in zip([None] + trays, trays) if prev != tray)
+
+    def _simulate_pick_wave(self):
+        """Compare the tray fetches of a wave with the order of the move lines
+
+        Nothing is fetched nor modified, e.g. from a shell::
+
+            env["vertical.lift.operation.pick"].search([])._simulate_pick_wave()
+
+        :return: dict {shuttle name: {"lines": number of lines to pick,
+                 "queue": tray fetches per 100 lines with the pick queue,
+                 "move_lines": tray fetches per 100 lines in the order of the
+                 move lines}}
+        """
+        res = {}
+        for record in self:
+            order = "vertical_lift_skipped"
+            if record._order:
+                order += "," + record._order
+            move_lines = record._search_move_lines_to_do(order)
             if not move_lines:
-                return False
-            move_lines_cycle = cycle(move_lines)
-            if not current_move_line or current_move_line not in move_lines:
-                return next(move_lines_cycle)
-            # Point to current_move_line and then return the next
-            while next(move_lines_cycle) != current_move_line:
                 continue
-            return next(move_lines_cycle)
-
-        move_lines = self.env["stock.move.line"].search(
-            self._domain_move_lines_to_do(), order=order
-        )
-        return get_next(move_lines, self.current_move_line_id)
+            queue = record._sort_pick_queue(move_lines)
+            queue_fetches = record._count_tray_fetches(queue)
+            move_lines_fetches = record._count_tray_fetches(move_lines.ids)
+            res[record.shuttle_id.name] = {
+                "lines": len(move_lines),
+                "queue": queue_fetches * 100 / len(move_lines),
+                "move_lines": move_lines_fetches * 100 / len(move_lines),
+            }
+        return res
 
     def select_next_move_line(self):
         self.ensure_one()
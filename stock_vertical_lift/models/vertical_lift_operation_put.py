@@ -1,7 +1,7 @@
 # Copyright 2019 Camptocamp SA
 # License AGPL-3.0 or later (http://www.gnu.org/licenses/agpl).
 
-from odoo import _, fields, models
+from odoo import _, models
 from odoo.osv.expression import AND
 
 
@@ -36,6 +36,9 @@ class VerticalLiftOperationPut(models.Model):
             ),
         )
 
+    def _get_move_line_location_field(self):
+        return "location_dest_id"
+
     def _domain_move_lines_to_do(self):
         domain = [
             ("state", "in", ("assigned", "partially_available")),
@@ -101,20 +104,26 @@ class VerticalLiftOperationPut(models.Model):
         )
 
     def _find_move_line(self, barcode):
-        package = self.env["stock.quant.package"].search([("name", "=", barcode)])
+        records = self._resolve_barcode(
+            barcode,
+            (
+                "stock.quant.package",
+                "stock.production.lot",
+                "product.product",
+                "product.packaging",
+            ),
+        )
+        package = records["stock.quant.package"]
         if package:
             return self._find_move_line_for_package(package)
 
-        lot = self.env["stock.production.lot"].search([("name", "=", barcode)])
+        lot = records["stock.production.lot"]
         if lot:
-            return self._find_move_line_for_lot(package)
+            return self._find_move_line_for_lot(lot)
 
-        product = self.env["product.product"].search([("barcode", "=", barcode)])
+        product = records["product.product"]
         if not product:
-            packaging = self.env["product.packaging"].search(
-                [("product_id", "!=", False), ("barcode", "=", barcode)]
-            )
-            product = packaging.product_id
+            product = records["product.packaging"].product_id
         if product:
             return self._find_move_line_for_product(product)
 
@@ -129,7 +138,8 @@ class VerticalLiftOperationPut(models.Model):
             [
                 self._domain_move_lines_to_do_all(),
                 [
-                    ("lot_id", "=", lot.id),
+                    # lot names are only unique per product
+                    ("lot_id", "in", lot.ids),
                     # if the lot is in a package, the package must be scanned
                     ("package_id", "=", False),
                 ],
@@ -156,21 +166,80 @@ class VerticalLiftOperationPut(models.Model):
         return barcode == tray_type.code
 
     def _assign_available_cell(self, tray_type):
-        locations = self.env["stock.location"].search(
-            [
-                ("id", "child_of", self.location_id.id),
-                ("cell_in_tray_type_id", "=", tray_type.id),
-            ]
-        )
-        location = fields.first(
-            locations.filtered(lambda loc: not loc.tray_cell_contains_stock)
-        )
+        location = self._select_free_cell(tray_type)
         if location:
             self.current_move_line_id.location_dest_id = location
             self.current_move_line_id.package_level_id.location_dest_id = location
             return True
         return False
 
+    def _domain_free_cells(self, tray_type):
+        return [
+            ("vertical_lift_shuttle_id", "=", self.shuttle_id.id),
+            ("cell_in_tray_type_id", "=", tray_type.id),
+            ("tray_cell_contains_stock", "=", False),
+        ]
+
+    def _get_first_free_cell(self, tray_type, tray=None):
+        domain = self._domain_free_cells(tray_type)
+        if tray:
+            domain = AND([domain, [("location_id", "=", tray.id)]])
+        return self.env["stock.location"].search(domain, limit=1)
+
+    def _count_free_cells_by_tray(self, tray_type):
+        """Count the free cells of the tray type per tray of the shuttle
+
+        :return: dict {tray: number of free cells}, ordered like the trays
+        """
+        location_model = self.env["stock.location"]
+        groups = location_model.read_group(
+            self._domain_free_cells(tray_type),
+            ["location_id"],
+            ["location_id"],
+            orderby="location_id",
+        )
+        return {
+            location_model.browse(group["location_id"][0]): group["location_id_count"]
+            for group in groups
+        }
+
+    def _select_free_cell(self, tray_type):
+        """Choose the cell for the put-away with the policy of the shuttle
+
+        The policies are implemented in ``_select_free_cell_<policy>``
+        methods, receiving the tray type and returning a cell or an empty
+        recordset when the shuttle has no free cell for the tray type.
+        """
+        policy = self.shuttle_id.cell_allocation_policy
+        return getattr(self, "_select_free_cell_{}".format(policy))(tray_type)
+
+    def _select_free_cell_first(self, tray_type):
+        return self._get_first_free_cell(tray_type)
+
+    def _select_free_cell_nearest_level(self, tray_type):
+        # the nearest from the open tray, or from the access point
+        location = self.current_move_line_id.location_dest_id
+        origin = 0
+        if location.vertical_lift_kind == "cell":
+            origin = self._get_tray_position(location.location_id)
+        counts = self._count_free_cells_by_tray(tray_type)
+        if not counts:
+            return self.env["stock.location"]
+        tray = min(counts, key=lambda t: abs(self._get_tray_position(t) - origin))
+        return self._get_first_free_cell(tray_type, tray)
+
+    def _select_free_cell_most_used_tray(self, tray_type):
+        counts = self._count_free_cells_by_tray(tray_type)
+        if not counts:
+            return self.env["stock.location"]
+        return self._get_first_free_cell(tray_type, min(counts, key=counts.get))
+
+    def _select_free_cell_spread(self, tray_type):
+        counts = self._count_free_cells_by_tray(tray_type)
+        if not counts:
+            return self.env["stock.location"]
+        return self._get_first_free_cell(tray_type, max(counts, key=counts.get))
+
     def fetch_tray(self):
         self.current_move_line_id.fetch_vertical_lift_tray_dest()
 
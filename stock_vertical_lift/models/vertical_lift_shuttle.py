@@ -1,14 +1,104 @@
 # Copyright 2019 Camptocamp SA
 # License AGPL-3.0 or later (http://www.gnu.org/licenses/agpl).
 import logging
+import selectors
 import socket
 import ssl
+import threading
+import time
 
 from odoo import _, fields, models
 
 _logger = logging.getLogger(__name__)
 
 
+class HardwareConnectionPool:
+    """Connections to the hardware servers kept open between messages
+
+    The connections are kept per worker, by (server, port, use_tls).
+    Connections unused for ``idle_timeout`` seconds, or closed by the
+    server, are discarded instead of being reused.
+    """
+
+    def __init__(self, max_size=4, idle_timeout=60):
+        self.max_size = max_size
+        self.idle_timeout = idle_timeout
+        self._lock = threading.Lock()
+        # {key: [(connection, last used time)]}
+        self._connections = {}
+        # {key: ssl.SSLContext}
+        self.ssl_contexts = {}
+
+    @staticmethod
+    def _is_healthy(conn):
+        """The servers never send anything on these connections: a readable
+        connection has been closed by the server (or is out of sync)
+        """
+        if isinstance(conn, ssl.SSLSocket):
+            return HardwareConnectionPool._is_tls_healthy(conn)
+        # select.select() does not support file descriptors above 1023
+        try:
+            with selectors.DefaultSelector() as selector:
+                selector.register(conn, selectors.EVENT_READ)
+                return not selector.select(timeout=0)
+        except (OSError, ValueError):
+            return False
+
+    @staticmethod
+    def _is_tls_healthy(conn):
+        """A TLS 1.3 server sends session tickets after the handshake, so the
+        socket is readable even when the connection is open: read it to know
+        if there is any data besides the TLS records
+        """
+        try:
+            timeout = conn.gettimeout()
+            conn.setblocking(False)
+            try:
+                conn.recv(1)
+            finally:
+                conn.settimeout(timeout)
+        except ssl.SSLWantReadError:
+            # nothing to read
+            return True
+        except (OSError, ValueError):
+            pass
+        # closed by the server or out of sync
+        return False
+
+    def acquire(self, key):
+        """Return an open connection for the key or None"""
+        limit = time.monotonic() - self.idle_timeout
+        while True:
+            with self._lock:
+                connections = self._connections.get(key)
+                if not connections:
+                    return None
+                conn, last_used = connections.pop()
+            if last_used >= limit and self._is_healthy(conn):
+                return conn
+            conn.close()
+
+    def release(self, key, conn):
+        """Give back a connection for a next message"""
+        with self._lock:
+            connections = self._connections.setdefault(key, [])
+            if len(connections) < self.max_size:
+                connections.append((conn, time.monotonic()))
+                return
+        conn.close()
+
+    def clear(self, key):
+        """Close the connections and forget the SSL context of the key"""
+        with self._lock:
+            connections = self._connections.pop(key, [])
+            self.ssl_contexts.pop(key, None)
+        for conn, __ in connections:
+            conn.close()
+
+
+_connection_pool = HardwareConnectionPool()
+
+
 class VerticalLiftShuttle(models.Model):
     _name = "vertical.lift.shuttle"
     _inherit = "barcodes.barcode_events_mixin"
@@ -31,6 +121,12 @@ class VerticalLiftShuttle(models.Model):
     hardware = fields.Selection(
         selection="_selection_hardware", default="simulation", required=True
     )
+    cell_allocation_policy = fields.Selection(
+        selection="_selection_cell_allocation_policy",
+        default="first",
+        required=True,
+        help="How a free cell is chosen for a put-away when a tray type is scanned.",
+    )
     server = fields.Char(help="hostname or IP address of the server")
     port = fields.Integer(
         help="network port of the server on which to send the message"
@@ -38,6 +134,14 @@ class VerticalLiftShuttle(models.Model):
     use_tls = fields.Boolean(
         help="set this if the server expects TLS wrapped communication"
     )
+    keep_connection = fields.Boolean(
+        help="keep the connection to the server open to send the next "
+        "messages, the server must accept several messages on a connection"
+    )
+    log_commands_after_send = fields.Boolean(
+        help="write the log of the commands once they have been sent, "
+        "instead of before sending them"
+    )
     command_ids = fields.One2many(
         "vertical.lift.command", "shuttle_id", string="Hardware commands"
     )
@@ -52,6 +156,14 @@ class VerticalLiftShuttle(models.Model):
     def _selection_hardware(self):
         return [("simulation", "Simulation")]
 
+    def _selection_cell_allocation_policy(self):
+        return [
+            ("first", "First free cell"),
+            ("nearest_level", "Nearest tray"),
+            ("most_used_tray", "Fill the most used tray first"),
+            ("spread", "Spread the load between the trays"),
+        ]
+
     @property
     def _model_for_mode(self):
         return {
@@ -81,28 +193,58 @@ class VerticalLiftShuttle(models.Model):
 
         """
         self.ensure_one()
-        _logger.info("send %r", payload)
-        command_values = {"shuttle_id": self.id, "command": payload.decode()}
+        return self._hardware_send_messages([payload])
+
+    def _hardware_send_messages(self, payloads):
+        """Send several messages on the same connection
+
+        The commands are logged in one go, before sending the messages or
+        after when ``log_commands_after_send`` is set.
 
-        self.env["vertical.lift.command"].sudo().create(command_values)
+        :param payloads: a list of bytes objects containing the payloads
+
+        """
+        self.ensure_one()
+        _logger.info("send %r", payloads)
         if self.hardware == "simulation":
-            self.env.user.notify_info(
-                message=payload,
-                title=_("Lift Simulation"),
-                params=self._get_user_notification_params(),
-            )
+            self._hardware_log_commands(payloads)
+            for payload in payloads:
+                self.env.user.notify_info(
+                    message=payload,
+                    title=_("Lift Simulation"),
+                    params=self._get_user_notification_params(),
+                )
             return True
-        else:
+        if not self.log_commands_after_send:
+            self._hardware_log_commands(payloads)
+        # a connection kept open may have been closed since, try again once
+        # with a new connection, without sending again the payloads already
+        # sent
+        sent = 0
+        for retry in (self.keep_connection, False):
             conn = self._hardware_get_server_connection()
             try:
-                offset = 0
-                while True:
-                    size = conn.send(payload[offset:])
-                    offset += size
-                    if offset >= len(payload) or not size:
-                        break
-            finally:
-                self._hardware_release_server_connection(conn)
+                for payload in payloads[sent:]:
+                    conn.sendall(payload)
+                    sent += 1
+            except OSError:
+                conn.close()
+                if retry:
+                    _logger.info("connection to %s lost, reconnecting", self.server)
+                    continue
+                raise
+            self._hardware_release_server_connection(conn)
+            break
+        if self.log_commands_after_send:
+            self._hardware_log_commands(payloads)
+
+    def _hardware_log_commands(self, payloads):
+        self.env["vertical.lift.command"].sudo().create(
+            [
+                {"shuttle_id": self.id, "command": payload.decode()}
+                for payload in payloads
+            ]
+        )
 
     def _hardware_response_callback(self, command):
         """should be called when a response is received from the hardware
@@ -121,22 +263,47 @@ class VerticalLiftShuttle(models.Model):
         """
         return True
 
+    def _hardware_connection_key(self):
+        return (self.server, self.port, self.use_tls)
+
     def _hardware_release_server_connection(self, conn):
-        conn.close()
+        if self.keep_connection:
+            _connection_pool.release(self._hardware_connection_key(), conn)
+        else:
+            conn.close()
 
     def _hardware_get_server_connection(self):
-        """This implementation will yield a new connection to the server
-        and close() it when exiting the context.
+        """This implementation will yield a connection to the server, kept
+        open from a previous message when ``keep_connection`` is set.
         Override to match the communication protocol of your hardware"""
+        if self.keep_connection:
+            conn = _connection_pool.acquire(self._hardware_connection_key())
+            if conn:
+                return conn
         conn = socket.create_connection((self.server, self.port))
         if self.use_tls:
-            ctx = ssl.create_default_context()
-            self._hardware_update_tls_context(ctx)
+            ctx = self._hardware_get_tls_context()
             conntls = ctx.wrap_socket(conn, server_hostname=self.server)
             return conntls
         else:
             return conn
 
+    def _hardware_get_tls_context(self):
+        """Return the TLS context of the server, created once per worker"""
+        key = self._hardware_connection_key()
+        ctx = _connection_pool.ssl_contexts.get(key)
+        if ctx is None:
+            ctx = ssl.create_default_context()
+            self._hardware_update_tls_context(ctx)
+            _connection_pool.ssl_contexts[key] = ctx
+        return ctx
+
+    def write(self, vals):
+        if {"server", "port", "use_tls", "keep_connection"} & set(vals):
+            for shuttle in self:
+                _connection_pool.clear(shuttle._hardware_connection_key())
+        return super().write(vals)
+
     def _hardware_update_tls_context(self, context):
         """Update the TLS context, e.g. to add a client certificate.
 
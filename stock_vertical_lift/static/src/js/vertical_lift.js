@@ -47,21 +47,51 @@ odoo.define("stock_vertical_lift.vertical_lift", function (require) {
                 if (channel === "notify_vertical_lift_screen") {
                     switch (message.action) {
                         case "refresh":
-                            self.vlift_bus_action_refresh(message.params);
+                            self.vlift_bus_action_refresh(
+                                message.params,
+                                message.counters
+                            );
                             break;
                     }
                 }
             });
         },
-        vlift_bus_action_refresh: function (params) {
+        vlift_bus_action_refresh: function (params, counters) {
             var selectedIds = this.getSelectedIds();
             if (!selectedIds.length) {
                 return;
             }
             var currentId = selectedIds[0];
-            if (params.id === currentId && params.model === this.modelName) {
+            if (params.model !== this.modelName) {
+                return;
+            }
+            if (params.id === currentId) {
                 this.reload();
+            } else if (counters) {
+                this.vlift_update_counters(counters);
+            }
+        },
+        vlift_update_counters: function (counters) {
+            // Read the counters of the screen again only when they changed
+            var record = this.model.get(this.handle);
+            var data = record.data;
+            if (!data.shuttle_id) {
+                return Promise.resolve();
+            }
+            var numberOfOps = counters.number_of_ops[data.shuttle_id.res_id] || 0;
+            if (
+                data.number_of_ops === numberOfOps &&
+                data.number_of_ops_all === counters.number_of_ops_all
+            ) {
+                return Promise.resolve();
             }
+            return this.update(
+                {
+                    fieldNames: ["number_of_ops", "number_of_ops_all"],
+                    keepChanges: true,
+                },
+                {reload: true}
+            );
         },
         destroy: function () {
             if (this.modelName.startsWith("vertical.lift.operation.")) {
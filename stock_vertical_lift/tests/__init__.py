@@ -4,3 +4,4 @@ from . import test_inventory
 from . import test_pick
 from . import test_put
 from . import test_controller
+from . import test_hardware_connection
@@ -44,3 +44,26 @@ class TestController(HttpSavepointCase):
             self.assertEqual(response.status_code, 200)
             self.shuttle.command_ids.invalidate_cache()
             self.assertEqual(self.shuttle.command_ids[0].answer, data["answer"])
+
+    def test_record_answers_batch(self):
+        commands = self.shuttle.command_ids.create(
+            [
+                {"shuttle_id": self.shuttle.id, "command": "0|test1|1"},
+                {"shuttle_id": self.shuttle.id, "command": "0|test2|1"},
+            ]
+        )
+        with mock.patch(CTRL_PATH + "._get_env_secret") as mocked:
+            mocked.return_value = "SECRET"
+            data = {
+                "answer": ["0|test1|2", "0|unknown|2", "0|test2|2"],
+                "secret": "SECRET",
+            }
+            logger = "odoo.addons.stock_vertical_lift.models.vertical_lift_command"
+            with mute_logger(logger):
+                response = self.url_open("/vertical-lift/batch", data=data)
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(
+                response.text.split("\n"), [str(rec_id) for rec_id in commands.ids]
+            )
+            commands.invalidate_cache()
+            self.assertEqual(commands.mapped("answer"), ["0|test1|2", "0|test2|2"])
@@ -0,0 +1,129 @@
+# Copyright 2026 Moduon Team S.L.
+# License AGPL-3.0 or later (http://www.gnu.org/licenses/agpl).
+
+import os
+import queue
+import selectors
+import socket
+import ssl
+import threading
+
+import mock
+
+from odoo.addons.stock_vertical_lift.models import vertical_lift_shuttle
+
+from .common import VerticalLiftCase
+
+CREATE_CONNECTION = (
+    "odoo.addons.stock_vertical_lift.models.vertical_lift_shuttle."
+    "socket.create_connection"
+)
+
+
+class TestHardwareConnection(VerticalLiftCase):
+    def setUp(self):
+        super().setUp()
+        self.shuttle.write({"server": "lift", "port": 9600, "keep_connection": True})
+        self.addCleanup(self.shuttle.write, {"keep_connection": False})
+
+    def _socketpair(self):
+        conn, peer = socket.socketpair()
+        self.addCleanup(conn.close)
+        self.addCleanup(peer.close)
+        return conn, peer
+
+    def test_keep_connection(self):
+        conn, peer = self._socketpair()
+        with mock.patch(CREATE_CONNECTION, return_value=conn) as create:
+            first = self.shuttle._hardware_get_server_connection()
+            self.shuttle._hardware_release_server_connection(first)
+            second = self.shuttle._hardware_get_server_connection()
+        self.assertIs(second, conn)
+        create.assert_called_once()
+        self.shuttle._hardware_release_server_connection(second)
+        # the server closed the connection: a new one is opened
+        peer.close()
+        new_conn, __ = self._socketpair()
+        with mock.patch(CREATE_CONNECTION, return_value=new_conn):
+            third = self.shuttle._hardware_get_server_connection()
+        self.assertIs(third, new_conn)
+        self.assertEqual(conn.fileno(), -1)
+
+    def _tls_server(self, payloads_count):
+        """Start a local TLS server which reads a number of payloads, then
+        closes the connection
+
+        :return: (port, queue of the payloads received)
+        """
+        context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+        context.load_cert_chain(os.path.join(os.path.dirname(__file__), "keycert.pem"))
+        listener = socket.create_server(("127.0.0.1", 0))
+        self.addCleanup(listener.close)
+        received = queue.Queue()
+
+        def serve():
+            raw_conn, __ = listener.accept()
+            with context.wrap_socket(raw_conn, server_side=True) as conn:
+                for __ in range(payloads_count):
+                    received.put(conn.recv(64))
+
+        thread = threading.Thread(target=serve, daemon=True)
+        thread.start()
+        self.addCleanup(thread.join, 5)
+        return listener.getsockname()[1], received
+
+    def test_keep_tls_connection(self):
+        port, received = self._tls_server(2)
+        self.shuttle.write({"server": "127.0.0.1", "port": port, "use_tls": True})
+
+        def update_tls_context(shuttle, context):
+            # self-signed certificate
+            context.check_hostname = False
+            context.verify_mode = ssl.CERT_NONE
+
+        with mock.patch.object(
+            type(self.shuttle), "_hardware_update_tls_context", update_tls_context
+        ):
+            first = self.shuttle._hardware_get_server_connection()
+        self.addCleanup(first.close)
+        self.assertIsInstance(first, ssl.SSLSocket)
+        first.sendall(b"first")
+        self.assertEqual(received.get(timeout=5), b"first")
+        self.shuttle._hardware_release_server_connection(first)
+        # the session tickets sent by the server do not discard the connection
+        second = self.shuttle._hardware_get_server_connection()
+        self.assertIs(second, first)
+        second.sendall(b"second")
+        self.assertEqual(received.get(timeout=5), b"second")
+        # the server closed the connection
+        with selectors.DefaultSelector() as selector:
+            selector.register(second, selectors.EVENT_READ)
+            selector.select(timeout=5)
+        self.assertFalse(
+            vertical_lift_shuttle.HardwareConnectionPool._is_healthy(second)
+        )
+
+    def test_close_connection(self):
+        self.shuttle.keep_connection = False
+        conn, __ = self._socketpair()
+        with mock.patch(CREATE_CONNECTION, return_value=conn):
+            first = self.shuttle._hardware_get_server_connection()
+        self.shuttle._hardware_release_server_connection(first)
+        self.assertEqual(conn.fileno(), -1)
+
+    def test_pool_idle_timeout(self):
+        pool = vertical_lift_shuttle.HardwareConnectionPool(idle_timeout=-1)
+        conn, __ = self._socketpair()
+        pool.release("key", conn)
+        self.assertIsNone(pool.acquire("key"))
+        self.assertEqual(conn.fileno(), -1)
+
+    def test_pool_max_size(self):
+        pool = vertical_lift_shuttle.HardwareConnectionPool(max_size=1)
+        conn1, __ = self._socketpair()
+        conn2, __ = self._socketpair()
+        pool.release("key", conn1)
+        pool.release("key", conn2)
+        self.assertEqual(conn2.fileno(), -1)
+        self.assertIs(pool.acquire("key"), conn1)
+        self.assertIsNone(pool.acquire("key"))
@@ -197,6 +197,18 @@ class TestPick(VerticalLiftCase):
         self.assertEqual(operation1.number_of_ops_all, 6)
         self.assertEqual(operation2.number_of_ops_all, 6)
 
+    def test_pick_notification_counters(self):
+        operation = self._open_screen("pick")
+        counters = operation._get_notification_counters()
+        self.assertEqual(operation.number_of_ops, operation.count_move_lines_to_do())
+        self.assertEqual(
+            counters["number_of_ops"][self.shuttle.id], operation.number_of_ops
+        )
+        self.assertEqual(
+            operation.number_of_ops_all, operation.count_move_lines_to_do_all()
+        )
+        self.assertEqual(counters["number_of_ops_all"], operation.number_of_ops_all)
+
     def test_on_barcode_scanned(self):
         operation = self._open_screen("pick")
         self.assertEqual(operation.state, "scan_destination")
@@ -266,3 +278,44 @@ class TestPick(VerticalLiftCase):
         ml.move_id.state = "draft"
         ml.product_id = False
         self.assertFalse(operation.product_packagings)
+
+    def test_pick_queue_grouped_by_tray(self):
+        """Lines are picked tray by tray, each tray is fetched once"""
+        self.location_1a.posz = 2
+        self.location_1b.posz = 1
+        self._update_quantity_in_cell(self.location_1a_x1y1, self.product_recovery, 10)
+        pickings = self.env["stock.picking"].browse()
+        for product in (self.product_recovery, self.product_socks) * 2:
+            pickings |= self._create_simple_picking_out(product, 1)
+        pickings.action_confirm()
+        pickings.action_assign()
+        operation = self._open_screen("pick")
+        move_lines = self.env["stock.move.line"].browse(operation._pick_queue_ids())
+        self.assertEqual(len(move_lines), operation.number_of_ops)
+        trays = [operation._pick_queue_tray(line) for line in move_lines]
+        # the nearest end of the carrier is tray 1B
+        self.assertEqual(trays[0], self.location_1b)
+        tray_changes = sum(1 for prev, tray in zip(trays, trays[1:]) if prev != tray)
+        self.assertEqual(tray_changes, 1)
+        simulation = operation._simulate_pick_wave()[self.shuttle.name]
+        self.assertEqual(simulation["lines"], len(move_lines))
+        self.assertEqual(simulation["queue"], 2 * 100 / len(move_lines))
+        self.assertGreaterEqual(simulation["move_lines"], simulation["queue"])
+        # a line reserved during the wave joins the lines of its tray
+        new_picking = self._create_simple_picking_out(self.product_socks, 1)
+        new_picking.action_confirm()
+        new_picking.action_assign()
+        new_line = new_picking.move_line_ids
+        self.assertEqual(operation._pick_queue_tray(new_line), self.location_1b)
+        index = trays.index(self.location_1a)
+        first_line = operation.current_move_line_id
+        operation.select_next_move_line()
+        queue = operation._pick_queue_ids()
+        self.assertEqual(
+            queue, move_lines.ids[:index] + new_line.ids + move_lines.ids[index:]
+        )
+        picked = first_line
+        for __ in queue[1:]:
+            picked |= operation.current_move_line_id
+            operation.select_next_move_line()
+        self.assertEqual(picked.ids, queue)
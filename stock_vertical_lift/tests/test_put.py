@@ -82,6 +82,36 @@ class TestPut(VerticalLiftCase):
         self.assertEqual(operation.state, "scan_tray_type")
         self.assertEqual(operation.current_move_line_id, self.in_move_line)
 
+    def test_transition_scan_source_lot(self):
+        lot, __ = self.env["stock.production.lot"].create(
+            [
+                {
+                    "name": "VLIFT-LOT",
+                    "product_id": product.id,
+                    "company_id": self.env.company.id,
+                }
+                # the same lot name on another product
+                for product in (self.product_socks, self.product_recovery)
+            ]
+        )
+        self.in_move_line.lot_id = lot
+        operation = self._open_screen("put")
+        operation.on_barcode_scanned(lot.name)
+        self.assertEqual(operation.state, "scan_tray_type")
+        self.assertEqual(operation.current_move_line_id, self.in_move_line)
+
+    def test_resolve_barcode(self):
+        operation = self._open_screen("put")
+        records = operation._resolve_barcode(
+            self.product_socks.barcode, ("product.product", "stock.location")
+        )
+        self.assertEqual(records["product.product"], self.product_socks)
+        self.assertFalse(records["stock.location"])
+        records = operation._resolve_barcode(
+            self.location_1a.barcode, ("stock.location",)
+        )
+        self.assertEqual(records["stock.location"], self.location_1a)
+
     def test_transition_scan_tray_type_to_save(self):
         operation = self._open_screen("put")
         # assume we already scanned the product
@@ -158,3 +188,45 @@ class TestPut(VerticalLiftCase):
         operation.button_release()
         self.assertEqual(operation.state, "scan_source")
         self.assertFalse(operation.current_move_line_id)
+
+    def test_cell_allocation_policies(self):
+        tray_type = self.env["stock.location.tray.type"].create(
+            {"name": "policy tray type", "code": "POLICY", "rows": 1, "cols": 2}
+        )
+        trays = self.env["stock.location"].create(
+            [
+                {
+                    "name": name,
+                    "location_id": self.shuttle.location_id.id,
+                    "tray_type_id": tray_type.id,
+                    "posz": posz,
+                    "usage": "internal",
+                }
+                for name, posz in (("Tray Z1", 5), ("Tray Z2", 1))
+            ]
+        )
+        tray_z1, tray_z2 = trays
+        cells = {(tray, cell.posx): cell for tray in trays for cell in tray.child_ids}
+        self._update_quantity_in_cell(cells[tray_z2, 1], self.product_socks, 1)
+        operation = self._open_screen("put")
+        operation.current_move_line_id = self.in_move_line
+        self.assertEqual(
+            operation._count_free_cells_by_tray(tray_type), {tray_z1: 2, tray_z2: 1}
+        )
+        expected = {
+            "first": cells[tray_z1, 1],
+            # the carrier is at the access point, tray Z2 is the lowest
+            "nearest_level": cells[tray_z2, 2],
+            "most_used_tray": cells[tray_z2, 2],
+            "spread": cells[tray_z1, 1],
+        }
+        for policy, cell in expected.items():
+            self.shuttle.cell_allocation_policy = policy
+            self.assertEqual(operation._select_free_cell(tray_type), cell, policy)
+        # no free cell left for the tray type
+        self._update_quantity_in_cell(cells[tray_z2, 2], self.product_socks, 1)
+        self._update_quantity_in_cell(cells[tray_z1, 1], self.product_socks, 1)
+        self._update_quantity_in_cell(cells[tray_z1, 2], self.product_socks, 1)
+        for policy in expected:
+            self.shuttle.cell_allocation_policy = policy
+            self.assertFalse(operation._select_free_cell(tray_type))
@@ -1,2 +1,3 @@
 from . import stock_location
 from . import vertical_lift_shuttle
+from . import vertical_lift_operation_base
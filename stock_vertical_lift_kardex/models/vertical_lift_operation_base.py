@@ -0,0 +1,14 @@
+# Copyright 2026 Moduon Team S.L.
+# License AGPL-3.0 or later (http://www.gnu.org/licenses/agpl).
+
+from odoo import models
+
+
+class VerticalLiftOperationTransfer(models.AbstractModel):
+    _inherit = "vertical.lift.operation.transfer"
+
+    def _get_tray_position(self, tray):
+        # the level of a tray is the carrier sent to the Kardex lift
+        if tray.level and tray.level.isdigit():
+            return int(tray.level)
+        return super()._get_tray_position(tray)
@@ -0,0 +1,97 @@
+#!/usr/bin/python3
+"""Measure the throughput and latency of the proxy
+
+Sends commands to the proxy from several persistent connections and
+receives the answers in place of Odoo. Start the proxy with its Odoo url
+pointing to this script, e.g. with the fake JMIF server:
+
+    ./fake-jmif-server.py --latency 0.01 &
+    ./kardex-proxy.py --kardex-host 127.0.0.1 --odoo-url http://127.0.0.1:8070 &
+    ./benchmark.py --odoo-port 8070 --commands 1000
+"""
+import argparse
+import asyncio
+import statistics
+import sys
+import time
+
+from aiohttp import web  # pylint: disable=missing-manifest-dependency
+
+
+async def send_commands(args, host_ids, sent):
+    _reader, writer = await asyncio.open_connection(args.proxy_host, args.proxy_port)
+    for host_id in host_ids:
+        sent[host_id] = time.monotonic()
+        writer.write(("1|%s|SH1-1|0|0||||||||\r\n" % host_id).encode("iso-8859-1"))
+        await writer.drain()
+    writer.close()
+    await writer.wait_closed()
+
+
+async def run(args):
+    sent = {}
+    received = {}
+    done = asyncio.Event()
+
+    async def answer(request):
+        data = await request.post()
+        for answer in data.getall("answer"):
+            host_id = answer.split("|")[1]
+            if host_id in sent:
+                received[host_id] = time.monotonic()
+        if len(received) == args.commands:
+            done.set()
+        return web.Response(text="1")
+
+    app = web.Application()
+    app.router.add_post("/vertical-lift/batch", answer)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    await web.TCPSite(runner, "127.0.0.1", args.odoo_port).start()
+
+    host_ids = ["bench%d" % i for i in range(args.commands)]
+    start = time.monotonic()
+    await asyncio.gather(
+        *(
+            send_commands(args, host_ids[i :: args.connections], sent)
+            for i in range(args.connections)
+        )
+    )
+    try:
+        await asyncio.wait_for(done.wait(), args.timeout)
+    except asyncio.TimeoutError:
+        pass
+    elapsed = time.monotonic() - start
+    await runner.cleanup()
+
+    latencies = sorted(received[key] - sent[key] for key in received)
+    print("answers: %d/%d in %.2fs" % (len(received), args.commands, elapsed))
+    if latencies:
+        print("throughput: %.1f commands/s" % (len(latencies) / elapsed))
+        print(
+            "latency: mean %.3fs, median %.3fs, p95 %.3fs, max %.3fs"
+            % (
+                statistics.mean(latencies),
+                statistics.median(latencies),
+                latencies[int(len(latencies) * 0.95) - 1],
+                latencies[-1],
+            )
+        )
+    return 0 if len(received) == args.commands else 1
+
+
+def make_parser():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--proxy-host", default="127.0.0.1")
+    parser.add_argument("--proxy-port", default=7654, type=int)
+    parser.add_argument("--odoo-port", default=8070, type=int)
+    parser.add_argument("--commands", default=500, type=int)
+    parser.add_argument("--connections", default=4, type=int)
+    parser.add_argument("--timeout", default=60, type=float)
+    return parser
+
+
+if __name__ == "__main__":
+    sys.exit(
+        asyncio.get_event_loop().run_until_complete(run(make_parser().parse_args()))
+    )
@@ -0,0 +1,84 @@
+#!/usr/bin/python3
+"""Fake JMIF server, to run the proxy without a Kardex vertical lift
+
+Every message received is answered with a success code after a delay, the
+answer repeating the hostId of the message.
+"""
+import argparse
+import asyncio
+import logging
+import sys
+
+_logger = logging.getLogger(__name__)
+
+
+class FakeJMIFProtocol(asyncio.Protocol):
+    def __init__(self, args):
+        self.args = args
+        self.transport = None
+        self.buffer = b""
+        self.busy_until = 0.0
+
+    def connection_made(self, transport):
+        _logger.info("JMIF: cnx made")
+        self.transport = transport
+
+    def data_received(self, data):
+        *frames, self.buffer = (self.buffer + data.replace(b"\0", b"")).split(b"\n")
+        loop = asyncio.get_event_loop()
+        for frame in frames:
+            message = frame.rstrip(b"\r").decode("iso-8859-1", "replace")
+            if not message:
+                continue
+            fields = message.split("|")
+            host_id = fields[1] if len(fields) > 1 else ""
+            # the lift handles the commands one after the other
+            self.busy_until = max(self.busy_until, loop.time()) + self.args.latency
+            loop.call_at(self.busy_until, self.answer, host_id)
+
+    def answer(self, host_id):
+        if self.transport is None or self.transport.is_closing():
+            return
+        answer = "0|%s|SH1-1|0|0||||||||\r\n" % host_id
+        _logger.debug("JMIF: answer %s", answer)
+        self.transport.write(answer.encode("iso-8859-1"))
+
+    def connection_lost(self, exc):
+        _logger.info("JMIF: cnx lost")
+        self.transport = None
+
+
+def main(args):
+    logging.basicConfig(
+        level=logging.DEBUG if args.debug else logging.INFO,
+        format="%(asctime)s - %(levelname)s - %(message)s",
+    )
+    loop = asyncio.get_event_loop()
+    server = loop.run_until_complete(
+        loop.create_server(
+            lambda: FakeJMIFProtocol(args), host=args.host, port=args.port
+        )
+    )
+    _logger.info("JMIF: listening on %s:%s", args.host, args.port)
+    try:
+        loop.run_forever()
+    finally:
+        server.close()
+
+
+def make_parser():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", default=9600, type=int)
+    parser.add_argument(
+        "--latency",
+        default=0.05,
+        type=float,
+        help="seconds taken by the lift to handle a command",
+    )
+    parser.add_argument("--debug", action="store_true")
+    return parser
+
+
+if __name__ == "__main__":
+    sys.exit(main(make_parser().parse_args()))
@@ -1,19 +1,49 @@
 #!/usr/bin/python3
 import argparse
 import asyncio
+import collections
 import logging
 import os
 import random
 import ssl
 import sys
+import tempfile
 import time
 
 import aiohttp  # pylint: disable=missing-manifest-dependency
 
 _logger = logging.getLogger(__name__)
 
+# maximum size of a message, a connection sending bigger messages is closed
+MAX_FRAME_SIZE = 65535
+
+
+def split_frames(buffer):
+    """Split the complete messages out of a buffer
+
+    Messages end with a new line, with or without carriage return.
+
+    :return: tuple (list of complete messages without their end of line,
+             remaining incomplete data)
+    """
+    *frames, remaining = buffer.split(b"\n")
+    return [frame.rstrip(b"\r") for frame in frames], remaining
+
+
+def get_host_id(message):
+    """Return the hostId of a message or an answer: its second field"""
+    fields = message.split("|", 2)
+    return fields[1] if len(fields) > 1 else ""
+
 
 class KardexProxyProtocol(asyncio.Protocol):
+    """Receive the messages from Odoo and put them in the queue
+
+    A connection can send any number of messages, each of them ending with a
+    new line. When the queue is full, the connection stops being read until
+    the queue has room again.
+    """
+
     def __init__(self, queue, loop, args):
         _logger.info("Proxy: created")
         self.transport = None
@@ -21,6 +51,8 @@ class KardexProxyProtocol(asyncio.Protocol):
         self.queue = queue
         self.loop = loop
         self.args = args
+        self.pending = collections.deque()
+        self.drain_task = None
 
     def connection_made(self, transport):
         _logger.info("Proxy: incoming cnx made")
@@ -28,24 +60,46 @@ class KardexProxyProtocol(asyncio.Protocol):
         self.buffer = b""
 
     def data_received(self, data):
-        self.buffer += data
-        _logger.info("Proxy: received %s", data)
-        if len(self.buffer) > 65535:
+        _logger.debug("Proxy: received %s", data)
+        frames, self.buffer = split_frames(self.buffer + data)
+        for frame in frames:
+            if frame:
+                self.pending.append(frame.decode("iso-8859-1", "replace") + "\r\n")
+        if len(self.buffer) > MAX_FRAME_SIZE:
             # prevent buffer overflow
+            _logger.error("Proxy: message too long, closing cnx")
             self.transport.close()
+            return
+        self.forward()
 
     def eof_received(self):
         _logger.info("Proxy: received EOF")
-        if self.buffer[-1] != b"\n":
-            # bad format -> close
-            self.transport.close()
-        data = (
-            self.buffer.replace(b"\r\n", b"\n")
-            .replace(b"\n", b"\r\n")
-            .decode("iso-8859-1", "replace")
-        )
-        self.loop.create_task(self.queue.put(data))
-        self.buffer = b""
+        # the last message may not end with a new line
+        self.data_received(b"\n")
+
+    def forward(self):
+        """Put the pending messages in the queue
+
+        Stop reading the connection while the queue is full.
+        """
+        while self.pending and self.drain_task is None:
+            try:
+                self.queue.put_nowait(self.pending[0])
+            except asyncio.QueueFull:
+                _logger.warning("Proxy: queue full, pausing cnx")
+                if self.transport:
+                    self.transport.pause_reading()
+                self.drain_task = self.loop.create_task(self.drain())
+                return
+            self.pending.popleft()
+
+    async def drain(self):
+        while self.pending:
+            await self.queue.put(self.pending.popleft())
+        self.drain_task = None
+        if self.transport and not self.transport.is_closing():
+            _logger.info("Proxy: queue available, resuming cnx")
+            self.transport.resume_reading()
 
     def connection_lost(self, exc):
         if exc:
@@ -127,6 +181,13 @@ class ReconnectingTCPClientProtocol(asyncio.Protocol):
 
 
 class KardexClientProtocol(ReconnectingTCPClientProtocol):
+    """Send the queued messages to the JMIF server and forward its answers
+
+    Messages are sent without waiting for the answer of the previous ones,
+    up to ``args.max_in_flight`` messages waiting for their answer. A
+    message is acknowledged by the first answer having the same hostId, or
+    given up after ``args.command_timeout`` seconds.
+    """
 
     max_delay = 15
     initial_delay = 0.5
@@ -146,9 +207,18 @@ class KardexClientProtocol(ReconnectingTCPClientProtocol):
         self.transport = None
         self.buffer = b""
         self.args = args
+        self.connected = asyncio.Event()
+        self.window = asyncio.Semaphore(args.max_in_flight)
+        # {hostId: time the message has been sent}
+        self.in_flight = {}
+        self.session = None
+        self.answers = []
+        self.answers_ready = asyncio.Event()
 
     def connection_made(self, transport):
         self.transport = transport
+        self.buffer = b""
+        self.connected.set()
         _logger.info("connected to kardex server %r", transport)
 
     async def keepalive(self):
@@ -156,7 +226,8 @@ class KardexClientProtocol(ReconnectingTCPClientProtocol):
         while True:
             t = int(time.time())
             msg = "61|ping%d|SH1-1|0|0||||||||\r\n" % t
-            await self.send_message(msg)
+            if self.transport:
+                await self.send_message(msg)
             await asyncio.sleep(self.keepalive_delay)
 
     async def send_message(self, message):
@@ -167,24 +238,55 @@ class KardexClientProtocol(ReconnectingTCPClientProtocol):
     async def process_queue(self):
         while True:
             message = await self.queue.get()
+            await self.window.acquire()
+            await self.connected.wait()
+            host_id = get_host_id(message)
+            if host_id in self.in_flight:
+                # a message with the same hostId is already waiting, only
+                # keep one in the window
+                self.window.release()
+            self.in_flight[host_id] = time.monotonic()
             await self.send_message(message)
 
+    def acknowledge(self, host_id):
+        sent = self.in_flight.pop(host_id, None)
+        if sent is None:
+            return
+        self.window.release()
+        _logger.info("answer for %s in %.3fs", host_id, time.monotonic() - sent)
+
+    async def expire_in_flight(self):
+        """Give up the messages waiting for their answer for too long"""
+        while True:
+            await asyncio.sleep(1)
+            limit = time.monotonic() - self.args.command_timeout
+            for host_id, sent in list(self.in_flight.items()):
+                if sent < limit:
+                    _logger.warning("no answer for %s, giving up", host_id)
+                    self.acknowledge(host_id)
+
     def data_received(self, data):
         data = data.replace(b"\0", b"")
         _logger.info("RECV %s", data)
-        self.buffer += data
-        if b"\r\n" in self.buffer:
-            msg, sep, rem = self.buffer.partition(b"\r\n")
-            self.buffer = rem
-            msg = msg.decode("iso-8859-1", "replace").strip()
+        frames, self.buffer = split_frames(self.buffer + data)
+        for frame in frames:
+            msg = frame.decode("iso-8859-1", "replace").strip()
+            if not msg:
+                continue
             if msg.startswith("0|ping"):
                 _logger.info("ping ok")
-            else:
-                _logger.info("notify odoo: %s", msg)
-                self._loop.create_task(self.notify_odoo(msg))
+                continue
+            self.acknowledge(get_host_id(msg))
+            _logger.info("notify odoo: %s", msg)
+            self.notify_odoo(msg)
 
     def connection_lost(self, exc):
         _logger.error("Kardex client: connection lost: %s", exc)
+        self.transport = None
+        self.connected.clear()
+        # the answers of the messages sent will never come
+        for host_id in list(self.in_flight):
+            self.acknowledge(host_id)
         super().connection_lost(exc)
 
     def connection_failed(self, exc):
@@ -195,13 +297,94 @@ class KardexClientProtocol(ReconnectingTCPClientProtocol):
         super().stop_trying()
         self._loop.stop()
 
-    async def notify_odoo(self, msg):
-        url = self.args.odoo_url + "/vertical-lift"
-        async with aiohttp.ClientSession() as session:
-            params = {"answer": msg, "secret": self.args.secret}
-            async with session.post(url, data=params) as resp:
-                resp_text = await resp.text()
-                _logger.info("Reponse from Odoo: %s %s", resp.status, resp_text)
+    def notify_odoo(self, msg):
+        """Queue an answer to send to Odoo in the next batch"""
+        self.answers.append(msg)
+        self.answers_ready.set()
+
+    async def process_answers(self):
+        """Send the answers to Odoo by batch
+
+        The answers received within ``args.batch_window`` seconds are sent in
+        the same request. The spooled answers are sent again at least every
+        minute.
+        """
+        while True:
+            try:
+                await asyncio.wait_for(self.answers_ready.wait(), 60)
+            except asyncio.TimeoutError:
+                if self.args.spool and os.path.exists(self.args.spool):
+                    await self.post_answers([])
+                continue
+            await asyncio.sleep(self.args.batch_window)
+            answers, self.answers = self.answers, []
+            self.answers_ready.clear()
+            for index in range(0, len(answers), self.args.batch_size):
+                await self.post_answers(answers[index : index + self.args.batch_size])
+
+    def get_session(self):
+        if self.session is None or self.session.closed:
+            self.session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=self.args.odoo_connections),
+                timeout=aiohttp.ClientTimeout(total=self.args.odoo_timeout),
+            )
+        return self.session
+
+    async def post_answers(self, answers):
+        """Send answers to Odoo, retrying on failure
+
+        The answers which cannot be sent, or which are refused by Odoo (e.g.
+        secret mismatch), are written in the spool file, they are sent again
+        with the next batch.
+        """
+        answers = self.read_spool() + answers
+        url = self.args.odoo_url + "/vertical-lift/batch"
+        data = [("secret", self.args.secret)] + [
+            ("answer", answer) for answer in answers
+        ]
+        delay = 1
+        for attempt in range(self.args.odoo_retries + 1):
+            if attempt:
+                await asyncio.sleep(delay)
+                delay *= 2
+            try:
+                async with self.get_session().post(url, data=data) as resp:
+                    resp_text = await resp.text()
+            except (aiohttp.ClientError, asyncio.TimeoutError) as exc:
+                _logger.error("Odoo unreachable: %s", exc)
+                continue
+            _logger.info(
+                "Reponse from Odoo for %d answers: %s %s",
+                len(answers),
+                resp.status,
+                resp_text,
+            )
+            if resp.status < 400:
+                return
+            if resp.status < 500:
+                # sending them again would be refused the same way, keep them
+                # until the configuration is fixed
+                _logger.error("%d answers refused by Odoo", len(answers))
+                break
+        self.write_spool(answers)
+
+    def read_spool(self):
+        """Return the answers of the spool file and empty it"""
+        if not self.args.spool or not os.path.exists(self.args.spool):
+            return []
+        with open(self.args.spool, encoding="iso-8859-1") as spool:
+            answers = [line.rstrip("\n") for line in spool if line.strip()]
+        os.remove(self.args.spool)
+        _logger.info("%d answers read from spool", len(answers))
+        return answers
+
+    def write_spool(self, answers):
+        if not self.args.spool:
+            _logger.error("%d answers lost: %s", len(answers), answers)
+            return
+        with open(self.args.spool, "a", encoding="iso-8859-1") as spool:
+            spool.writelines(answer + "\n" for answer in answers)
+        _logger.warning("%d answers written to spool", len(answers))
 
 
 def main(args, ssl_context=None):
@@ -215,7 +398,7 @@ def main(args, ssl_context=None):
     if args.debug:
         loop.set_debug(True)
 
-    queue = asyncio.Queue(loop=loop)
+    queue = asyncio.Queue(maxsize=args.queue_size)
     # create the main server
     coro = loop.create_server(
         lambda: KardexProxyProtocol(queue, loop, args),
@@ -241,6 +424,8 @@ def main(args, ssl_context=None):
     client.connect()
     loop.create_task(client.keepalive())
     loop.create_task(client.process_queue())
+    loop.create_task(client.expire_in_flight())
+    loop.create_task(client.process_answers())
     loop.run_forever()
 
 
@@ -257,6 +442,17 @@ def make_parser():
         if os.environ.get("KARDEX_TLS", "") in ("", "0", "false", "False", "FALSE")
         else True
     )
+    batch_window = float(os.environ.get("ODOO_BATCH_WINDOW", "0.2"))
+    batch_size = int(os.environ.get("ODOO_BATCH_SIZE", "100"))
+    odoo_connections = int(os.environ.get("ODOO_CONNECTIONS", "4"))
+    odoo_timeout = float(os.environ.get("ODOO_TIMEOUT", "30"))
+    odoo_retries = int(os.environ.get("ODOO_RETRIES", "3"))
+    spool = os.environ.get(
+        "SPOOL_FILE", os.path.join(tempfile.gettempdir(), "kardex-proxy.spool")
+    )
+    queue_size = int(os.environ.get("QUEUE_SIZE", "1000"))
+    max_in_flight = int(os.environ.get("KARDEX_MAX_IN_FLIGHT", "10"))
+    command_timeout = float(os.environ.get("KARDEX_COMMAND_TIMEOUT", "60"))
     debug = (
         True if os.environ.get("DEBUG", "") in ("1", "true", "True", "TRUE") else False
     )
@@ -267,9 +463,18 @@ def make_parser():
         ("--odoo-url", odoo_url, str),
         ("--odoo-db", odoo_db, str),
         ("--secret", secret, str),
+        ("--batch-window", batch_window, float),
+        ("--batch-size", batch_size, int),
+        ("--odoo-connections", odoo_connections, int),
+        ("--odoo-timeout", odoo_timeout, float),
+        ("--odoo-retries", odoo_retries, int),
+        ("--spool", spool, str),
         ("--kardex-host", kardex_host, str),
         ("--kardex-port", kardex_port, str),
         ("--kardex-use-tls", kardex_use_tls, bool),
+        ("--queue-size", queue_size, int),
+        ("--max-in-flight", max_in_flight, int),
+        ("--command-timeout", command_timeout, float),
         ("--debug", debug, bool),
     ]
     for name, default, type_ in arguments: